@@ -5,8 +5,53 @@
 - research_agent: 研究代理，负责搜索和信息收集
 - coder_agent: 编码代理，负责代码生成和执行
 - browser_agent: 浏览器代理，负责网页浏览和交互
+
+代理及其工具在首次使用时才创建，导入本模块不会加载LLM客户端和工具依赖。
 """
 
-from .agents import research_agent, coder_agent, browser_agent
+import threading
+
+__all__ = ["get_agent", "research_agent", "coder_agent", "browser_agent"]
+
+# 已创建的代理缓存
+_agents: dict = {}
+_agents_lock = threading.Lock()
+
+# 模块属性名到代理名称的映射
+_AGENT_ATTRIBUTES = {
+    "research_agent": "researcher",
+    "coder_agent": "coder",
+    "browser_agent": "browser",
+}
+
+
+def get_agent(name: str):
+    """
+    获取指定名称的代理，首次调用时创建并缓存
+
+    Args:
+        name: 代理名称，如"researcher"、"coder"、"browser"
+
+    Returns:
+        对应的ReAct代理
+
+    Raises:
+        ValueError: 当代理名称未知时抛出
+    """
+    if name in _agents:
+        return _agents[name]
+    from .agents import AGENT_FACTORIES
+
+    if name not in AGENT_FACTORIES:
+        raise ValueError(f"Unknown agent: {name}")
+    with _agents_lock:
+        if name not in _agents:
+            _agents[name] = AGENT_FACTORIES[name]()
+        return _agents[name]
+
 
-__all__ = ["research_agent", "coder_agent", "browser_agent"]
+def __getattr__(name: str):
+    """模块级属性的延迟加载：首次访问research_agent等属性时创建代理"""
+    if name in _AGENT_ATTRIBUTES:
+        return get_agent(_AGENT_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -10,6 +10,8 @@
 - 特定的大语言模型，根据任务复杂度选择
 - 专用工具集，提供执行任务所需的功能
 - 定制提示模板，引导代理行为方式
+
+代理通过工厂函数创建，由src.agents.get_agent在首次使用时调用并缓存。
 """
 
 from langgraph.prebuilt import create_react_agent
@@ -19,35 +21,67 @@ from src.tools import (
     bash_tool,
     browser_tool,
     crawl_tool,
+    crawl_many_tool,
     python_repl_tool,
     tavily_tool,
+    tavily_multi_search_tool,
 )
 
-from .llm import get_llm_by_type
-from src.config.agents import AGENT_LLM_MAP
+from .llm import get_llm_for_agent
 
-# 创建各种专用代理，每种代理使用不同的LLM配置和工具集
+# 创建各种专用代理的工厂函数，每种代理使用不同的LLM配置和工具集
 
-# 研究代理
-# 职责：负责收集和分析信息，执行网络搜索和网站爬取任务
-research_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["researcher"]),  # 根据配置获取研究员代理对应的LLM模型
-    tools=[tavily_tool, crawl_tool],               # 提供搜索和网页爬取工具
-    prompt=lambda state: apply_prompt_template("researcher", state),  # 应用研究员专用提示模板
-)
 
-# 编码代理
-# 职责：负责代码实现，执行代码编写、测试和调试任务
-coder_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["coder"]),       # 根据配置获取编码代理对应的LLM模型
-    tools=[python_repl_tool, bash_tool],           # 提供Python解释器和Bash命令行工具
-    prompt=lambda state: apply_prompt_template("coder", state),  # 应用编码专用提示模板
-)
+def create_research_agent():
+    """
+    研究代理
+    职责：负责收集和分析信息，执行网络搜索和网站爬取任务
+    """
+    return create_react_agent(
+        get_llm_for_agent("researcher"),  # 根据配置获取研究员代理对应的LLM模型
+        tools=[
+            tavily_tool,
+            tavily_multi_search_tool,
+            crawl_tool,
+            crawl_many_tool,
+        ],  # 提供搜索和网页爬取工具
+        prompt=lambda state: apply_prompt_template(
+            "researcher", state
+        ),  # 应用研究员专用提示模板
+    )
 
-# 浏览器代理
-# 职责：负责浏览网页，模拟用户浏览行为，处理网页交互
-browser_agent = create_react_agent(
-    get_llm_by_type(AGENT_LLM_MAP["browser"]),     # 根据配置获取浏览器代理对应的LLM模型
-    tools=[browser_tool],                           # 提供浏览器模拟工具
-    prompt=lambda state: apply_prompt_template("browser", state),  # 应用浏览器专用提示模板
-)
+
+def create_coder_agent():
+    """
+    编码代理
+    职责：负责代码实现，执行代码编写、测试和调试任务
+    """
+    return create_react_agent(
+        get_llm_for_agent("coder"),  # 根据配置获取编码代理对应的LLM模型
+        tools=[python_repl_tool, bash_tool],  # 提供Python解释器和Bash命令行工具
+        prompt=lambda state: apply_prompt_template(
+            "coder", state
+        ),  # 应用编码专用提示模板
+    )
+
+
+def create_browser_agent():
+    """
+    浏览器代理
+    职责：负责浏览网页，模拟用户浏览行为，处理网页交互
+    """
+    return create_react_agent(
+        get_llm_for_agent("browser"),  # 根据配置获取浏览器代理对应的LLM模型
+        tools=[browser_tool],  # 提供浏览器模拟工具
+        prompt=lambda state: apply_prompt_template(
+            "browser", state
+        ),  # 应用浏览器专用提示模板
+    )
+
+
+# 代理名称（与TEAM_MEMBERS一致）到工厂函数的映射
+AGENT_FACTORIES = {
+    "researcher": create_research_agent,
+    "coder": create_coder_agent,
+    "browser": create_browser_agent,
+}
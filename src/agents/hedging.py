@@ -0,0 +1,332 @@
+"""
+LLM请求对冲模块 - 降低短小且位于关键路径上的LLM调用的尾延迟
+
+服务商的尾延迟（p99往往是中位数的数倍）决定了协调、监督这类调用的端到端耗时。
+该模块提供：
+1. RequestHedger：按代理记录最近的响应延迟，以其分位数作为对冲延迟，
+   并用令牌桶限制对冲请求占请求总数的比例
+2. HedgingTransport：请求在对冲延迟内仍未收到响应时发出一个相同的请求，
+   采用先成功返回的响应并取消另一个（配置了多个端点时，路由器会把对冲请求
+   分配给负载更低的端点）
+3. 导出对冲次数、对冲请求胜出次数等指标
+
+只有AGENT_LLM_HEDGE_MAP中开启的代理的调用会被对冲，其余调用直接透传。
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Iterable, Optional
+
+import httpx
+
+from src.config.agents import (
+    AGENT_LLM_HEDGE_MAP,
+    LLM_HEDGE_PERCENTILE,
+    LLM_HEDGE_MIN_DELAY,
+    LLM_HEDGE_WINDOW,
+    LLM_HEDGE_MIN_SAMPLES,
+    LLM_HEDGE_MAX_RATIO,
+    LLM_HEDGE_BURST,
+)
+
+from .limiter import current_agent
+
+logger = logging.getLogger(__name__)
+
+# 同步调用的请求在该线程池中发出，调用线程只负责等待
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """获取发送同步对冲请求的线程池，首次使用时创建"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(thread_name_prefix="llm-hedge")
+        return _executor
+
+
+class RequestHedger:
+    """
+    对冲策略：决定是否以及何时对冲，并统计对冲效果
+    """
+
+    def __init__(
+        self,
+        name: str,
+        agents: Optional[Iterable[str]] = None,
+        percentile: float = LLM_HEDGE_PERCENTILE,
+        min_delay: float = LLM_HEDGE_MIN_DELAY,
+        window: int = LLM_HEDGE_WINDOW,
+        min_samples: int = LLM_HEDGE_MIN_SAMPLES,
+        max_ratio: float = LLM_HEDGE_MAX_RATIO,
+        burst: float = LLM_HEDGE_BURST,
+    ):
+        """
+        初始化对冲策略
+
+        Args:
+            name: 名称（LLM类型），用于日志和指标
+            agents: 需要对冲的代理，默认为AGENT_LLM_HEDGE_MAP中开启的代理
+            percentile: 对冲延迟取最近响应延迟的分位数
+            min_delay: 对冲延迟的下限（秒）
+            window: 每个代理保留的最近延迟样本数
+            min_samples: 延迟样本少于该数量时不对冲
+            max_ratio: 对冲请求数占请求总数的比例上限
+            burst: 对冲预算最多积累的次数
+        """
+        if agents is None:
+            agents = [
+                agent for agent, enabled in AGENT_LLM_HEDGE_MAP.items() if enabled
+            ]
+        self.name = name
+        self.agents = set(agents)
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.window = window
+        self.min_samples = min_samples
+        self.max_ratio = max_ratio
+        self.burst = burst
+        self.requests = 0
+        self.hedged = 0  # 发出的对冲请求数
+        self.hedge_wins = 0  # 对冲请求先于原请求返回的次数
+        self.budget_exhausted = 0  # 需要对冲但预算不足的次数
+        self._samples: dict[str, deque[float]] = {}
+        self._credit = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, agent: str, latency: float) -> None:
+        """记录一次成功请求的响应延迟（收到响应头的时间）"""
+        with self._lock:
+            samples = self._samples.get(agent)
+            if samples is None:
+                samples = self._samples[agent] = deque(maxlen=self.window)
+            samples.append(latency)
+
+    def delay(self, agent: str) -> Optional[float]:
+        """
+        计算对冲延迟：请求发出后经过这么长时间仍未返回时发出对冲请求
+
+        Args:
+            agent: 代理名称
+
+        Returns:
+            对冲延迟（秒），样本不足时返回None表示不对冲
+        """
+        with self._lock:
+            samples = self._samples.get(agent)
+            if samples is None or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        index = min(len(ordered) - 1, int(self.percentile * len(ordered)))
+        return max(self.min_delay, ordered[index])
+
+    def start(self, agent: Optional[str]) -> Optional[float]:
+        """
+        登记一次请求，并为其积累对冲预算
+
+        Args:
+            agent: 发出请求的代理名称
+
+        Returns:
+            对冲延迟（秒），该请求不需要对冲时返回None
+        """
+        if agent not in self.agents:
+            return None
+        with self._lock:
+            self.requests += 1
+            self._credit = min(self.burst, self._credit + self.max_ratio)
+        return self.delay(agent)
+
+    def try_hedge(self) -> bool:
+        """消耗一次对冲预算，预算不足时返回False"""
+        with self._lock:
+            if self._credit < 1:
+                self.budget_exhausted += 1
+                return False
+            self._credit -= 1
+            self.hedged += 1
+            return True
+
+    def record_winner(self, hedge_won: bool) -> None:
+        """记录一次对冲的结果"""
+        if hedge_won:
+            with self._lock:
+                self.hedge_wins += 1
+
+    def stats(self) -> dict:
+        """
+        获取对冲指标
+
+        Returns:
+            请求数、对冲数、对冲胜出次数和比例、预算不足次数，以及各代理当前的对冲延迟
+        """
+        delays = {agent: self.delay(agent) for agent in self.agents}
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "hedge_win_rate": self.hedge_wins / self.hedged if self.hedged else 0.0,
+                "budget_exhausted": self.budget_exhausted,
+                "delays": delays,
+            }
+
+
+def _clone(request: httpx.Request) -> httpx.Request:
+    """复制一个已读取请求体的请求，下层传输层会原地修改请求的URL和请求头"""
+    return httpx.Request(
+        request.method,
+        request.url,
+        headers=request.headers.copy(),
+        content=request.content,
+        extensions=dict(request.extensions),
+    )
+
+
+def _is_success(response: httpx.Response) -> bool:
+    return response.status_code < 400
+
+
+class HedgingTransport(httpx.BaseTransport):
+    """
+    同步对冲传输层
+
+    原请求和对冲请求都在线程池中发出。同步请求无法中途打断，
+    落后的一方在收到响应头后立即关闭，不再读取响应体。
+    """
+
+    def __init__(self, hedger: RequestHedger, transport: httpx.BaseTransport):
+        """
+        初始化对冲传输层
+
+        Args:
+            hedger: 对冲策略
+            transport: 实际发送请求的传输层
+        """
+        self.hedger = hedger
+        self._transport = transport
+
+    def _send(self, agent: str, request: httpx.Request) -> httpx.Response:
+        """发送请求，成功时记录延迟样本"""
+        started = time.monotonic()
+        response = self._transport.handle_request(request)
+        if _is_success(response):
+            self.hedger.record(agent, time.monotonic() - started)
+        return response
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        agent = current_agent()
+        delay = self.hedger.start(agent)
+        if delay is None:
+            # 延迟样本还不够时直接发送，只记录延迟
+            if agent not in self.hedger.agents:
+                return self._transport.handle_request(request)
+            return self._send(agent, request)
+        request.read()
+        hedge_request = _clone(request)
+        primary = _get_executor().submit(self._send, agent, request)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.hedger.try_hedge():
+            return primary.result()
+
+        logger.debug(f"Hedging {agent} request after {delay:.2f}s")
+        hedge = _get_executor().submit(self._send, agent, hedge_request)
+        pending = {primary, hedge}
+        winner = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and _is_success(future.result()):
+                    winner = future
+                    break
+        if winner is None:
+            winner = primary
+        loser = hedge if winner is primary else primary
+        loser.add_done_callback(_close_response)
+        self.hedger.record_winner(winner is hedge)
+        return winner.result()
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+def _close_response(future: Future) -> None:
+    """关闭落后一方的响应，使下层传输层归还连接并结束统计"""
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+class AsyncHedgingTransport(httpx.AsyncBaseTransport):
+    """
+    异步对冲传输层：HedgingTransport的异步版本，落后一方的请求会被直接取消
+    """
+
+    def __init__(self, hedger: RequestHedger, transport: httpx.AsyncBaseTransport):
+        """
+        初始化异步对冲传输层
+
+        Args:
+            hedger: 对冲策略
+            transport: 实际发送请求的传输层
+        """
+        self.hedger = hedger
+        self._transport = transport
+
+    async def _send(self, agent: str, request: httpx.Request) -> httpx.Response:
+        """发送请求，成功时记录延迟样本"""
+        started = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        if _is_success(response):
+            self.hedger.record(agent, time.monotonic() - started)
+        return response
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        agent = current_agent()
+        delay = self.hedger.start(agent)
+        if delay is None:
+            if agent not in self.hedger.agents:
+                return await self._transport.handle_async_request(request)
+            return await self._send(agent, request)
+        await request.aread()
+        hedge_request = _clone(request)
+        primary = asyncio.ensure_future(self._send(agent, request))
+        hedge = winner = None
+        try:
+            done, _ = await asyncio.wait([primary], timeout=delay)
+            if done or not self.hedger.try_hedge():
+                winner = primary
+                return await primary
+
+            logger.debug(f"Hedging {agent} request after {delay:.2f}s")
+            hedge = asyncio.ensure_future(self._send(agent, hedge_request))
+            pending = {primary, hedge}
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None and _is_success(task.result()):
+                        winner = task
+                        break
+            if winner is None:
+                winner = primary
+            self.hedger.record_winner(winner is hedge)
+            return winner.result()
+        finally:
+            # 取消仍在进行的请求；已经返回的落后响应直接关闭
+            for task in (primary, hedge):
+                if task is None or task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    await task.result().aclose()
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
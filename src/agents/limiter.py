@@ -0,0 +1,441 @@
+"""
+LLM并发限制模块 - 按模型自适应限制并发请求数
+
+大量工作流同时运行时，每个节点都会立即调用LLM，容易在突发时触发
+服务商的限流，随后又因集中重试形成重试风暴。该模块提供：
+1. AdaptiveLimiter：按AIMD（加性增、乘性减）策略调整并发上限，
+   请求成功时缓慢增加上限，服务商返回429或5xx时成倍降低。响应延迟随输出长度
+   变化很大，不作为拥塞信号
+2. 有界的优先级等待队列：协调和监督节点优先于报告节点获得并发名额，
+   队列已满或等待超时时直接返回合成的429响应，由模型客户端按Retry-After退避重试
+3. LimitingTransport：以httpx传输层的形式接入模型客户端，
+   所有节点和代理的LLM调用都会经过同一个限流器
+4. 导出并发上限、进行中请求数和队列深度等指标
+"""
+
+import asyncio
+import heapq
+import itertools
+import logging
+import threading
+import time
+from typing import Optional
+
+import httpx
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.config.agents import (
+    AGENT_LLM_PRIORITY,
+    LLM_LIMITER_INITIAL_LIMIT,
+    LLM_LIMITER_MIN_LIMIT,
+    LLM_LIMITER_MAX_LIMIT,
+    LLM_LIMITER_MAX_QUEUE,
+    LLM_LIMITER_QUEUE_TIMEOUT,
+    LLM_LIMITER_BACKOFF_RATIO,
+)
+
+logger = logging.getLogger(__name__)
+
+# 未在AGENT_LLM_PRIORITY中配置的调用方使用的优先级
+DEFAULT_PRIORITY = max(AGENT_LLM_PRIORITY.values(), default=0)
+
+
+def current_agent() -> Optional[str]:
+    """
+    获取当前LLM调用所在的工作流节点名称
+
+    LangGraph执行节点时会设置运行配置的上下文变量，代理子图中的调用
+    通过checkpoint_ns的第一段得到所属的顶层节点（如researcher）。
+
+    Returns:
+        节点名称，不在工作流中调用时返回None
+    """
+    config = var_child_runnable_config.get()
+    if not config:
+        return None
+    metadata = config.get("metadata") or {}
+    checkpoint_ns = metadata.get("checkpoint_ns")
+    if checkpoint_ns:
+        return checkpoint_ns.split(":")[0]
+    return metadata.get("langgraph_node")
+
+
+def current_priority() -> int:
+    """获取当前调用方的优先级，数值越小越优先"""
+    return AGENT_LLM_PRIORITY.get(current_agent(), DEFAULT_PRIORITY)
+
+
+class _Waiter:
+    """等待并发名额的调用方，可以被任意线程唤醒"""
+
+    def __init__(self, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.granted = False
+        self.cancelled = False
+        self._loop = loop
+        if loop is None:
+            self._event = threading.Event()
+        else:
+            self._future = loop.create_future()
+
+    def wake(self, granted: bool) -> None:
+        self.granted = granted
+        if self._loop is None:
+            self._event.set()
+        else:
+            self._loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self) -> None:
+        if not self._future.done():
+            self._future.set_result(None)
+
+    def wait(self, timeout: float) -> None:
+        self._event.wait(timeout)
+
+    async def await_(self, timeout: float) -> None:
+        try:
+            await asyncio.wait_for(asyncio.shield(self._future), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+class AdaptiveLimiter:
+    """
+    AIMD自适应并发限制器，带有界的优先级等待队列
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: int = LLM_LIMITER_INITIAL_LIMIT,
+        min_limit: int = LLM_LIMITER_MIN_LIMIT,
+        max_limit: int = LLM_LIMITER_MAX_LIMIT,
+        max_queue: int = LLM_LIMITER_MAX_QUEUE,
+        queue_timeout: float = LLM_LIMITER_QUEUE_TIMEOUT,
+        backoff_ratio: float = LLM_LIMITER_BACKOFF_RATIO,
+    ):
+        """
+        初始化并发限制器
+
+        Args:
+            name: 限制器名称（LLM类型），用于日志和指标
+            initial_limit: 初始并发上限
+            min_limit: 并发上限的下限
+            max_limit: 并发上限的上限
+            max_queue: 等待队列的最大长度
+            queue_timeout: 在队列中等待的最长时间（秒）
+            backoff_ratio: 发生拥塞时并发上限乘以的系数
+        """
+        self.name = name
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.backoff_ratio = backoff_ratio
+        self.inflight = 0
+        # 成功请求的平均延迟（指数移动平均）
+        self.average_latency: Optional[float] = None
+        self.throttled = 0  # 服务商返回429或5xx的次数
+        self.rejected = 0  # 队列已满或等待超时被拒绝的次数
+        self._queue: list[tuple[int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._last_backoff = 0.0
+        self._lock = threading.Lock()
+
+    def _try_acquire(
+        self, priority: int, loop: Optional[asyncio.AbstractEventLoop]
+    ) -> Optional[_Waiter]:
+        """
+        尝试立即获得名额，否则加入等待队列
+
+        Returns:
+            None表示已获得名额；否则返回需要等待的_Waiter（可能已被拒绝）
+        """
+        with self._lock:
+            if not self._queue and self.inflight < int(self.limit):
+                self.inflight += 1
+                return None
+            waiter = _Waiter(loop)
+            if len(self._queue) >= self.max_queue:
+                # 队列已满：新请求比队列中最低优先级的请求更重要时，挤掉后者
+                worst = max(self._queue, default=None)
+                if worst is None or worst[0] <= priority:
+                    self._reject(waiter)
+                    return waiter
+                self._queue.remove(worst)
+                heapq.heapify(self._queue)
+                self._reject(worst[2])
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            return waiter
+
+    def _reject(self, waiter: _Waiter) -> None:
+        """拒绝一个调用方，调用方需持有锁"""
+        waiter.cancelled = True
+        self.rejected += 1
+        waiter.wake(False)
+
+    def _abandon(self, waiter: _Waiter) -> bool:
+        """
+        等待结束但未获得名额时放弃排队（等待超时或被拒绝）
+
+        Returns:
+            bool: 放弃前是否已经获得名额
+        """
+        with self._lock:
+            if waiter.granted:
+                return True
+            if not waiter.cancelled:
+                self._queue = [item for item in self._queue if item[2] is not waiter]
+                heapq.heapify(self._queue)
+                self._reject(waiter)
+            return False
+
+    def acquire(self, priority: int = DEFAULT_PRIORITY) -> bool:
+        """
+        获取一个并发名额，必要时按优先级排队等待
+
+        Args:
+            priority: 优先级，数值越小越优先
+
+        Returns:
+            bool: 是否获得名额，False表示队列已满或等待超时
+        """
+        waiter = self._try_acquire(priority, None)
+        if waiter is None:
+            return True
+        waiter.wait(self.queue_timeout)
+        return waiter.granted or self._abandon(waiter)
+
+    async def aacquire(self, priority: int = DEFAULT_PRIORITY) -> bool:
+        """
+        acquire的异步版本，排队时不阻塞事件循环
+
+        Args:
+            priority: 优先级，数值越小越优先
+
+        Returns:
+            bool: 是否获得名额
+        """
+        waiter = self._try_acquire(priority, asyncio.get_running_loop())
+        if waiter is None:
+            return True
+        try:
+            await waiter.await_(self.queue_timeout)
+        except BaseException:
+            # 等待中被取消：如果名额已经分配给了自己，立即归还
+            if self._abandon(waiter):
+                self.release(None)
+            raise
+        return waiter.granted or self._abandon(waiter)
+
+    def release(self, latency: Optional[float], throttled: bool = False) -> None:
+        """
+        归还名额，并根据请求结果调整并发上限
+
+        延迟只用于确定一轮拥塞的时长，不用于判断拥塞：同一LLM类型的调用输出长度
+        差别很大（协调节点的一行回复与报告节点的长报告），延迟高不代表服务商过载。
+
+        Args:
+            latency: 请求延迟（秒），请求失败时为None
+            throttled: 服务商是否返回了429或5xx（过载）
+        """
+        now = time.monotonic()
+        with self._lock:
+            at_limit = self.inflight >= int(self.limit)
+            self.inflight -= 1
+            if throttled:
+                self.throttled += 1
+                self._backoff(now, "throttled")
+            elif latency is not None:
+                if self.average_latency is None:
+                    self.average_latency = latency
+                else:
+                    self.average_latency += 0.1 * (latency - self.average_latency)
+                if at_limit:
+                    # 只有并发名额确实用满时才增加上限，避免空闲时上限无限膨胀
+                    self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._grant()
+
+    def _backoff(self, now: float, reason: str) -> None:
+        """乘性降低并发上限，同一轮拥塞只降低一次，调用方需持有锁"""
+        # 一轮拥塞内返回的多个429只降低一次，一轮按平均请求延迟计算
+        window = self.average_latency or 1.0
+        if now - self._last_backoff < window:
+            return
+        self._last_backoff = now
+        self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+        logger.info(
+            f"LLM limiter {self.name} backing off ({reason}), limit {self.limit:.1f}"
+        )
+
+    def _grant(self) -> None:
+        """把空出的名额按优先级分配给排队的调用方，调用方需持有锁"""
+        while self._queue and self.inflight < int(self.limit):
+            _, _, waiter = heapq.heappop(self._queue)
+            if waiter.cancelled:
+                continue
+            self.inflight += 1
+            waiter.wake(True)
+
+    def stats(self) -> dict:
+        """
+        获取限制器指标
+
+        Returns:
+            并发上限、进行中请求数、队列深度（总数和按优先级）、平均延迟、限流和拒绝次数
+        """
+        with self._lock:
+            depth_by_priority: dict[int, int] = {}
+            for priority, _, _ in self._queue:
+                depth_by_priority[priority] = depth_by_priority.get(priority, 0) + 1
+            return {
+                "limit": round(self.limit, 2),
+                "inflight": self.inflight,
+                "queue_depth": len(self._queue),
+                "queue_depth_by_priority": depth_by_priority,
+                "max_queue": self.max_queue,
+                "average_latency": self.average_latency,
+                "throttled": self.throttled,
+                "rejected": self.rejected,
+            }
+
+
+def _rejected_response(
+    request: httpx.Request, limiter: AdaptiveLimiter
+) -> httpx.Response:
+    """构造合成的429响应，模型客户端会按Retry-After退避后重试"""
+    return httpx.Response(
+        429,
+        headers={"Retry-After": "1", "Content-Type": "application/json"},
+        json={
+            "error": {
+                "message": f"Local LLM limiter {limiter.name} queue is full",
+                "type": "rate_limit_exceeded",
+            }
+        },
+        request=request,
+    )
+
+
+def _is_congested(response: httpx.Response) -> bool:
+    """服务商是否因过载拒绝了请求（429或5xx）"""
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    """包装响应体，在响应关闭时归还并发名额"""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        if self._release is not None:
+            self._release, release = None, self._release
+            release()
+        self._stream.close()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    """_ReleasingStream的异步版本"""
+
+    def __init__(self, stream, release):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        if self._release is not None:
+            self._release, release = None, self._release
+            release()
+        await self._stream.aclose()
+
+
+class LimitingTransport(httpx.BaseTransport):
+    """
+    同步限流传输层：请求前获取并发名额，响应结束后归还
+
+    名额在整个响应（包括流式响应体）读完后才归还，延迟按收到响应头的时间计算。
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, transport: httpx.BaseTransport):
+        """
+        初始化限流传输层
+
+        Args:
+            limiter: 并发限制器
+            transport: 实际发送请求的传输层
+        """
+        self.limiter = limiter
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.limiter.acquire(current_priority()):
+            return _rejected_response(request, self.limiter)
+        started = time.monotonic()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            self.limiter.release(None)
+            raise
+        latency = time.monotonic() - started
+        throttled = _is_congested(response)
+        release = lambda: self.limiter.release(
+            None if response.status_code >= 400 else latency, throttled
+        )
+        if response.is_closed:
+            # 响应体已在传输层读完（如MockTransport的响应），不会再关闭流
+            release()
+        else:
+            response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncLimitingTransport(httpx.AsyncBaseTransport):
+    """
+    异步限流传输层：LimitingTransport的异步版本，与其共享同一个限制器
+    """
+
+    def __init__(self, limiter: AdaptiveLimiter, transport: httpx.AsyncBaseTransport):
+        """
+        初始化异步限流传输层
+
+        Args:
+            limiter: 并发限制器
+            transport: 实际发送请求的传输层
+        """
+        self.limiter = limiter
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        if not await self.limiter.aacquire(current_priority()):
+            return _rejected_response(request, self.limiter)
+        started = time.monotonic()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.limiter.release(None)
+            raise
+        latency = time.monotonic() - started
+        throttled = _is_congested(response)
+        release = lambda: self.limiter.release(
+            None if response.status_code >= 400 else latency, throttled
+        )
+        if response.is_closed:
+            # 响应体已在传输层读完（如MockTransport的响应），不会再关闭流
+            release()
+        else:
+            response.stream = _AsyncReleasingStream(response.stream, release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
@@ -5,16 +5,24 @@ LLM模型管理模块
 1. 创建OpenAI和DeepSeek模型实例
 2. 按类型获取和缓存LLM实例
 3. 提供通用接口访问不同的LLM提供商
+4. 按代理配置为LLM开启响应缓存
+5. 配置了多个端点时，在端点之间负载均衡和故障转移
+6. 按LLM类型自适应限制并发请求数
+7. 为配置的代理对冲请求，降低关键路径上LLM调用的尾延迟
+8. 在需要某个LLM之前预先建立到其端点的连接（预热）
 
 模块支持三种主要的LLM类型：
 - reasoning: 用于复杂推理任务的高能力模型
 - basic: 用于基本任务的通用模型
 - vision: 具有视觉能力的多模态模型
+
+LLM实例在首次使用时才创建，模型SDK也在创建时才导入，
+使导入本模块（以及整个工作流图）不需要加载和初始化任何LLM客户端。
 """
 
-from langchain_openai import ChatOpenAI
-from langchain_deepseek import ChatDeepSeek
-from typing import Optional
+import logging
+import threading
+from typing import TYPE_CHECKING, Optional
 
 from src.config import (
     REASONING_MODEL,
@@ -27,7 +35,26 @@ from src.config import (
     VL_BASE_URL,
     VL_API_KEY,
 )
-from src.config.agents import LLMType
+from src.config.agents import (
+    AGENT_LLM_MAP,
+    AGENT_LLM_CACHE_MAP,
+    AGENT_LLM_HEDGE_MAP,
+    LLM_LIMITER_ENABLED,
+    LLMType,
+)
+
+if TYPE_CHECKING:
+    from langchain_deepseek import ChatDeepSeek
+    from langchain_openai import ChatOpenAI
+
+    import httpx
+
+    from .hedging import RequestHedger
+    from .limiter import AdaptiveLimiter
+    from .response_cache import ResponseCache
+    from .router import EndpointRouter
+
+logger = logging.getLogger(__name__)
 
 
 def create_openai_llm(
@@ -35,24 +62,28 @@ def create_openai_llm(
     base_url: Optional[str] = None,
     api_key: Optional[str] = None,
     temperature: float = 0.0,
+    response_cache: Optional["ResponseCache"] = None,
     **kwargs,
-) -> ChatOpenAI:
+) -> "ChatOpenAI":
     """
     创建ChatOpenAI实例，配置特定参数
-    
+
     该函数负责创建OpenAI模型实例，处理可选的基础URL和API密钥配置。
     适用于OpenAI兼容的API接口，包括官方API和兼容实现。
-    
+
     Args:
         model: 模型名称，如"gpt-4o"、"gpt-3.5-turbo"等
         base_url: 可选的自定义API基础URL，用于自托管或兼容API
         api_key: 可选的API密钥
         temperature: 模型温度参数，控制输出随机性，默认为0.0（最确定性）
+        response_cache: 可选的响应缓存，提供时返回带缓存的模型实例
         **kwargs: 传递给ChatOpenAI构造函数的其他参数
-        
+
     Returns:
         配置完成的ChatOpenAI实例
     """
+    from langchain_openai import ChatOpenAI
+
     # 只有在base_url不为None或空字符串时才包含它
     llm_kwargs = {"model": model, "temperature": temperature, **kwargs}
 
@@ -62,7 +93,7 @@ def create_openai_llm(
     if api_key:  # 处理None或空字符串
         llm_kwargs["api_key"] = api_key
 
-    return ChatOpenAI(**llm_kwargs)
+    return _instantiate(ChatOpenAI, llm_kwargs, response_cache)
 
 
 def create_deepseek_llm(
@@ -70,24 +101,28 @@ def create_deepseek_llm(
     base_url: Optional[str] = None,
     api_key: Optional[str] = None,
     temperature: float = 0.0,
+    response_cache: Optional["ResponseCache"] = None,
     **kwargs,
-) -> ChatDeepSeek:
+) -> "ChatDeepSeek":
     """
     创建ChatDeepSeek实例，配置特定参数
-    
+
     该函数负责创建DeepSeek模型实例，处理可选的基础URL和API密钥配置。
     适用于DeepSeek API，提供另一种LLM选择。
-    
+
     Args:
         model: 模型名称，如"o1-mini"等
         base_url: 可选的自定义API基础URL
         api_key: 可选的API密钥
         temperature: 模型温度参数，控制输出随机性，默认为0.0（最确定性）
+        response_cache: 可选的响应缓存，提供时返回带缓存的模型实例
         **kwargs: 传递给ChatDeepSeek构造函数的其他参数
-        
+
     Returns:
         配置完成的ChatDeepSeek实例
     """
+    from langchain_deepseek import ChatDeepSeek
+
     # 只有在base_url不为None或空字符串时才包含它
     llm_kwargs = {"model": model, "temperature": temperature, **kwargs}
 
@@ -97,28 +132,42 @@ def create_deepseek_llm(
     if api_key:  # 处理None或空字符串
         llm_kwargs["api_key"] = api_key
 
-    return ChatDeepSeek(**llm_kwargs)
+    return _instantiate(ChatDeepSeek, llm_kwargs, response_cache)
+
+
+def _instantiate(llm_class: type, llm_kwargs: dict, response_cache):
+    """创建模型实例，提供响应缓存时使用混入了缓存的模型类"""
+    if response_cache is None:
+        return llm_class(**llm_kwargs)
+    from .response_cache import create_cached_llm_class
+
+    return create_cached_llm_class(llm_class)(
+        response_cache=response_cache, **llm_kwargs
+    )
 
 
 # LLM实例缓存，避免重复创建相同类型的实例
-_llm_cache: dict[LLMType, ChatOpenAI | ChatDeepSeek] = {}
+_llm_cache: dict[LLMType, "ChatOpenAI | ChatDeepSeek"] = {}
+_llm_cache_lock = threading.Lock()
+# 开启了响应缓存的LLM实例，按类型缓存
+_cached_llm_cache: dict[LLMType, "ChatOpenAI | ChatDeepSeek"] = {}
 
 
-def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
+def get_llm_by_type(llm_type: LLMType) -> "ChatOpenAI | ChatDeepSeek":
     """
     根据类型获取LLM实例，如果可用则返回缓存的实例
-    
+
     该函数是获取LLM实例的主要接口，它根据请求的类型返回适当的模型实例：
     - reasoning: 用于复杂推理任务的高能力模型（使用DeepSeek）
     - basic: 用于基本任务的通用模型（使用OpenAI）
     - vision: 具有视觉能力的多模态模型（使用OpenAI）
-    
+
     Args:
         llm_type: LLM类型，定义于LLMType类型别名
-        
+
     Returns:
         相应类型的LLM实例
-        
+
     Raises:
         ValueError: 当请求的LLM类型未知时抛出
     """
@@ -126,40 +175,253 @@ def get_llm_by_type(llm_type: LLMType) -> ChatOpenAI | ChatDeepSeek:
     if llm_type in _llm_cache:
         return _llm_cache[llm_type]
 
-    # 根据类型创建相应的LLM实例
+    with _llm_cache_lock:
+        # 并发首次访问时只创建一个实例
+        if llm_type not in _llm_cache:
+            _llm_cache[llm_type] = _create_llm(llm_type)
+        return _llm_cache[llm_type]
+
+
+def get_llm_for_agent(
+    agent_name: str, llm_type: Optional[LLMType] = None
+) -> "ChatOpenAI | ChatDeepSeek":
+    """
+    获取指定代理使用的LLM实例
+
+    LLM类型默认取自AGENT_LLM_MAP；如果AGENT_LLM_CACHE_MAP为该代理开启了
+    响应缓存，返回共享同一个响应缓存的带缓存实例。
+
+    Args:
+        agent_name: 代理名称，如"coordinator"、"planner"
+        llm_type: 可选的LLM类型，用于覆盖AGENT_LLM_MAP中的配置（如深度思考模式）
+
+    Returns:
+        相应类型的LLM实例
+    """
+    llm_type = llm_type or AGENT_LLM_MAP[agent_name]
+    if not AGENT_LLM_CACHE_MAP.get(agent_name, False):
+        return get_llm_by_type(llm_type)
+
+    if llm_type in _cached_llm_cache:
+        return _cached_llm_cache[llm_type]
+
+    from .response_cache import get_response_cache
+
+    with _llm_cache_lock:
+        if llm_type not in _cached_llm_cache:
+            _cached_llm_cache[llm_type] = _create_llm(
+                llm_type, response_cache=get_response_cache()
+            )
+        return _cached_llm_cache[llm_type]
+
+
+# 配置了多个端点的LLM类型对应的路由器，以及每种LLM类型的并发限制器和对冲策略，
+# 同类型的所有实例共享
+_routers: dict[LLMType, "EndpointRouter"] = {}
+_limiters: dict[LLMType, "AdaptiveLimiter"] = {}
+_hedgers: dict[LLMType, "RequestHedger"] = {}
+
+
+def get_llm_routers() -> dict[LLMType, "EndpointRouter"]:
+    """
+    获取已创建的端点路由器，用于查看各端点的延迟和错误率
+
+    Returns:
+        LLM类型到端点路由器的映射，只包含配置了多个端点的类型
+    """
+    return dict(_routers)
+
+
+def get_llm_limiters() -> dict[LLMType, "AdaptiveLimiter"]:
+    """
+    获取已创建的并发限制器，用于查看并发上限和队列深度
+
+    Returns:
+        LLM类型到并发限制器的映射
+    """
+    return dict(_limiters)
+
+
+def get_llm_hedgers() -> dict[LLMType, "RequestHedger"]:
+    """
+    获取已创建的对冲策略，用于查看对冲次数和对冲请求胜出的比例
+
+    Returns:
+        LLM类型到对冲策略的映射
+    """
+    return dict(_hedgers)
+
+
+def create_llm_http_clients(
+    router: Optional["EndpointRouter"] = None,
+    limiter: Optional["AdaptiveLimiter"] = None,
+    hedger: Optional["RequestHedger"] = None,
+) -> tuple["httpx.Client", "httpx.AsyncClient"]:
+    """
+    创建模型使用的同步和异步HTTP客户端
+
+    请求依次经过并发限制器、请求对冲和端点路由器（都是可选的）后再发出，
+    因此一次模型调用只占用一个并发名额，对冲请求和端点之间的故障转移都在名额内完成，
+    对冲请求也由路由器分配端点。
+
+    Args:
+        router: 可选的端点路由器
+        limiter: 可选的并发限制器
+        hedger: 可选的对冲策略
+
+    Returns:
+        (同步客户端, 异步客户端)，传给模型的http_client和http_async_client参数
+    """
+    import httpx
+    from openai import DefaultAsyncHttpxClient, DefaultHttpxClient
+
+    from .hedging import AsyncHedgingTransport, HedgingTransport
+    from .limiter import AsyncLimitingTransport, LimitingTransport
+    from .router import AsyncRoutingTransport, RoutingTransport
+
+    transport = httpx.HTTPTransport()
+    async_transport = httpx.AsyncHTTPTransport()
+    if router is not None:
+        transport = RoutingTransport(router, transport)
+        async_transport = AsyncRoutingTransport(router, async_transport)
+    if hedger is not None:
+        transport = HedgingTransport(hedger, transport)
+        async_transport = AsyncHedgingTransport(hedger, async_transport)
+    if limiter is not None:
+        transport = LimitingTransport(limiter, transport)
+        async_transport = AsyncLimitingTransport(limiter, async_transport)
+    return (
+        DefaultHttpxClient(transport=transport),
+        DefaultAsyncHttpxClient(transport=async_transport),
+    )
+
+
+def _endpoint_kwargs(
+    llm_type: LLMType, base_urls: Optional[str], api_keys: Optional[str]
+) -> dict:
+    """
+    根据端点配置生成模型的连接参数
+
+    *_BASE_URL和*_API_KEY可以用逗号分隔配置多个端点，此时模型以第一个端点
+    作为base_url，并通过路由传输层把每个请求发往当前最合适的端点；
+    开启LLM_LIMITER_ENABLED时，同类型的所有请求共享一个并发限制器；
+    AGENT_LLM_HEDGE_MAP中有代理开启对冲时，同类型的所有请求共享一个对冲策略。
+    调用方需持有_llm_cache_lock。
+
+    Args:
+        llm_type: LLM类型
+        base_urls: 逗号分隔的基础URL
+        api_keys: 逗号分隔的API密钥
+
+    Returns:
+        传给create_*_llm的base_url、api_key及HTTP客户端参数
+    """
+    from .hedging import RequestHedger
+    from .limiter import AdaptiveLimiter
+    from .router import EndpointRouter, parse_endpoints
+
+    kwargs = {"base_url": base_urls, "api_key": api_keys}
+    endpoints = parse_endpoints(base_urls, api_keys)
+    if len(endpoints) > 1:
+        if llm_type not in _routers:
+            _routers[llm_type] = EndpointRouter(endpoints)
+        kwargs["base_url"] = _routers[llm_type].primary.base_url
+        kwargs["api_key"] = _routers[llm_type].primary.api_key
+    if LLM_LIMITER_ENABLED and llm_type not in _limiters:
+        _limiters[llm_type] = AdaptiveLimiter(llm_type)
+    if any(AGENT_LLM_HEDGE_MAP.values()) and llm_type not in _hedgers:
+        _hedgers[llm_type] = RequestHedger(llm_type)
+    if llm_type in _routers or llm_type in _limiters or llm_type in _hedgers:
+        kwargs["http_client"], kwargs["http_async_client"] = create_llm_http_clients(
+            _routers.get(llm_type), _limiters.get(llm_type), _hedgers.get(llm_type)
+        )
+    return kwargs
+
+
+def _create_llm(
+    llm_type: LLMType, response_cache: Optional["ResponseCache"] = None
+) -> "ChatOpenAI | ChatDeepSeek":
+    """根据类型创建相应的LLM实例，提供响应缓存时创建带缓存的实例"""
     if llm_type == "reasoning":
         llm = create_deepseek_llm(
             model=REASONING_MODEL,
-            base_url=REASONING_BASE_URL,
-            api_key=REASONING_API_KEY,
+            response_cache=response_cache,
+            **_endpoint_kwargs(llm_type, REASONING_BASE_URL, REASONING_API_KEY),
         )
     elif llm_type == "basic":
         llm = create_openai_llm(
             model=BASIC_MODEL,
-            base_url=BASIC_BASE_URL,
-            api_key=BASIC_API_KEY,
+            response_cache=response_cache,
+            **_endpoint_kwargs(llm_type, BASIC_BASE_URL, BASIC_API_KEY),
         )
     elif llm_type == "vision":
         llm = create_openai_llm(
             model=VL_MODEL,
-            base_url=VL_BASE_URL,
-            api_key=VL_API_KEY,
+            response_cache=response_cache,
+            **_endpoint_kwargs(llm_type, VL_BASE_URL, VL_API_KEY),
         )
     else:
         raise ValueError(f"未知的LLM类型: {llm_type}")
-
-    # 将创建的实例存入缓存
-    _llm_cache[llm_type] = llm
     return llm
 
 
-# 初始化不同用途的LLM - 现在这些实例将被缓存
-reasoning_llm = get_llm_by_type("reasoning")  # 用于复杂推理
-basic_llm = get_llm_by_type("basic")          # 用于基本任务
-vl_llm = get_llm_by_type("vision")            # 用于视觉任务
+def warm_up_llm(
+    agent_name: str, llm_type: Optional[LLMType] = None, timeout: float = 5.0
+) -> None:
+    """
+    预热代理使用的LLM：创建实例并通过同步客户端建立到端点的连接
+
+    发送一次轻量的模型列表请求，使之后的调用可以复用已建立的连接（TCP/TLS握手
+    已完成）。ChatDeepSeek不设置root_client，因此通过聊天补全资源取得底层的
+    OpenAI客户端，两种模型都适用。预热只是优化，失败时忽略。
+
+    Args:
+        agent_name: 代理名称
+        llm_type: 可选的LLM类型，用于覆盖AGENT_LLM_MAP中的配置
+        timeout: 预热请求的超时时间（秒）
+    """
+    try:
+        llm = get_llm_for_agent(agent_name, llm_type)
+        client = llm.client._client
+        client.with_options(max_retries=0, timeout=timeout).models.list()
+    except Exception as e:
+        logger.info(f"Warm-up for {agent_name} failed: {e!r}")
+
+
+async def awarm_up_llm(
+    agent_name: str, llm_type: Optional[LLMType] = None, timeout: float = 5.0
+) -> None:
+    """
+    warm_up_llm的异步版本，预热异步客户端的连接
+    """
+    try:
+        llm = get_llm_for_agent(agent_name, llm_type)
+        client = llm.async_client._client
+        await client.with_options(max_retries=0, timeout=timeout).models.list()
+    except Exception as e:
+        logger.info(f"Warm-up for {agent_name} failed: {e!r}")
+
+
+# 不同用途的LLM，作为模块属性访问时才创建（见__getattr__）
+_LLM_ATTRIBUTES: dict[str, LLMType] = {
+    "reasoning_llm": "reasoning",  # 用于复杂推理
+    "basic_llm": "basic",  # 用于基本任务
+    "vl_llm": "vision",  # 用于视觉任务
+}
+
+
+def __getattr__(name: str):
+    """模块级属性的延迟加载：首次访问reasoning_llm等属性时创建LLM实例"""
+    if name in _LLM_ATTRIBUTES:
+        return get_llm_by_type(_LLM_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
+    reasoning_llm = get_llm_by_type("reasoning")
+    basic_llm = get_llm_by_type("basic")
+    vl_llm = get_llm_by_type("vision")
+
     # 直接运行此模块时的测试代码
     stream = reasoning_llm.stream("what is mcp?")
     full_response = ""
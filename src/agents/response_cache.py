@@ -0,0 +1,411 @@
+"""
+LLM响应缓存模块 - 复用相同模型、参数和消息的LLM响应
+
+开发调试和重复运行相同任务时，协调、规划和监督节点经常向LLM发送
+完全相同的请求。该模块提供可按代理开启的响应缓存：
+1. 以模型、调用参数和消息内容的稳定哈希作为缓存键
+2. 响应持久化保存在SQLite中，超过有效期后重新请求
+3. 条目数超过上限时按最近最少使用（LRU）策略淘汰
+4. 同时覆盖invoke和stream调用，命中时按小块回放缓存内容，
+   使流式事件（SSE）的行为与真实请求一致
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Iterator, Optional, Sequence
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    message_chunk_to_message,
+)
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import Field
+
+from src.config.agents import (
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_REPLAY_CHUNK_CHARS,
+)
+
+logger = logging.getLogger(__name__)
+
+# 生成缓存键时忽略的消息字段：消息ID在每次运行中随机生成，
+# 响应元数据不影响模型输出
+_IGNORED_MESSAGE_FIELDS = {"id", "response_metadata", "usage_metadata"}
+
+
+class ResponseCache:
+    """
+    基于SQLite的LLM响应缓存，带有效期和条目数上限
+    """
+
+    def __init__(
+        self,
+        path: str = LLM_CACHE_PATH,
+        ttl: float = LLM_CACHE_TTL,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+    ):
+        """
+        初始化响应缓存
+
+        Args:
+            path: SQLite数据库路径，":memory:"表示只使用内存
+            ttl: 响应的有效期（秒）
+            max_entries: 最多缓存的响应数，超出后按LRU淘汰
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS responses_last_access
+                ON responses (last_access);
+            """
+        )
+
+    @staticmethod
+    def make_key(llm_string: str, messages: Sequence[BaseMessage]) -> str:
+        """
+        根据模型及参数描述和消息内容生成稳定的缓存键
+
+        Args:
+            llm_string: 模型类型、模型参数和调用参数的序列化描述
+            messages: 发送给模型的消息
+
+        Returns:
+            缓存键
+        """
+        payload = json.dumps(
+            [
+                llm_string,
+                [
+                    message.model_dump(exclude=_IGNORED_MESSAGE_FIELDS)
+                    for message in messages
+                ],
+            ],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[AIMessage]:
+        """
+        查找未过期的缓存响应
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存的AI消息，不存在或已过期时返回None
+        """
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE responses SET last_access = ? WHERE key = ?", (now, key)
+            )
+            self._db.commit()
+            self.hits += 1
+        return AIMessage.model_validate_json(row[0])
+
+    def put(self, key: str, message: BaseMessage) -> None:
+        """
+        保存一次响应，并清理过期和超出上限的条目
+
+        Args:
+            key: 缓存键
+            message: 模型返回的消息
+        """
+        try:
+            value = message.model_dump_json()
+        except (TypeError, ValueError) as e:
+            logger.warning(f"Failed to serialize LLM response for caching: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, value, now + self.ttl, now),
+            )
+            self._db.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses"
+                " ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            self._db.commit()
+
+    def clear(self) -> None:
+        """删除所有缓存的响应"""
+        with self._lock:
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中、未命中次数，命中率和条目数
+        """
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+
+def replay_chunks(
+    message: AIMessage, chunk_chars: int = LLM_CACHE_REPLAY_CHUNK_CHARS
+) -> Iterator[ChatGenerationChunk]:
+    """
+    将缓存的完整消息拆分为流式输出块
+
+    文本内容按固定字符数拆分，工具调用和元数据放在最后一块中，
+    所有块相加后与原消息一致。
+
+    Args:
+        message: 缓存的AI消息
+        chunk_chars: 每块的字符数
+
+    Returns:
+        依次产生的输出块
+    """
+    content = message.content
+    if isinstance(content, str):
+        for start in range(0, len(content), chunk_chars):
+            yield ChatGenerationChunk(
+                message=AIMessageChunk(content=content[start : start + chunk_chars])
+            )
+    elif content:
+        yield ChatGenerationChunk(message=AIMessageChunk(content=content))
+    yield ChatGenerationChunk(
+        message=AIMessageChunk(
+            content="",
+            additional_kwargs=message.additional_kwargs,
+            response_metadata=message.response_metadata,
+            usage_metadata=message.usage_metadata,
+            tool_call_chunks=[
+                {
+                    "name": tool_call["name"],
+                    "args": json.dumps(tool_call["args"], ensure_ascii=False),
+                    "id": tool_call["id"],
+                    "index": index,
+                }
+                for index, tool_call in enumerate(message.tool_calls)
+            ],
+        )
+    )
+
+
+class ResponseCacheMixin:
+    """
+    为聊天模型类添加响应缓存的混入类
+
+    此混入类重写了聊天模型的_generate、_stream及其异步版本：
+    命中缓存时直接返回（或按块回放）缓存的响应，未命中时调用原模型，
+    并在响应完整结束后保存。流式请求中途出错或被取消时不保存。
+
+    混入后的模型类带有response_cache字段（由create_cached_llm_class声明），
+    为None时不使用缓存。
+    """
+
+    def _response_cache_key(
+        self, messages: list[BaseMessage], stop: Optional[list[str]], **kwargs: Any
+    ) -> str:
+        llm_string = self._get_llm_string(stop=stop, **kwargs)
+        return self.response_cache.make_key(llm_string, messages)
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        重写_generate方法，优先返回缓存的响应
+
+        Returns:
+            模型生成结果
+        """
+        if self.response_cache is None:
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        key = self._response_cache_key(messages, stop, **kwargs)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return ChatResult(generations=[ChatGeneration(message=cached)])
+        result = super()._generate(messages, stop, run_manager, **kwargs)
+        if len(result.generations) == 1:
+            self.response_cache.put(key, result.generations[0].message)
+        return result
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        """
+        重写_agenerate方法，优先返回缓存的响应
+
+        Returns:
+            模型生成结果
+        """
+        if self.response_cache is None:
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        key = self._response_cache_key(messages, stop, **kwargs)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            return ChatResult(generations=[ChatGeneration(message=cached)])
+        result = await super()._agenerate(messages, stop, run_manager, **kwargs)
+        if len(result.generations) == 1:
+            self.response_cache.put(key, result.generations[0].message)
+        return result
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        """
+        重写_stream方法，命中缓存时按块回放缓存的响应
+
+        Returns:
+            依次产生的输出块
+        """
+        if self.response_cache is None:
+            yield from super()._stream(messages, stop, run_manager, **kwargs)
+            return
+        key = self._response_cache_key(messages, stop, **kwargs)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            for chunk in replay_chunks(cached):
+                # 与模型实现保持一致：只有直接传入run_manager时才在这里上报Token
+                if run_manager:
+                    run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        generation: Optional[ChatGenerationChunk] = None
+        for chunk in super()._stream(messages, stop, run_manager, **kwargs):
+            generation = chunk if generation is None else generation + chunk
+            yield chunk
+        if generation is not None:
+            self.response_cache.put(key, message_chunk_to_message(generation.message))
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        """
+        重写_astream方法，命中缓存时按块回放缓存的响应
+
+        Returns:
+            依次产生的输出块
+        """
+        if self.response_cache is None:
+            async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+                yield chunk
+            return
+        key = self._response_cache_key(messages, stop, **kwargs)
+        cached = self.response_cache.get(key)
+        if cached is not None:
+            for chunk in replay_chunks(cached):
+                if run_manager:
+                    await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+                yield chunk
+            return
+        generation: Optional[ChatGenerationChunk] = None
+        async for chunk in super()._astream(messages, stop, run_manager, **kwargs):
+            generation = chunk if generation is None else generation + chunk
+            yield chunk
+        if generation is not None:
+            self.response_cache.put(key, message_chunk_to_message(generation.message))
+
+
+# 已创建的带缓存模型类，按原模型类缓存，保证同一模型类只派生一次
+_cached_classes: dict[type, type] = {}
+_cached_classes_lock = threading.Lock()
+
+
+def create_cached_llm_class(base_llm_class: type) -> type:
+    """
+    创建带响应缓存的聊天模型类的工厂函数
+
+    Args:
+        base_llm_class: 原始聊天模型类，如ChatOpenAI
+
+    Returns:
+        同时继承ResponseCacheMixin和原始模型类的新类
+    """
+    with _cached_classes_lock:
+        if base_llm_class not in _cached_classes:
+            cached_class = type(
+                f"Cached{base_llm_class.__name__}",
+                (ResponseCacheMixin, base_llm_class),
+                {
+                    "__module__": __name__,
+                    # 使用的缓存，None表示不缓存；不参与模型序列化，因此不影响缓存键
+                    "__annotations__": {"response_cache": Any},
+                    "response_cache": Field(default=None, exclude=True),
+                },
+            )
+            _cached_classes[base_llm_class] = cached_class
+        return _cached_classes[base_llm_class]
+
+
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """
+    获取进程级共享的响应缓存，首次调用时创建
+
+    Returns:
+        使用配置路径的缓存实例
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
@@ -0,0 +1,417 @@
+"""
+LLM端点路由模块 - 在多个OpenAI兼容端点之间负载均衡和故障转移
+
+每种LLM类型可以配置多个端点（*_BASE_URL和*_API_KEY用逗号分隔），
+该模块以httpx传输层的形式接入ChatOpenAI/ChatDeepSeek：
+1. 为每个端点维护首字节时间（近似首Token时间）和错误率的指数加权移动平均（EWMA）
+2. 每次请求发往当前最快的健康端点，并考虑端点上进行中的请求数
+3. 端点返回429、5xx或连接失败时进入冷却期，同一请求立即转到下一个端点
+4. 长时间未使用的端点会被重新探测，恢复后重新参与分配
+
+路由在HTTP层完成（由src.agents.llm组装到模型的HTTP客户端中），
+对上层的模型、代理和工作流完全透明。
+"""
+
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, AsyncIterator, Optional
+
+import httpx
+
+from src.config.agents import (
+    LLM_ROUTER_EWMA_ALPHA,
+    LLM_ROUTER_COOLDOWN,
+    LLM_ROUTER_PROBE_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+# 需要转到其他端点的状态码：限流和服务端错误
+FAILOVER_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class Endpoint:
+    """
+    一个OpenAI兼容端点及其运行统计
+    """
+
+    base_url: str
+    api_key: Optional[str] = None
+    ttfb: Optional[float] = None  # 首字节时间的EWMA（秒），None表示还没有样本
+    error_rate: float = 0.0  # 错误率的EWMA
+    inflight: int = 0  # 进行中的请求数
+    cooldown_until: float = 0.0  # 冷却期结束时间，冷却期内不分配请求
+    last_used: float = 0.0
+    requests: int = 0
+    failures: int = 0
+    url: httpx.URL = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.base_url = self.base_url.rstrip("/")
+        self.url = httpx.URL(self.base_url)
+
+    def is_healthy(self, now: float) -> bool:
+        """端点是否不在冷却期内"""
+        return now >= self.cooldown_until
+
+    def score(self) -> float:
+        """
+        端点的期望延迟评分，越小越好
+
+        首字节时间乘以进行中请求数实现负载均衡，错误率越高评分越差。
+        """
+        return (self.ttfb or 0.0) * (1 + self.inflight) / max(1e-3, 1 - self.error_rate)
+
+
+def parse_endpoints(
+    base_urls: Optional[str], api_keys: Optional[str]
+) -> list[Endpoint]:
+    """
+    解析逗号分隔的端点配置
+
+    API密钥可以只配置一个（所有端点共用），也可以与URL一一对应。
+
+    Args:
+        base_urls: 逗号分隔的基础URL
+        api_keys: 逗号分隔的API密钥
+
+    Returns:
+        端点列表，未配置URL时为空列表
+
+    Raises:
+        ValueError: 当API密钥数量与URL数量不匹配时抛出
+    """
+    urls = [url.strip() for url in (base_urls or "").split(",") if url.strip()]
+    keys = [key.strip() for key in (api_keys or "").split(",") if key.strip()]
+    if len(keys) <= 1:
+        keys = [keys[0] if keys else None] * len(urls)
+    elif len(keys) != len(urls):
+        raise ValueError(
+            f"Expected 1 or {len(urls)} API keys for {len(urls)} endpoints, got {len(keys)}"
+        )
+    return [Endpoint(url, key) for url, key in zip(urls, keys)]
+
+
+class EndpointRouter:
+    """
+    端点路由器：选择请求发往的端点，并根据请求结果更新端点统计
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[Endpoint],
+        alpha: float = LLM_ROUTER_EWMA_ALPHA,
+        cooldown: float = LLM_ROUTER_COOLDOWN,
+        probe_interval: float = LLM_ROUTER_PROBE_INTERVAL,
+    ):
+        """
+        初始化端点路由器
+
+        Args:
+            endpoints: 端点列表，第一个端点作为模型客户端的base_url
+            alpha: EWMA的平滑系数，越大越重视最近的样本
+            cooldown: 端点失败后的默认冷却时间（秒）
+            probe_interval: 端点超过该时间未使用时重新探测（秒）
+        """
+        self.endpoints = list(endpoints)
+        if not self.endpoints:
+            raise ValueError("EndpointRouter requires at least one endpoint")
+        self.alpha = alpha
+        self.cooldown = cooldown
+        self.probe_interval = probe_interval
+        self._lock = threading.Lock()
+
+    @property
+    def primary(self) -> Endpoint:
+        """模型客户端配置的端点，请求URL以它为前缀"""
+        return self.endpoints[0]
+
+    def candidates(self) -> list[Endpoint]:
+        """
+        按优先级排列的候选端点
+
+        健康端点中，没有样本或需要重新探测的端点优先，其余按评分排序；
+        冷却中的端点排在最后，按冷却结束时间排序，所有端点都在冷却时仍可尝试。
+
+        Returns:
+            端点列表
+        """
+        now = time.monotonic()
+        with self._lock:
+            healthy = [e for e in self.endpoints if e.is_healthy(now)]
+            cooling = sorted(
+                (e for e in self.endpoints if not e.is_healthy(now)),
+                key=lambda e: e.cooldown_until,
+            )
+            healthy.sort(
+                key=lambda e: (
+                    e.ttfb is not None and now - e.last_used < self.probe_interval,
+                    e.score(),
+                )
+            )
+            return healthy + cooling
+
+    def start(self, endpoint: Endpoint) -> float:
+        """登记一次请求开始，返回开始时间"""
+        now = time.monotonic()
+        with self._lock:
+            endpoint.inflight += 1
+            endpoint.requests += 1
+            endpoint.last_used = now
+        return now
+
+    def record_first_byte(self, endpoint: Endpoint, started: float) -> None:
+        """记录首字节时间样本"""
+        sample = time.monotonic() - started
+        with self._lock:
+            if endpoint.ttfb is None:
+                endpoint.ttfb = sample
+            else:
+                endpoint.ttfb += self.alpha * (sample - endpoint.ttfb)
+
+    def record_success(self, endpoint: Endpoint) -> None:
+        """记录一次成功的请求"""
+        with self._lock:
+            endpoint.inflight -= 1
+            endpoint.error_rate *= 1 - self.alpha
+
+    def record_abort(self, endpoint: Endpoint) -> None:
+        """记录一次被调用方放弃的请求（如请求对冲中落后的一方），不计入失败"""
+        with self._lock:
+            endpoint.inflight -= 1
+
+    def record_failure(
+        self, endpoint: Endpoint, reason: str, retry_after: Optional[float] = None
+    ) -> None:
+        """
+        记录一次失败的请求，并使端点进入冷却期
+
+        Args:
+            endpoint: 失败的端点
+            reason: 失败原因，用于日志
+            retry_after: 端点要求的重试等待时间（秒），None时使用默认冷却时间
+        """
+        cooldown = self.cooldown if retry_after is None else retry_after
+        with self._lock:
+            endpoint.inflight -= 1
+            endpoint.failures += 1
+            endpoint.error_rate += self.alpha * (1 - endpoint.error_rate)
+            endpoint.cooldown_until = time.monotonic() + cooldown
+        logger.warning(
+            f"LLM endpoint {endpoint.base_url} failed ({reason}), cooling down for {cooldown:.1f}s"
+        )
+
+    def route(self, request: httpx.Request, endpoint: Endpoint) -> None:
+        """
+        将发往主端点的请求改写为发往指定端点
+
+        Args:
+            request: 原始请求，原地修改URL和认证头
+            endpoint: 目标端点
+        """
+        primary_path = self.primary.url.raw_path.rstrip(b"/")
+        path = request.url.raw_path
+        if path.startswith(primary_path):
+            path = path[len(primary_path) :]
+        request.url = endpoint.url.copy_with(
+            raw_path=endpoint.url.raw_path.rstrip(b"/") + path
+        )
+        request.headers["Host"] = request.url.netloc.decode("ascii")
+        if endpoint.api_key:
+            request.headers["Authorization"] = f"Bearer {endpoint.api_key}"
+
+    def stats(self) -> list[dict]:
+        """
+        获取各端点的统计信息
+
+        Returns:
+            每个端点的URL、首字节时间、错误率、进行中请求数和是否健康
+        """
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "base_url": e.base_url,
+                    "ttfb": e.ttfb,
+                    "error_rate": e.error_rate,
+                    "inflight": e.inflight,
+                    "requests": e.requests,
+                    "failures": e.failures,
+                    "healthy": e.is_healthy(now),
+                }
+                for e in self.endpoints
+            ]
+
+
+def _retry_after(response: httpx.Response) -> Optional[float]:
+    """解析Retry-After响应头（只支持秒数格式）"""
+    try:
+        return float(response.headers["Retry-After"])
+    except (KeyError, ValueError):
+        return None
+
+
+class _TimedStream(httpx.SyncByteStream):
+    """包装响应体，在读到首个字节时记录首字节时间，关闭时记录请求结束"""
+
+    def __init__(self, stream, router: EndpointRouter, endpoint: Endpoint, started):
+        self._stream = stream
+        self._router = router
+        self._endpoint = endpoint
+        self._started = started
+        self._timed = False
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            if not self._timed and chunk:
+                self._timed = True
+                self._router.record_first_byte(self._endpoint, self._started)
+            yield chunk
+
+    def close(self) -> None:
+        if not self._closed:
+            self._closed = True
+            if not self._timed:
+                self._router.record_first_byte(self._endpoint, self._started)
+            self._router.record_success(self._endpoint)
+        self._stream.close()
+
+
+class _AsyncTimedStream(httpx.AsyncByteStream):
+    """_TimedStream的异步版本"""
+
+    def __init__(self, stream, router: EndpointRouter, endpoint: Endpoint, started):
+        self._stream = stream
+        self._router = router
+        self._endpoint = endpoint
+        self._started = started
+        self._timed = False
+        self._closed = False
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            if not self._timed and chunk:
+                self._timed = True
+                self._router.record_first_byte(self._endpoint, self._started)
+            yield chunk
+
+    async def aclose(self) -> None:
+        if not self._closed:
+            self._closed = True
+            if not self._timed:
+                self._router.record_first_byte(self._endpoint, self._started)
+            self._router.record_success(self._endpoint)
+        await self._stream.aclose()
+
+
+class RoutingTransport(httpx.BaseTransport):
+    """
+    同步路由传输层：按路由器的选择发送请求，失败时转到下一个端点
+    """
+
+    def __init__(
+        self, router: EndpointRouter, transport: Optional[httpx.BaseTransport] = None
+    ):
+        """
+        初始化路由传输层
+
+        Args:
+            router: 端点路由器
+            transport: 实际发送请求的传输层，默认使用httpx.HTTPTransport
+        """
+        self.router = router
+        self._transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # 读取请求体，使同一请求可以重新发往其他端点
+        request.read()
+        candidates = self.router.candidates()
+        for attempt, endpoint in enumerate(candidates, start=1):
+            last_attempt = attempt == len(candidates)
+            self.router.route(request, endpoint)
+            started = self.router.start(endpoint)
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError as e:
+                self.router.record_failure(endpoint, repr(e))
+                if last_attempt:
+                    raise
+                continue
+            except BaseException:
+                self.router.record_abort(endpoint)
+                raise
+            if response.status_code in FAILOVER_STATUS_CODES:
+                self.router.record_failure(
+                    endpoint, f"HTTP {response.status_code}", _retry_after(response)
+                )
+                if not last_attempt:
+                    response.close()
+                    continue
+                return response
+            response.stream = _TimedStream(
+                response.stream, self.router, endpoint, started
+            )
+            return response
+        raise AssertionError("unreachable")
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRoutingTransport(httpx.AsyncBaseTransport):
+    """
+    异步路由传输层：RoutingTransport的异步版本，与其共享同一个路由器
+    """
+
+    def __init__(
+        self,
+        router: EndpointRouter,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        """
+        初始化异步路由传输层
+
+        Args:
+            router: 端点路由器
+            transport: 实际发送请求的传输层，默认使用httpx.AsyncHTTPTransport
+        """
+        self.router = router
+        self._transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        candidates = self.router.candidates()
+        for attempt, endpoint in enumerate(candidates, start=1):
+            last_attempt = attempt == len(candidates)
+            self.router.route(request, endpoint)
+            started = self.router.start(endpoint)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except httpx.TransportError as e:
+                self.router.record_failure(endpoint, repr(e))
+                if last_attempt:
+                    raise
+                continue
+            except BaseException:
+                self.router.record_abort(endpoint)
+                raise
+            if response.status_code in FAILOVER_STATUS_CODES:
+                self.router.record_failure(
+                    endpoint, f"HTTP {response.status_code}", _retry_after(response)
+                )
+                if not last_attempt:
+                    await response.aclose()
+                    continue
+                return response
+            response.stream = _AsyncTimedStream(
+                response.stream, self.router, endpoint, started
+            )
+            return response
+        raise AssertionError("unreachable")
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
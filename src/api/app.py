@@ -5,7 +5,7 @@ LangManus的FastAPI应用程序。
 
 import json
 import logging
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Literal, Optional, Union
 
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,6 +14,7 @@ from sse_starlette.sse import EventSourceResponse
 import asyncio
 from typing import AsyncGenerator, Dict, List, Any
 
+from src.agents.llm import get_llm_hedgers, get_llm_limiters, get_llm_routers
 from src.graph import build_graph
 from src.config import TEAM_MEMBERS
 from src.service.workflow_service import run_agent_workflow
@@ -49,6 +50,7 @@ class ContentItem(BaseModel):
     """
     内容项模型：表示消息中的一个内容项（文本、图像等）
     """
+
     type: str = Field(..., description="The type of content (text, image, etc.)")
     text: Optional[str] = Field(None, description="The text content if type is 'text'")
     image_url: Optional[str] = Field(
@@ -60,6 +62,7 @@ class ChatMessage(BaseModel):
     """
     聊天消息模型：表示对话中的一条消息
     """
+
     role: str = Field(
         ..., description="The role of the message sender (user or assistant)"
     )
@@ -73,6 +76,7 @@ class ChatRequest(BaseModel):
     """
     聊天请求模型：包含完整的对话历史和配置选项
     """
+
     messages: List[ChatMessage] = Field(..., description="The conversation history")
     debug: Optional[bool] = Field(False, description="Whether to enable debug logging")
     deep_thinking_mode: Optional[bool] = Field(
@@ -81,6 +85,15 @@ class ChatRequest(BaseModel):
     search_before_planning: Optional[bool] = Field(
         False, description="Whether to search before planning"
     )
+    execution_mode: Literal["sequential", "planned", "parallel"] = Field(
+        "sequential",
+        description="Run plan steps one at a time via the supervisor, follow the plan "
+        "in order without asking the supervisor, or run independent steps in parallel",
+    )
+    workflow_id: Optional[str] = Field(
+        None,
+        description="Resume this workflow from its last checkpoint instead of starting a new one",
+    )
 
 
 @app.post("/api/chat/stream")
@@ -94,13 +107,13 @@ async def chat_endpoint(request: ChatRequest, req: Request):
 
     Returns:
         The streamed response
-        
+
     聊天端点，用于调用LangGraph工作流。
-    
+
     参数:
         request: 聊天请求对象
         req: FastAPI请求对象，用于检查连接状态
-        
+
     返回:
         流式响应
     """
@@ -141,6 +154,8 @@ async def chat_endpoint(request: ChatRequest, req: Request):
                     request.debug,
                     request.deep_thinking_mode,
                     request.search_before_planning,
+                    request.execution_mode,
+                    request.workflow_id,
                 ):
                     # Check if client is still connected
                     # 检查客户端是否仍然连接
@@ -163,3 +178,23 @@ async def chat_endpoint(request: ChatRequest, req: Request):
     except Exception as e:
         logger.error(f"Error in chat endpoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.get("/api/metrics/llm")
+async def llm_metrics():
+    """
+    LLM metrics endpoint: concurrency limits, queue depth, endpoint health and hedging.
+    LLM指标端点：并发上限、队列深度、端点健康状况和请求对冲
+    """
+    return {
+        "limiters": {
+            llm_type: limiter.stats()
+            for llm_type, limiter in get_llm_limiters().items()
+        },
+        "hedgers": {
+            llm_type: hedger.stats() for llm_type, hedger in get_llm_hedgers().items()
+        },
+        "routers": {
+            llm_type: router.stats() for llm_type, router in get_llm_routers().items()
+        },
+    }
@@ -28,6 +28,8 @@ from .env import (
     VL_API_KEY,
     # 其他配置
     CHROME_INSTANCE_PATH,
+    PROMPT_RELOAD,
+    CHECKPOINT_BACKEND,
 )
 from .tools import TAVILY_MAX_RESULTS
 
@@ -51,4 +53,6 @@ __all__ = [
     "TEAM_MEMBERS",
     "TAVILY_MAX_RESULTS",
     "CHROME_INSTANCE_PATH",
+    "PROMPT_RELOAD",
+    "CHECKPOINT_BACKEND",
 ]
@@ -9,7 +9,7 @@
 通过此配置，可以灵活调整不同代理使用的LLM类型，以优化性能和成本。
 """
 
-from typing import Literal
+from typing import Literal, Optional
 
 # Define available LLM types
 LLMType = Literal["basic", "reasoning", "vision"]
@@ -24,3 +24,147 @@ AGENT_LLM_MAP: dict[str, LLMType] = {
     "browser": "vision",  # 浏览器操作使用vision llm（处理图像）
     "reporter": "basic",  # 编写报告使用basic llm
 }
+
+# 各代理看到的消息历史视图：按消息发送者（代理输出的name，用户消息为"user"，
+# 其他发送者为"*"）配置该代理的提示中保留哪些消息、保留多少：
+# - include: 是否包含该发送者的消息（默认True）
+# - max_tokens: 每条消息最多保留的Token数，None表示完整保留（默认None）
+# - images: 是否保留消息中的图片（默认True）
+# 未配置的代理和发送者看到完整的消息；代理自身的工具调用消息不受影响
+AGENT_MESSAGE_VIEWS: dict[str, dict[str, dict]] = {
+    # 监督只需判断每一步的结果，不需要完整的网页和代码输出
+    "supervisor": {
+        "researcher": {"max_tokens": 300, "images": False},
+        "coder": {"max_tokens": 300, "images": False},
+        "browser": {"max_tokens": 300, "images": False},
+        "reporter": {"max_tokens": 300},
+    },
+    "researcher": {
+        "coder": {"max_tokens": 1000, "images": False},
+        "browser": {"max_tokens": 1000, "images": False},
+        "reporter": {"include": False},
+    },
+    # 编码代理只需要研究结果中的关键数据，不需要原始的网页内容
+    "coder": {
+        "researcher": {"max_tokens": 1000, "images": False},
+        "browser": {"max_tokens": 1000, "images": False},
+        "reporter": {"include": False},
+    },
+    "browser": {
+        "researcher": {"max_tokens": 1000},
+        "coder": {"max_tokens": 1000},
+        "reporter": {"include": False},
+    },
+}
+
+# 各节点发送给LLM的消息历史的Token预算（不含系统提示）：超出时从最早的代理输出开始压缩，
+# 用户任务、计划和最近一步的输出始终完整保留；None表示不限制
+AGENT_CONTEXT_BUDGET: dict[str, Optional[int]] = {
+    "coordinator": 8000,
+    "planner": 16000,
+    "supervisor": 8000,  # 监督只需判断下一步，较早的输出保留摘要即可
+    "researcher": 24000,
+    "coder": 24000,
+    "browser": 24000,
+    "reporter": 32000,  # 报告需要尽量完整的研究结果
+}
+CONTEXT_COMPACT_TOKENS = 400  # 较早的代理输出被压缩后保留的Token数
+
+# 按代理开启LLM响应缓存（默认关闭）：开启后，模型、参数和消息完全相同的请求
+# 直接返回缓存的响应，流式调用会按块回放，适合开发调试和重复运行相同任务
+AGENT_LLM_CACHE_MAP: dict[str, bool] = {
+    "coordinator": False,
+    "planner": False,
+    "supervisor": False,
+    "researcher": False,
+    "coder": False,
+    "browser": False,
+    "reporter": False,
+}
+
+# 按代理开启LLM请求对冲（默认关闭）：请求在按历史延迟分位数计算的时间内仍未收到
+# 响应时，再发出一个相同的请求（配置了多个端点时通常会发往另一个端点），采用先返回的
+# 响应并取消另一个。适合协调、监督这类输出很短且位于每一步关键路径上的调用
+AGENT_LLM_HEDGE_MAP: dict[str, bool] = {
+    "coordinator": False,
+    "planner": False,
+    "supervisor": False,
+    "researcher": False,
+    "coder": False,
+    "browser": False,
+    "reporter": False,
+}
+
+# LLM响应缓存配置
+LLM_CACHE_PATH = ".cache/llm.sqlite"  # SQLite数据库路径（相对于工作目录）
+LLM_CACHE_TTL = 24 * 3600  # 缓存响应的有效期（秒）
+LLM_CACHE_MAX_ENTRIES = 2048  # 最多缓存的响应数，超出后按LRU淘汰
+LLM_CACHE_REPLAY_CHUNK_CHARS = 16  # 流式回放缓存响应时每块的字符数
+
+# LLM端点路由配置（*_BASE_URL和*_API_KEY用逗号分隔配置多个端点时生效）
+LLM_ROUTER_EWMA_ALPHA = 0.3  # 首字节时间和错误率EWMA的平滑系数
+# 端点返回429/5xx或连接失败后的冷却时间（秒），429响应带Retry-After时以其为准
+LLM_ROUTER_COOLDOWN = 30.0
+# 端点超过该时间未被使用时优先探测一次（秒），以便发现恢复的端点
+LLM_ROUTER_PROBE_INTERVAL = 60.0
+
+# LLM并发限制配置：每种LLM类型一个AIMD自适应并发限制器
+LLM_LIMITER_ENABLED = True  # 是否限制LLM并发请求数
+LLM_LIMITER_INITIAL_LIMIT = 8  # 初始并发上限
+LLM_LIMITER_MIN_LIMIT = 1  # 并发上限的下限
+LLM_LIMITER_MAX_LIMIT = 64  # 并发上限的上限
+LLM_LIMITER_MAX_QUEUE = 128  # 等待队列的最大长度，队列已满时返回合成的429
+LLM_LIMITER_QUEUE_TIMEOUT = 120.0  # 在队列中等待的最长时间（秒）
+LLM_LIMITER_BACKOFF_RATIO = 0.7  # 服务商返回429或5xx时并发上限乘以的系数
+
+# LLM请求对冲配置（AGENT_LLM_HEDGE_MAP中开启的代理生效）
+LLM_HEDGE_PERCENTILE = 0.95  # 对冲延迟取该代理最近响应延迟的分位数
+LLM_HEDGE_MIN_DELAY = 0.5  # 对冲延迟的下限（秒）
+LLM_HEDGE_WINDOW = 200  # 每个代理保留的最近延迟样本数
+LLM_HEDGE_MIN_SAMPLES = 20  # 延迟样本少于该数量时不对冲
+LLM_HEDGE_MAX_RATIO = 0.1  # 对冲请求数占请求总数的比例上限，限制额外的请求量
+LLM_HEDGE_BURST = 3  # 对冲预算最多积累的次数，允许短时间内连续对冲
+
+# 等待LLM并发名额时的优先级，数值越小越优先（未列出的调用方排在最后）
+AGENT_LLM_PRIORITY: dict[str, int] = {
+    "coordinator": 0,  # 协调和监督决定工作流走向，优先处理
+    "supervisor": 0,
+    "planner": 1,
+    "researcher": 2,
+    "coder": 2,
+    "browser": 2,
+    "reporter": 3,  # 报告在工作流末尾生成，可以稍后处理
+}
+
+# 按计划执行模式（execution_mode="planned"）下判断代理输出是否异常的正则：
+# 代理输出的正文以匹配这些正则的完整短语开头时，由监督LLM决定下一步，而不是直接执行
+# 下一个计划步骤。只匹配完整的失败短语，"Errors in the dataset"、"Unfortunately, the data
+# shows"这类正常回答不会被误判
+PLAN_FOLLOWER_FAILURE_PATTERNS: tuple[str, ...] = (
+    r"Failed to \w+",
+    r"(?:\w+)?Error:",  # 如"Error:"、"NameError:"
+    r"Traceback \(most recent call last\)",
+    r"I'm sorry, (?:but )?I (?:can't|cannot|couldn't|could not|was unable|am unable)\b",
+    r"I apologize\b",
+    r"I (?:was|am) unable to\b",
+    r"Unfortunately,? I (?:was|am|could|can)(?:n't| not| unable)\b",
+)
+
+# 工作流检查点配置（CHECKPOINT_BACKEND为sqlite时生效）
+CHECKPOINT_PATH = ".cache/checkpoints.sqlite"  # SQLite数据库路径（相对于工作目录）
+CHECKPOINT_COMPRESSION_LEVEL = 6  # 消息和通道值的zlib压缩级别（0-9）
+# 内存中缓存的通道值和消息哈希数，未变化的内容不重复序列化
+CHECKPOINT_REF_CACHE_SIZE = 4096
+
+# 规划前准备配置：协调节点调用LLM的同时提前开始规划节点需要的准备工作，
+# 协调节点移交给规划节点时直接使用结果，否则取消
+PLANNING_SPECULATIVE_SEARCH = True  # 开启规划前搜索时，与协调节点并行执行搜索
+PLANNING_WARM_UP = True  # 深度思考模式下，与协调节点并行预热规划节点使用的推理模型连接
+PLANNING_WARM_UP_TIMEOUT = 5.0  # 预热请求的超时时间（秒）
+
+# 首步推测执行配置（按计划执行模式，只对异步执行的工作流生效）：规划节点流式生成计划时，
+# 第一个步骤一解析出来就开始执行；计划生成完毕且第一个步骤不变时交给该步骤的代理节点，
+# 否则取消
+PLANNER_SPECULATIVE_FIRST_STEP = True  # 是否推测执行计划的第一个步骤
+# 可以推测执行的代理：计划改变时结果被丢弃，只列出没有副作用的代理
+PLANNER_SPECULATIVE_AGENTS: tuple[str, ...] = ("researcher",)
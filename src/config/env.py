@@ -17,7 +17,8 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # 推理型LLM配置（用于复杂推理任务）
-REASONING_MODEL = os.getenv("REASONING_MODEL", "o1-mini")  # 默认使用DeepSeek的o1-mini模型
+# 默认使用DeepSeek的o1-mini模型
+REASONING_MODEL = os.getenv("REASONING_MODEL", "o1-mini")
 REASONING_BASE_URL = os.getenv("REASONING_BASE_URL")  # DeepSeek API的基础URL
 REASONING_API_KEY = os.getenv("REASONING_API_KEY")  # DeepSeek API密钥
 
@@ -33,3 +34,10 @@ VL_API_KEY = os.getenv("VL_API_KEY")  # 视觉模型API密钥
 
 # Chrome浏览器实例配置
 CHROME_INSTANCE_PATH = os.getenv("CHROME_INSTANCE_PATH")  # Chrome可执行文件的路径
+
+# 开发模式：提示模板文件修改后自动重新加载，无需重启服务
+PROMPT_RELOAD = os.getenv("PROMPT_RELOAD", "false").lower() in ("1", "true", "yes")
+
+# 工作流检查点存储：memory（默认，仅当前进程）、sqlite（保存到CHECKPOINT_PATH，
+# 可在进程重启后按workflow_id恢复）或none（不保存）
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "memory").lower()
@@ -11,3 +11,86 @@
 
 # Tavily搜索工具配置
 TAVILY_MAX_RESULTS = 5  # 每次搜索返回的最大结果数量
+TAVILY_MULTI_SEARCH_CONCURRENCY = 4  # 多查询搜索时同时进行的最大查询数
+
+# Jina Reader客户端配置
+JINA_READER_URL = "https://r.jina.ai/"  # Jina Reader服务地址
+JINA_HTTP2 = True  # 是否启用HTTP/2（依赖httpx[http2]）
+JINA_MAX_CONNECTIONS = 20  # 连接池最大连接数
+JINA_MAX_KEEPALIVE_CONNECTIONS = 10  # 连接池最大保活连接数
+JINA_KEEPALIVE_EXPIRY = 30.0  # 空闲保活连接的过期时间（秒）
+JINA_CONNECT_TIMEOUT = 10.0  # 建立连接的超时时间（秒）
+JINA_READ_TIMEOUT = 60.0  # 读取响应的超时时间（秒），Jina渲染页面可能较慢
+
+# 批量爬取配置
+CRAWLER_MAX_CONCURRENCY = 8  # 批量爬取时的全局并发上限
+CRAWLER_HOST_RATE = 2.0  # 每个源站每秒允许的请求数
+CRAWLER_HOST_BURST = 4  # 每个源站允许的突发请求数
+JINA_RATE = 3.0  # Jina Reader每秒允许的请求数（未配置API密钥时限制更严格）
+JINA_BURST = 5  # Jina Reader允许的突发请求数
+
+# 爬取缓存配置
+CRAWL_CACHE_ENABLED = True  # 是否启用磁盘爬取缓存
+CRAWL_CACHE_DIR = ".cache/crawl"  # 缓存目录（相对于工作目录）
+CRAWL_CACHE_MAX_BYTES = 512 * 1024 * 1024  # 缓存占用的最大字节数，超出后按LRU淘汰
+CRAWL_CACHE_DEFAULT_TTL = 24 * 3600  # 默认缓存有效期（秒）
+CRAWL_CACHE_DOMAIN_TTLS = {  # 按域名配置的缓存有效期（秒），匹配域名及其子域名
+    "wikipedia.org": 7 * 24 * 3600,
+    "reuters.com": 3600,
+    "apnews.com": 3600,
+    "bloomberg.com": 3600,
+}
+# 缓存过期后是否先用ETag/Last-Modified向源站确认内容是否变化
+CRAWL_CACHE_REVALIDATE = True
+
+# 正文提取配置
+EXTRACTION_USE_PROCESS_POOL = True  # 是否在进程池中执行可读性提取
+EXTRACTION_WORKERS = None  # 进程池大小，None表示使用CPU核数
+EXTRACTION_MAX_HTML_BYTES = 2 * 1024 * 1024  # 超过该大小的网页直接使用轻量提取器
+EXTRACTION_TIMEOUT = 20.0  # 单个网页可读性提取的超时时间（秒），超时后使用轻量提取器
+
+# 网页压缩配置
+CRAWL_TOKEN_BUDGET = 4000  # crawl_tool返回单个网页的Token上限，超出时只保留最相关的片段；设为None关闭压缩
+# crawl_many_tool返回内容的总Token上限，平均分配给各网页
+CRAWL_MANY_TOKEN_BUDGET = 12000
+CRAWL_CHUNK_TOKENS = 200  # 压缩时每个片段的目标Token数
+
+# 网页图片配置
+# 丢弃规则中的关键词必须是URL中一个完整的词（以路径分隔符、-、_、.或URL开头结尾为界），
+# 避免误伤silicon-wafer.jpg、soundtrack-cover.png这类正文图片
+_WORD_START = r"(?:^|[/_.\-])"
+_WORD_END = r"(?:[/_.\-?#&=]|$)"
+ARTICLE_IMAGE_DROP_PATTERNS = [  # URL匹配这些正则（不区分大小写）的图片会被丢弃
+    # 跟踪像素通常是文件名或路径的最后一个词（如pixel.gif、fb-pixel?id=），
+    # google-pixel-9.jpg这类产品图片不会被丢弃
+    rf"{_WORD_START}(?:tracking[-_]?)?pixel(?:[/.?#&]|$)",
+    rf"{_WORD_START}track(?:ing|er)?{_WORD_END}",
+    rf"{_WORD_START}beacons?{_WORD_END}",
+    rf"{_WORD_START}spacer{_WORD_END}",
+    rf"{_WORD_START}sprites?{_WORD_END}",
+    rf"{_WORD_START}favicons?{_WORD_END}",
+    rf"{_WORD_START}icons?{_WORD_END}",
+    rf"{_WORD_START}logos?{_WORD_END}",
+    rf"{_WORD_START}avatars?{_WORD_END}",
+    rf"{_WORD_START}badges?{_WORD_END}",
+    rf"{_WORD_START}emojis?{_WORD_END}",
+    r"\b1x1\b",
+    r"doubleclick\.net",
+    r"google-analytics\.com",
+]
+ARTICLE_IMAGE_DROP_EXTENSIONS = [".svg", ".ico"]  # 丢弃这些扩展名的图片（通常是图标）
+ARTICLE_MAX_IMAGES = 5  # 每个网页最多保留的图片数量，设为None表示不限制
+
+# 搜索结果缓存配置
+SEARCH_CACHE_ENABLED = True  # 是否缓存搜索结果
+SEARCH_CACHE_MAX_ENTRIES = 512  # 内存中最多缓存的查询数量，超出后按LRU淘汰
+SEARCH_CACHE_TTL = 3600  # 搜索结果的有效期（秒）
+SEARCH_CACHE_PATH = ".cache/search.sqlite"  # 持久化存储路径，设为None表示只缓存在内存中
+
+# 本地搜索配置
+SEARCH_BACKEND = "tavily"  # 搜索后端："tavily"只用Tavily，"local"只查本地索引（离线模式），"local_first"本地结果不足时再用Tavily
+LOCAL_INDEX_ENABLED = True  # 是否将爬取的网页加入本地搜索索引
+LOCAL_INDEX_PATH = ".cache/local_index.sqlite"  # 本地搜索索引的存储路径
+LOCAL_INDEX_MAX_CHARS = 200_000  # 每个网页最多索引和保存的字符数
+LOCAL_SEARCH_MIN_RESULTS = 3  # local_first模式下，至少有这么多相关结果才不再调用Tavily
+LOCAL_SEARCH_MIN_SCORE = 0.5  # 本地结果被视为相关的最低分数（0-1）
@@ -11,9 +11,12 @@
 """
 
 from .article import Article
-from .crawler import Crawler
+from .cache import CrawlCache
+from .crawler import Crawler, CrawlResult
 
 __all__ = [
     "Article",
+    "CrawlCache",
     "Crawler",
+    "CrawlResult",
 ]
@@ -4,84 +4,362 @@
 该模块定义了Article类，用于表示从网页爬取的文章内容：
 1. 存储文章标题和HTML内容
 2. 提供HTML到Markdown的转换功能
-3. 支持将内容转换为适合LLM处理的消息格式（包括文本和图像）
+3. 支持将内容转换为适合LLM处理的消息格式（包括文本和图像），
+   Markdown正文和消息格式由同一次HTML转换得到
+4. 通过图片策略过滤跟踪像素、图标等无用图片，并限制每页图片数量
 
 Article类是爬虫系统的核心数据结构，负责内容的表示和格式转换。
 """
 
 import re
-from urllib.parse import urljoin
+from copy import deepcopy
+from typing import Iterable, Optional
+from urllib.parse import urljoin, urlsplit
 
-from markdownify import markdownify as md
+from markdownify import MarkdownConverter, markdownify as md
+
+from src.config.tools import (
+    ARTICLE_IMAGE_DROP_PATTERNS,
+    ARTICLE_IMAGE_DROP_EXTENSIONS,
+    ARTICLE_MAX_IMAGES,
+)
+
+from .urls import normalize_url
+
+# 匹配Markdown格式的图片链接，捕获图片地址
+IMAGE_PATTERN = re.compile(r"!\[.*?\]\((.*?)\)")
+
+
+class ImagePolicy:
+    """
+    图片策略：决定消息中保留哪些图片
+
+    1. 丢弃内联的data URI，以及URL匹配丢弃规则或扩展名的图片
+    2. 按规范化后的URL去重，只保留第一次出现的图片
+    3. 超过数量上限时，优先保留周围文本最多的图片
+    """
+
+    def __init__(
+        self,
+        drop_patterns: Iterable[str] = ARTICLE_IMAGE_DROP_PATTERNS,
+        drop_extensions: Iterable[str] = ARTICLE_IMAGE_DROP_EXTENSIONS,
+        max_images: Optional[int] = ARTICLE_MAX_IMAGES,
+    ):
+        """
+        初始化图片策略
+
+        Args:
+            drop_patterns: 丢弃图片的URL正则（不区分大小写）
+            drop_extensions: 丢弃图片的扩展名
+            max_images: 每页最多保留的图片数量，None表示不限制
+        """
+        patterns = list(drop_patterns)
+        self.drop_pattern = (
+            re.compile("|".join(f"(?:{p})" for p in patterns), re.IGNORECASE)
+            if patterns
+            else None
+        )
+        self.drop_extensions = tuple(ext.lower() for ext in drop_extensions)
+        self.max_images = max_images
+
+    def is_dropped(self, url: str) -> bool:
+        """
+        判断图片是否应按规则丢弃
+
+        Args:
+            url: 图片的绝对URL
+
+        Returns:
+            是否丢弃
+        """
+        if url.startswith("data:"):
+            return True
+        if self.drop_pattern is not None and self.drop_pattern.search(url):
+            return True
+        return urlsplit(url).path.lower().endswith(self.drop_extensions)
+
+    def apply(self, content: list[dict]) -> list[dict]:
+        """
+        对消息内容应用图片策略
+
+        图片被移除后，其前后的文本片段会合并为一个。
+
+        Args:
+            content: 文本和图片交替的消息内容
+
+        Returns:
+            应用策略后的消息内容
+        """
+        seen: set[str] = set()
+        kept: set[int] = set()
+        for index, part in enumerate(content):
+            if part["type"] != "image_url":
+                continue
+            url = part["image_url"]["url"]
+            if self.is_dropped(url):
+                continue
+            key = normalize_url(url)
+            if key not in seen:
+                seen.add(key)
+                kept.add(index)
+
+        if self.max_images is not None and len(kept) > self.max_images:
+            # 以图片前后文本的长度衡量其与正文的相关程度，画廊等连续图片得分较低
+            def nearby_text(index: int) -> int:
+                return sum(
+                    len(content[i]["text"])
+                    for i in (index - 1, index + 1)
+                    if 0 <= i < len(content) and content[i]["type"] == "text"
+                )
+
+            ranked = sorted(kept, key=lambda i: (-nearby_text(i), i))
+            kept = set(ranked[: self.max_images])
+
+        result: list[dict] = []
+        merge = False
+        for index, part in enumerate(content):
+            if part["type"] == "image_url":
+                if index in kept:
+                    result.append(part)
+                else:
+                    merge = True
+                continue
+            if merge and result and result[-1]["type"] == "text":
+                # 合并被移除图片两侧的文本
+                texts = [result[-1]["text"], part["text"]]
+                result[-1] = {"type": "text", "text": "\n\n".join(filter(None, texts))}
+            else:
+                result.append(part)
+            merge = False
+        return result
+
+
+# 默认图片策略，使用配置中的规则
+DEFAULT_IMAGE_POLICY = ImagePolicy()
+
+
+# 转换时代替图片的标记字符（Unicode私用区），正文中出现该字符时回退到按正则切分
+IMAGE_MARKER = "\ue000"
+
+
+class _ArticleConverter(MarkdownConverter):
+    """
+    记录图片位置的Markdown转换器
+
+    每张图片在输出中以标记包围的编号代替，转换完成后一次扫描即可同时得到
+    Markdown正文和图片在正文中的位置，不必再用正则重新查找图片链接。
+    """
+
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.images: list[tuple[str, str]] = []  # 每张图片的Markdown文本和原始地址
+
+    def convert_img(self, el, text, parent_tags):
+        markdown = super().convert_img(el, text, parent_tags)
+        if not markdown.startswith("!["):
+            # 行内元素（如标题）中的图片只保留替代文本
+            return markdown
+        self.images.append((markdown, el.attrs.get("src", None) or ""))
+        return f"{IMAGE_MARKER}{len(self.images) - 1}{IMAGE_MARKER}"
+
+
+def convert_html(html: str) -> tuple[str, tuple[tuple[int, int, str], ...]]:
+    """
+    将HTML转换为Markdown，同时返回每张图片在Markdown中的位置
+
+    Args:
+        html: HTML内容
+
+    Returns:
+        Markdown正文，以及每张图片的(起始位置, 结束位置, 图片地址)
+    """
+    if IMAGE_MARKER in html:
+        markdown = md(html)
+        return markdown, tuple(
+            (match.start(), match.end(), match.group(1))
+            for match in IMAGE_PATTERN.finditer(markdown)
+        )
+    converter = _ArticleConverter()
+    segments = converter.convert(html).split(IMAGE_MARKER)
+    pieces: list[str] = []
+    spans: list[tuple[int, int, str]] = []
+    position = 0
+    # 切分结果中文本和图片编号交替出现
+    for index, segment in enumerate(segments):
+        if index % 2:
+            image_markdown, src = converter.images[int(segment)]
+            spans.append((position, position + len(image_markdown), src))
+            segment = image_markdown
+        pieces.append(segment)
+        position += len(segment)
+    return "".join(pieces), tuple(spans)
 
 
 class Article:
     """
     文章类，表示从网页爬取的文章
-    
+
     存储文章的标题、内容，并提供格式转换功能，
     使爬取的内容能够方便地被LLM理解和处理。
+
+    HTML只在首次使用时转换一次，转换时同时记录图片位置，Markdown正文和
+    消息格式都由这一次转换得到并缓存；标题、内容、URL或图片策略被修改后
+    相应的缓存自动失效。使用__slots__，大量缓存的文章不为每个实例保留__dict__。
     """
-    
-    url: str  # 文章源URL
+
+    __slots__ = (
+        "_title",
+        "_html_content",
+        "_url",
+        "_image_policy",
+        "_markdown_body",  # 正文Markdown
+        "_image_spans",  # 图片在正文Markdown中的位置和地址
+        "_message",  # 消息格式（不可变的元组，返回时复制）
+    )
 
     def __init__(self, title: str, html_content: str):
         """
         初始化文章对象
-        
+
         Args:
             title: 文章标题
             html_content: 文章HTML内容
         """
-        self.title = title
-        self.html_content = html_content
+        self._title = title
+        self._html_content = html_content
+        self._url: Optional[str] = None  # 文章源URL，由爬虫设置
+        self._image_policy = DEFAULT_IMAGE_POLICY  # 消息中图片的保留策略
+        self._markdown_body: Optional[str] = None
+        self._image_spans: tuple[tuple[int, int, str], ...] = ()
+        self._message: Optional[tuple[dict, ...]] = None
+
+    @property
+    def title(self) -> str:
+        return self._title
+
+    @title.setter
+    def title(self, value: str) -> None:
+        self._title = value
+        self._message = None
+
+    @property
+    def html_content(self) -> str:
+        return self._html_content
+
+    @html_content.setter
+    def html_content(self, value: str) -> None:
+        self._html_content = value
+        self._markdown_body = None
+        self._message = None
+
+    @property
+    def url(self) -> Optional[str]:
+        return self._url
+
+    @url.setter
+    def url(self, value: str) -> None:
+        self._url = value
+        self._message = None
+
+    @property
+    def image_policy(self) -> ImagePolicy:
+        return self._image_policy
+
+    @image_policy.setter
+    def image_policy(self, value: ImagePolicy) -> None:
+        self._image_policy = value
+        self._message = None
+
+    def _get_markdown_body(self) -> str:
+        """获取正文的Markdown，只在首次调用时转换HTML"""
+        if self._markdown_body is None:
+            self._markdown_body, self._image_spans = convert_html(self._html_content)
+        return self._markdown_body
 
     def to_markdown(self, including_title: bool = True) -> str:
         """
         将文章内容转换为Markdown格式
-        
+
         使用markdownify库将HTML内容转换为Markdown格式，
-        可选择是否包含标题。
-        
+        可选择是否包含标题。转换结果会被缓存，重复调用不会再次转换。
+
         Args:
             including_title: 是否在转换结果中包含标题
-            
+
         Returns:
             转换后的Markdown格式文本
         """
         markdown = ""
         if including_title:
             markdown += f"# {self.title}\n\n"
-        markdown += md(self.html_content)
+        markdown += self._get_markdown_body()
         return markdown
 
     def to_message(self) -> list[dict]:
         """
         将文章内容转换为适合LLM处理的消息格式
-        
+
         将Markdown内容转换为消息对象列表，其中：
         - 文本内容被转换为text类型消息
-        - 图片被转换为image_url类型消息
-        
+        - 图片被转换为image_url类型消息，并按image_policy过滤
+
         这种格式特别适合多模态LLM处理，可以同时理解文本和图像。
-        
+        结果会被缓存，每次调用返回新的副本，修改返回值不影响缓存。
+
         Returns:
             消息对象列表，每个对象包含type和对应的内容
         """
-        # 匹配Markdown格式的图片链接
-        image_pattern = r"!\[.*?\]\((.*?)\)"
-
-        content: list[dict[str, str]] = []
-        # 按图片链接分割文本
-        parts = re.split(image_pattern, self.to_markdown())
-
-        for i, part in enumerate(parts):
-            if i % 2 == 1:
-                # 处理图片部分：将相对链接转为绝对链接
-                image_url = urljoin(self.url, part.strip())
-                content.append({"type": "image_url", "image_url": {"url": image_url}})
-            else:
-                # 处理文本部分
-                content.append({"type": "text", "text": part.strip()})
+        if self._message is None:
+            self._message = tuple(self._build_message())
+        return deepcopy(list(self._message))
+
+    def _build_message(self) -> list[dict]:
+        """按转换时记录的图片位置切分正文，不再扫描Markdown"""
+        body = self._get_markdown_body()
+        content: list[dict] = []
+        position = 0
+        text_prefix = f"# {self.title}\n\n"
+        for start, end, src in self._image_spans:
+            text = text_prefix + body[position:start]
+            content.append({"type": "text", "text": text.strip()})
+            content.append(
+                {
+                    "type": "image_url",
+                    "image_url": {"url": urljoin(self.url, src.strip())},
+                }
+            )
+            position, text_prefix = end, ""
+        content.append(
+            {"type": "text", "text": (text_prefix + body[position:]).strip()}
+        )
+        return self.image_policy.apply(content)
+
 
-        return content
+def markdown_to_message(
+    markdown: str, base_url: str, image_policy: Optional[ImagePolicy] = None
+) -> list[dict]:
+    """
+    将Markdown文本按图片链接切分为文本和图片消息
+
+    Args:
+        markdown: Markdown文本
+        base_url: 用于将相对图片链接转为绝对链接的页面URL
+        image_policy: 图片策略，默认使用DEFAULT_IMAGE_POLICY
+
+    Returns:
+        消息对象列表，文本和图片交替出现
+    """
+    content: list[dict] = []
+    position = 0
+    for match in IMAGE_PATTERN.finditer(markdown):
+        # 处理图片之前的文本部分
+        content.append(
+            {"type": "text", "text": markdown[position : match.start()].strip()}
+        )
+        # 处理图片部分：将相对链接转为绝对链接
+        image_url = urljoin(base_url, match.group(1).strip())
+        content.append({"type": "image_url", "image_url": {"url": image_url}})
+        position = match.end()
+    # 处理最后一张图片之后的文本部分
+    content.append({"type": "text", "text": markdown[position:].strip()})
+    return (image_policy or DEFAULT_IMAGE_POLICY).apply(content)
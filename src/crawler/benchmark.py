@@ -0,0 +1,130 @@
+"""
+文章转换基准模块 - 测量大页面转换为Markdown和消息格式的耗时与峰值内存
+
+爬取的页面可能有数MB的HTML，研究员通常同时需要Markdown正文和消息格式。该模块：
+1. 生成指定大小、文本和图片交错的合成HTML页面
+2. 分别测量优化前的做法（每次调用都用markdownify重新转换，再用正则切分图片）
+   和Article（一次转换同时得到正文和图片位置，结果缓存）完成同样工作的耗时和峰值内存
+3. 以表格形式输出各页面大小的结果
+
+用法：python -m src.crawler.benchmark [页面大小MB ...]
+"""
+
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable
+from urllib.parse import urljoin
+
+from markdownify import markdownify as md
+
+from .article import Article
+
+# 默认测量的页面大小（MB）
+DEFAULT_SIZES_MB = (1, 2, 5)
+
+# 优化前to_message切分图片使用的正则
+_LEGACY_IMAGE_PATTERN = r"!\[.*?\]\((.*?)\)"
+
+
+def make_page(size_mb: float) -> str:
+    """
+    生成指定大小的合成HTML页面
+
+    Args:
+        size_mb: 页面大小（MB）
+
+    Returns:
+        HTML文本
+    """
+    section = (
+        "<h2>Section</h2><p>"
+        + "Benchmark paragraph with <b>bold</b>, <a href='/link'>links</a> and text. "
+        * 20
+        + "</p><img src='/img/figure.png' alt='figure'><ul><li>one</li><li>two</li></ul>"
+    )
+    count = max(1, int(size_mb * 1024 * 1024 / len(section)))
+    return f"<html><body>{section * count}</body></html>"
+
+
+def legacy_render(html: str, url: str) -> None:
+    """优化前的做法：to_markdown和to_message各自转换一次HTML，再用正则切分图片"""
+    md(html)  # to_markdown
+    markdown = "# Page\n\n" + md(html)  # to_message再次转换
+    content = []
+    parts = re.split(_LEGACY_IMAGE_PATTERN, markdown)
+    for index, part in enumerate(parts):
+        if index % 2 == 1:
+            image_url = urljoin(url, part.strip())
+            content.append({"type": "image_url", "image_url": {"url": image_url}})
+        else:
+            content.append({"type": "text", "text": part.strip()})
+
+
+def article_render(html: str, url: str) -> None:
+    """当前的做法：Article一次转换，Markdown和消息格式共用转换结果"""
+    article = Article(title="Page", html_content=html)
+    article.url = url
+    article.to_markdown()
+    article.to_message()
+
+
+def measure(render: Callable[[str, str], None], html: str) -> tuple[float, float]:
+    """
+    测量一次渲染的耗时和峰值内存
+
+    tracemalloc会显著拖慢转换，耗时和峰值内存分两次运行测量。
+
+    Returns:
+        耗时（秒）和峰值内存（MB）
+    """
+    url = "https://example.com/page"
+    started = time.perf_counter()
+    render(html, url)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    render(html, url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def run_benchmark(sizes_mb=DEFAULT_SIZES_MB) -> list[dict]:
+    """
+    对每个页面大小分别测量优化前后的耗时和峰值内存
+
+    Args:
+        sizes_mb: 页面大小（MB）列表
+
+    Returns:
+        每个页面大小的测量结果
+    """
+    results = []
+    for size_mb in sizes_mb:
+        html = make_page(size_mb)
+        legacy_time, legacy_peak = measure(legacy_render, html)
+        article_time, article_peak = measure(article_render, html)
+        results.append(
+            {
+                "size_mb": size_mb,
+                "legacy_seconds": legacy_time,
+                "legacy_peak_mb": legacy_peak,
+                "article_seconds": article_time,
+                "article_peak_mb": article_peak,
+            }
+        )
+    return results
+
+
+if __name__ == "__main__":
+    sizes = [float(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES_MB
+    print(
+        f"{'size':>6} {'legacy s':>9} {'legacy MB':>10} {'article s':>10} {'article MB':>11}"
+    )
+    for row in run_benchmark(sizes):
+        print(
+            f"{row['size_mb']:>5}M {row['legacy_seconds']:>9.2f} {row['legacy_peak_mb']:>10.1f}"
+            f" {row['article_seconds']:>10.2f} {row['article_peak_mb']:>11.1f}"
+        )
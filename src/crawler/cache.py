@@ -0,0 +1,350 @@
+"""
+爬取缓存模块 - 持久化保存爬取结果，避免重复爬取相同网页
+
+该模块实现了基于磁盘的内容寻址爬取缓存：
+1. 以规范化后的URL作为键，同时保存原始HTML和提取后的文章
+2. 内容按SHA-256哈希存储为文件，相同内容只保存一份
+3. 支持按域名配置有效期，过期后可通过ETag/Last-Modified重新验证
+4. 总大小超过上限时按最近最少使用（LRU）策略淘汰
+5. 记录命中、未命中和重新验证次数
+
+索引保存在SQLite数据库中，所有操作都在线程锁内完成，
+可以在多个线程和事件循环之间共享同一个缓存实例。
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import urlsplit
+
+from src.config.tools import (
+    CRAWL_CACHE_DIR,
+    CRAWL_CACHE_MAX_BYTES,
+    CRAWL_CACHE_DEFAULT_TTL,
+    CRAWL_CACHE_DOMAIN_TTLS,
+)
+
+from .article import Article
+from .urls import normalize_url
+
+
+@dataclass
+class CacheEntry:
+    """
+    缓存条目：一次爬取的原始HTML、提取的文章及验证信息
+    """
+
+    url: str
+    html: str
+    article: Article
+    etag: Optional[str]
+    last_modified: Optional[str]
+    expires_at: float
+
+    @property
+    def is_fresh(self) -> bool:
+        """条目是否仍在有效期内"""
+        return time.time() < self.expires_at
+
+    @property
+    def can_revalidate(self) -> bool:
+        """条目是否带有可用于条件请求的验证信息"""
+        return bool(self.etag or self.last_modified)
+
+
+class CrawlCache:
+    """
+    内容寻址的磁盘爬取缓存
+    """
+
+    def __init__(
+        self,
+        directory: str = CRAWL_CACHE_DIR,
+        max_bytes: int = CRAWL_CACHE_MAX_BYTES,
+        default_ttl: float = CRAWL_CACHE_DEFAULT_TTL,
+        domain_ttls: Optional[dict[str, float]] = None,
+    ):
+        """
+        初始化爬取缓存
+
+        参数:
+            directory: 缓存目录，索引和内容文件都保存在其中
+            max_bytes: 内容文件的最大总字节数
+            default_ttl: 默认有效期（秒）
+            domain_ttls: 按域名配置的有效期，默认使用CRAWL_CACHE_DOMAIN_TTLS
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.domain_ttls = (
+            CRAWL_CACHE_DOMAIN_TTLS if domain_ttls is None else domain_ttls
+        )
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.join(directory, "blobs"), exist_ok=True)
+        self._db = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                html_hash TEXT NOT NULL,
+                title TEXT,
+                content_hash TEXT NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access);
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                size INTEGER NOT NULL
+            );
+            """
+        )
+
+    def ttl_for(self, url: str) -> float:
+        """
+        获取URL对应的有效期，域名配置同样适用于其子域名
+
+        参数:
+            url: 网页URL
+
+        返回:
+            float: 有效期（秒）
+        """
+        host = (urlsplit(url).hostname or "").lower()
+        for domain, ttl in self.domain_ttls.items():
+            if host == domain or host.endswith("." + domain):
+                return ttl
+        return self.default_ttl
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """
+        查找URL对应的缓存条目（包括已过期的条目）
+
+        命中新鲜条目计为一次命中，其他情况计为未命中；
+        过期条目仍会返回，以便调用方重新验证。
+
+        参数:
+            url: 网页URL
+
+        返回:
+            Optional[CacheEntry]: 缓存条目，不存在时返回None
+        """
+        key = self._key(url)
+        with self._lock:
+            row = self._db.execute(
+                "SELECT url, html_hash, title, content_hash, etag, last_modified,"
+                " expires_at FROM entries WHERE key = ?",
+                (key,),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            url, html_hash, title, content_hash, etag, last_modified, expires_at = row
+            try:
+                html = self._read_blob(html_hash)
+                content = self._read_blob(content_hash)
+            except FileNotFoundError:
+                # 内容文件被外部删除，视为未命中
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._db.commit()
+                self.misses += 1
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+            entry = CacheEntry(
+                url=url,
+                html=html,
+                article=Article(title=title, html_content=content),
+                etag=etag,
+                last_modified=last_modified,
+                expires_at=expires_at,
+            )
+            entry.article.url = url
+            if entry.is_fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+            return entry
+
+    def put(
+        self,
+        url: str,
+        html: str,
+        article: Article,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None,
+    ) -> None:
+        """
+        保存一次爬取结果，并在超出大小上限时淘汰最久未使用的条目
+
+        参数:
+            url: 网页URL
+            html: 原始HTML
+            article: 提取后的文章
+            etag: 源站返回的ETag
+            last_modified: 源站返回的Last-Modified
+        """
+        now = time.time()
+        key = self._key(url)
+        with self._lock:
+            replaced = self._db.execute(
+                "SELECT 1 FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            html_hash = self._write_blob(html)
+            content_hash = self._write_blob(article.html_content or "")
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    url,
+                    html_hash,
+                    article.title,
+                    content_hash,
+                    etag,
+                    last_modified,
+                    now + self.ttl_for(url),
+                    now,
+                ),
+            )
+            if replaced:
+                # 覆盖旧条目后，旧内容可能已不再被引用
+                self._collect_orphan_blobs()
+            self._evict()
+            self._db.commit()
+
+    def refresh(self, url: str) -> None:
+        """
+        源站确认内容未变化后，延长条目的有效期
+
+        参数:
+            url: 网页URL
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE entries SET expires_at = ?, last_access = ? WHERE key = ?",
+                (now + self.ttl_for(url), now, self._key(url)),
+            )
+            self._db.commit()
+            self.revalidations += 1
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        返回:
+            dict: 命中、未命中、重新验证次数，命中率，条目数和占用字节数
+        """
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            size = self._db.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "revalidations": self.revalidations,
+            "hit_rate": (self.hits + self.revalidations) / lookups if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha256(normalize_url(url).encode()).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.directory, "blobs", digest[:2], digest)
+
+    def _read_blob(self, digest: str) -> str:
+        with open(self._blob_path(digest), encoding="utf-8") as f:
+            return f.read()
+
+    def _write_blob(self, text: str) -> str:
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._blob_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 先写临时文件再原子替换，避免进程中断留下不完整的内容
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        self._db.execute(
+            "INSERT OR IGNORE INTO blobs VALUES (?, ?)", (digest, len(data))
+        )
+        return digest
+
+    def _evict(self) -> None:
+        """按LRU顺序删除条目，直到内容文件总大小不超过上限"""
+        sizes = dict(self._db.execute("SELECT hash, size FROM blobs").fetchall())
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        entries = self._db.execute(
+            "SELECT key, html_hash, content_hash FROM entries ORDER BY last_access"
+        ).fetchall()
+        # 先在内存中按引用计数算出需要删除的条目，再批量删除并只回收一次孤立内容
+        refs: dict[str, int] = {}
+        for _, *hashes in entries:
+            for digest in set(hashes):
+                refs[digest] = refs.get(digest, 0) + 1
+        evicted = []
+        for key, *hashes in entries:
+            evicted.append((key,))
+            for digest in set(hashes):
+                refs[digest] -= 1
+                if refs[digest] == 0:
+                    total -= sizes.get(digest, 0)
+            if total <= self.max_bytes:
+                break
+        self._db.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        self._collect_orphan_blobs()
+
+    def _collect_orphan_blobs(self) -> int:
+        """删除不再被任何条目引用的内容文件，返回释放的字节数"""
+        orphans = self._db.execute(
+            "SELECT hash, size FROM blobs WHERE hash NOT IN"
+            " (SELECT html_hash FROM entries UNION SELECT content_hash FROM entries)"
+        ).fetchall()
+        for digest, _ in orphans:
+            try:
+                os.remove(self._blob_path(digest))
+            except FileNotFoundError:
+                pass
+            self._db.execute("DELETE FROM blobs WHERE hash = ?", (digest,))
+        return sum(size for _, size in orphans)
+
+
+_default_cache: Optional[CrawlCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> CrawlCache:
+    """
+    获取进程级共享的爬取缓存，首次调用时创建
+
+    返回:
+        CrawlCache: 使用配置目录的缓存实例
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = CrawlCache()
+        return _default_cache
@@ -0,0 +1,279 @@
+"""
+网页压缩模块 - 在网页内容交给LLM之前按相关性压缩
+
+一篇长文章的完整Markdown可能有数万Token，并会随消息历史进入之后的每次LLM调用。
+该模块在Article和爬取工具的返回值之间进行压缩：
+1. 按段落和标题将正文切分为编号片段
+2. 使用本地BM25排序器为片段与查询的相关性打分
+3. 在Token预算内保留得分最高的片段，并按原文顺序输出
+4. 在结尾说明被省略的片段编号，需要时可以按编号再次获取
+
+compress_text对任意Markdown文本执行同样的压缩，用于压缩消息历史中较早的代理输出。
+网页在爬取缓存中，再次获取省略的片段不会重新请求网络。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from src.config.tools import CRAWL_CHUNK_TOKENS, CRAWL_TOKEN_BUDGET
+from src.utils.tokens import count_tokens
+
+from .article import Article, markdown_to_message
+from .ranking import BM25, tokenize
+
+# 段落之间的空行
+_BLOCK_SEPARATOR = re.compile(r"\n\s*\n")
+# Markdown标题（"# 标题"形式或markdownify生成的下划线形式）
+_HEADING_PATTERN = re.compile(r"^(#{1,6}\s.*|[^\n]+\n[=-]+)$")
+# 句末标点之后的位置
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？；;])\s*")
+
+
+@dataclass
+class Chunk:
+    """
+    正文片段：编号从1开始，heading为片段所属的最近一个标题
+    """
+
+    index: int
+    text: str
+    heading: Optional[str]
+    tokens: int
+
+
+def _split_block(block: str, max_tokens: int) -> list[str]:
+    """将超长段落按行和句子切分为不超过max_tokens的部分"""
+    pieces = [
+        sentence
+        for line in block.splitlines()
+        for sentence in _SENTENCE_END.split(line)
+        if sentence.strip()
+    ]
+    parts: list[str] = []
+    current: list[str] = []
+    size = 0
+    for piece in pieces:
+        piece_tokens = count_tokens(piece)
+        if current and size + piece_tokens > max_tokens:
+            parts.append(" ".join(current))
+            current, size = [], 0
+        current.append(piece)
+        size += piece_tokens
+    if current:
+        parts.append(" ".join(current))
+    return parts
+
+
+def chunk_markdown(
+    markdown: str, chunk_tokens: int = CRAWL_CHUNK_TOKENS
+) -> list[Chunk]:
+    """
+    将Markdown正文切分为编号片段
+
+    相邻段落合并到约chunk_tokens大小，标题总是开始一个新片段，
+    超长段落按句子切分。
+
+    参数:
+        markdown: 不含文章标题的Markdown正文
+        chunk_tokens: 每个片段的目标Token数
+
+    返回:
+        list[Chunk]: 按原文顺序排列的片段
+    """
+    chunks: list[Chunk] = []
+    current: list[str] = []
+    size = 0
+    heading: Optional[str] = None
+    current_heading: Optional[str] = None
+
+    def flush():
+        nonlocal current, size
+        if current:
+            text = "\n\n".join(current)
+            chunks.append(
+                Chunk(len(chunks) + 1, text, current_heading, count_tokens(text))
+            )
+        current, size = [], 0
+
+    for block in _BLOCK_SEPARATOR.split(markdown):
+        block = block.strip()
+        if not block:
+            continue
+        if _HEADING_PATTERN.match(block):
+            flush()
+            heading = block
+        block_tokens = count_tokens(block)
+        parts = (
+            _split_block(block, chunk_tokens)
+            if block_tokens > chunk_tokens * 2
+            else [block]
+        )
+        for part in parts:
+            part_tokens = count_tokens(part)
+            # 标题与其后的第一个段落保持在同一片段中
+            if current and size + part_tokens > chunk_tokens and current != [heading]:
+                flush()
+            if not current:
+                current_heading = heading
+            current.append(part)
+            size += part_tokens
+    flush()
+    return chunks
+
+
+def _format_ranges(indexes: Iterable[int]) -> str:
+    """将编号列表格式化为"2, 4-7"形式"""
+    ranges: list[str] = []
+    start = previous = None
+    for index in sorted(indexes):
+        if previous is not None and index == previous + 1:
+            previous = index
+            continue
+        if start is not None:
+            ranges.append(str(start) if start == previous else f"{start}-{previous}")
+        start = previous = index
+    if start is not None:
+        ranges.append(str(start) if start == previous else f"{start}-{previous}")
+    return ", ".join(ranges)
+
+
+def _select_by_relevance(chunks: list[Chunk], query: str, budget: int) -> list[Chunk]:
+    """按BM25分数从高到低选择片段，直到用完Token预算；同分时靠前的片段优先"""
+    ranker = BM25(
+        [tokenize(f"{chunk.heading or ''}\n{chunk.text}") for chunk in chunks]
+    )
+    scores = ranker.scores(tokenize(query))
+    ranked = sorted(chunks, key=lambda chunk: (-scores[chunk.index - 1], chunk.index))
+    selected: list[Chunk] = []
+    used = 0
+    for chunk in ranked:
+        if used + chunk.tokens <= budget:
+            selected.append(chunk)
+            used += chunk.tokens
+    if not selected:
+        # 预算小于任何片段时至少保留最相关的一个
+        selected.append(ranked[0])
+    return sorted(selected, key=lambda chunk: chunk.index)
+
+
+def _render(
+    article: Article, chunks: list[Chunk], selected: list[Chunk], note: str
+) -> str:
+    """按原文顺序拼接选中的片段，并标注被省略的片段"""
+    parts = [f"# {article.title}"]
+    previous = 0
+    for chunk in selected:
+        if chunk.index > previous + 1:
+            parts.append(
+                f"[... sections {_format_ranges(range(previous + 1, chunk.index))} omitted ...]"
+            )
+            # 片段所属标题不在输出中时补上标题，保留上下文
+            if chunk.heading and not chunk.text.startswith(chunk.heading):
+                parts.append(chunk.heading)
+        parts.append(chunk.text)
+        previous = chunk.index
+    if previous < len(chunks):
+        parts.append(
+            f"[... sections {_format_ranges(range(previous + 1, len(chunks) + 1))} omitted ...]"
+        )
+    parts.append(note)
+    return "\n\n".join(parts)
+
+
+def compress_text(text: str, query: str, token_budget: int) -> str:
+    """
+    将Markdown文本压缩到Token预算内，保留与查询最相关的片段
+
+    参数:
+        text: 要压缩的Markdown文本
+        query: 用于判断相关性的查询
+        token_budget: Token预算
+
+    返回:
+        str: 按原文顺序拼接的片段，省略的部分以标记代替；不超过预算时原样返回
+    """
+    if count_tokens(text) <= token_budget:
+        return text
+    chunks = chunk_markdown(text)
+    if not chunks:
+        return text
+    selected = _select_by_relevance(chunks, query, token_budget)
+    parts = []
+    previous = 0
+    for chunk in selected:
+        if chunk.index > previous + 1:
+            parts.append("[...]")
+        parts.append(chunk.text)
+        previous = chunk.index
+    if previous < len(chunks):
+        parts.append("[...]")
+    return "\n\n".join(parts)
+
+
+def compress_article(
+    article: Article,
+    query: Optional[str] = None,
+    token_budget: Optional[int] = CRAWL_TOKEN_BUDGET,
+    sections: Optional[list[int]] = None,
+) -> list[dict]:
+    """
+    将文章压缩为不超过Token预算的消息内容
+
+    正文不超过预算时原样返回；否则保留与查询最相关的片段，
+    并在结尾说明省略了哪些片段、如何获取。指定sections时只返回这些片段。
+
+    参数:
+        article: 要压缩的文章
+        query: 当前研究步骤的查询，为空时使用文章标题
+        token_budget: Token预算，为None时不压缩
+        sections: 要返回的片段编号（从1开始）
+
+    返回:
+        list[dict]: 适合LLM处理的消息内容
+    """
+    if token_budget is None and not sections:
+        return article.to_message()
+    body = article.to_markdown(including_title=False)
+    if not sections and count_tokens(body) <= token_budget:
+        return article.to_message()
+
+    chunks = chunk_markdown(body)
+    if not chunks:
+        return article.to_message()
+    budget = token_budget if token_budget is not None else sum(c.tokens for c in chunks)
+
+    if sections:
+        wanted = set(sections)
+        selected: list[Chunk] = []
+        used = 0
+        for chunk in chunks:
+            if chunk.index in wanted and used + chunk.tokens <= budget:
+                selected.append(chunk)
+                used += chunk.tokens
+        requested = "the requested sections"
+    else:
+        selected = _select_by_relevance(chunks, query or article.title or "", budget)
+        requested = (
+            f'the sections most relevant to "{query}"'
+            if query
+            else "the most relevant sections"
+        )
+
+    kept = {chunk.index for chunk in selected}
+    omitted = [chunk.index for chunk in chunks if chunk.index not in kept]
+    note = (
+        f"[Page compressed: showing {requested} ({len(selected)} of {len(chunks)},"
+        f" ~{sum(c.tokens for c in selected)} of {sum(c.tokens for c in chunks)} tokens)."
+    )
+    if omitted:
+        note += (
+            f" Omitted sections: {_format_ranges(omitted)}. To read them, call crawl_tool"
+            " again with this url and `sections`, or with a different `query`."
+        )
+    note += "]"
+    content = markdown_to_message(
+        _render(article, chunks, selected, note), article.url, article.image_policy
+    )
+    # 去除图片之间的空文本片段
+    return [part for part in content if part["type"] != "text" or part["text"]]
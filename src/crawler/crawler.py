@@ -1,21 +1,149 @@
+import asyncio
+import logging
+import queue
+import sqlite3
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+from src.config.tools import (
+    CRAWLER_MAX_CONCURRENCY,
+    CRAWLER_HOST_RATE,
+    CRAWLER_HOST_BURST,
+    JINA_READER_URL,
+    JINA_RATE,
+    JINA_BURST,
+    CRAWL_CACHE_ENABLED,
+    CRAWL_CACHE_REVALIDATE,
+    LOCAL_INDEX_ENABLED,
+)
 
 from .article import Article
-from .jina_client import JinaClient
-from .readability_extractor import ReadabilityExtractor
+from .cache import CacheEntry, CrawlCache, get_default_cache
+from .extraction import ExtractionExecutor, get_extraction_executor
+from .jina_client import (
+    JinaClient,
+    aclose_async_client,
+    get_async_client,
+    get_sync_client,
+)
+from .local_index import LocalIndex, get_default_index
+from .rate_limiter import HostRateLimiter
+
+logger = logging.getLogger(__name__)
+
+# 进程级共享的主机限流器：Jina与各源站分别使用独立的令牌桶
+default_rate_limiter = HostRateLimiter(
+    rate=CRAWLER_HOST_RATE,
+    burst=CRAWLER_HOST_BURST,
+    overrides={urlparse(JINA_READER_URL).hostname: (JINA_RATE, JINA_BURST)},
+)
+
+# 同步爬取时用于并行探测源站验证信息的线程池
+_probe_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="crawl-probe")
+
+Validators = tuple[Optional[str], Optional[str]]
+
+# 各源站（host:port）的HEAD响应是否带有ETag/Last-Modified；不带的源站无法条件请求，
+# 之后爬取该站点的网页时不再探测，避免为缓存额外增加源站请求
+_origin_has_validators: dict[str, bool] = {}
+_MAX_TRACKED_ORIGINS = 4096
+
+
+def _origin(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def _should_probe(url: str) -> bool:
+    """源站是否可能返回验证信息（未探测过的源站视为可能）"""
+    return _origin_has_validators.get(_origin(url), True)
+
+
+def _remember_validators(url: str, validators: Validators) -> None:
+    """记录源站是否返回了验证信息"""
+    if len(_origin_has_validators) >= _MAX_TRACKED_ORIGINS:
+        _origin_has_validators.clear()
+    _origin_has_validators[_origin(url)] = any(validators)
+
+
+def _validators(response: httpx.Response) -> Validators:
+    """从源站响应中读取ETag和Last-Modified"""
+    return response.headers.get("etag"), response.headers.get("last-modified")
+
+
+def _conditional_headers(entry: CacheEntry) -> dict:
+    """根据缓存条目构建条件请求头"""
+    headers = {}
+    if entry.etag:
+        headers["If-None-Match"] = entry.etag
+    if entry.last_modified:
+        headers["If-Modified-Since"] = entry.last_modified
+    return headers
+
+
+@dataclass
+class CrawlResult:
+    """
+    批量爬取的单条结果：成功时包含文章，失败时包含异常
+    """
+
+    url: str
+    article: Optional[Article] = None
+    error: Optional[BaseException] = None
 
 
 class Crawler:
     """
     爬虫类：用于从URL爬取网页内容并提取文章
     """
+
+    def __init__(
+        self,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        cache: Optional[CrawlCache] = None,
+        use_cache: bool = CRAWL_CACHE_ENABLED,
+        extraction_executor: Optional[ExtractionExecutor] = None,
+        index: Optional[LocalIndex] = None,
+        use_index: bool = LOCAL_INDEX_ENABLED,
+    ):
+        """
+        初始化爬虫
+
+        参数:
+            rate_limiter: 主机限流器，默认使用进程级共享的限流器
+            cache: 爬取缓存，默认使用进程级共享的磁盘缓存
+            use_cache: 是否使用爬取缓存
+            extraction_executor: 正文提取执行器，默认使用进程级共享的进程池
+            index: 本地搜索索引，默认使用进程级共享的索引
+            use_index: 是否将爬取的网页加入本地搜索索引
+        """
+        self.rate_limiter = rate_limiter or default_rate_limiter
+        self.extraction_executor = extraction_executor or get_extraction_executor()
+        self.cache = None
+        if use_cache:
+            try:
+                self.cache = cache or get_default_cache()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Crawl cache is unavailable, crawling without it: {e}")
+        self.index = None
+        if use_index:
+            try:
+                self.index = index if index is not None else get_default_index()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Local index is unavailable, not indexing crawls: {e}")
+
     def crawl(self, url: str) -> Article:
         """
         爬取指定URL的内容并提取为结构化文章
-        
+
         参数:
             url: 要爬取的网页URL
-            
+
         返回:
             Article: 提取的文章对象
         """
@@ -29,7 +157,7 @@ class Crawler:
         #
         # Instead of using Jina's own markdown converter, we'll use
         # our own solution to get better readability results.
-        
+
         # 为了帮助LLM更好地理解内容，我们从HTML中提取干净的
         # 文章，将其转换为markdown格式，并将其分割为文本和图片块，
         # 形成单一统一的LLM消息。
@@ -38,14 +166,238 @@ class Crawler:
         #
         # 我们不使用Jina自带的markdown转换器，而是使用
         # 自己的解决方案以获得更好的可读性结果。
-        
+
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and (entry.is_fresh or self._revalidate(url, entry)):
+            entry.article.url = url
+            return entry.article
+
+        # 在请求Jina的同时，向源站探测用于之后重新验证的ETag/Last-Modified
+        probe = None
+        if self.cache and CRAWL_CACHE_REVALIDATE and _should_probe(url):
+            probe = _probe_executor.submit(self._probe_validators, url)
+
+        self.rate_limiter.acquire_sync(JINA_READER_URL, url)
         jina_client = JinaClient()
         html = jina_client.crawl(url, return_format="html")
-        extractor = ReadabilityExtractor()
-        article = extractor.extract_article(html)
+        article = self.extraction_executor.extract(html)
+        article.url = url
+        if self.cache:
+            self.cache.put(url, html, article, *(probe.result() if probe else ()))
+        self._add_to_index(url, article)
+        return article
+
+    async def acrawl(self, url: str) -> Article:
+        """
+        异步爬取指定URL的内容并提取为结构化文章
+
+        网络请求通过共享连接池异步发出，可读性提取属于CPU密集型操作，
+        交给正文提取执行器的进程池处理，避免阻塞事件循环。
+
+        参数:
+            url: 要爬取的网页URL
+
+        返回:
+            Article: 提取的文章对象
+        """
+        entry = self.cache.get(url) if self.cache else None
+        if entry is not None and (
+            entry.is_fresh or await self._arevalidate(url, entry)
+        ):
+            entry.article.url = url
+            return entry.article
+
+        probe = None
+        if self.cache and CRAWL_CACHE_REVALIDATE and _should_probe(url):
+            probe = asyncio.create_task(self._aprobe_validators(url))
+
+        try:
+            await self.rate_limiter.acquire(JINA_READER_URL, url)
+            jina_client = JinaClient()
+            html = await jina_client.acrawl(url, return_format="html")
+            article = await self.extraction_executor.aextract(html)
+        except BaseException:
+            if probe:
+                probe.cancel()
+            raise
         article.url = url
+        if self.cache:
+            self.cache.put(url, html, article, *(await probe if probe else ()))
+        # 分词和写入索引不放在事件循环线程中执行
+        await asyncio.to_thread(self._add_to_index, url, article)
         return article
 
+    def _add_to_index(self, url: str, article: Article) -> None:
+        """将新爬取的文章加入本地搜索索引，失败时只记录日志"""
+        if self.index is None:
+            return
+        try:
+            self.index.add(url, article)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to index {url}: {e}")
+
+    def _revalidate(self, url: str, entry: CacheEntry) -> bool:
+        """
+        用条件请求确认过期的缓存内容在源站是否仍然有效
+
+        参数:
+            url: 网页URL
+            entry: 过期的缓存条目
+
+        返回:
+            bool: 源站返回304时为True，此时缓存有效期被延长
+        """
+        if not (CRAWL_CACHE_REVALIDATE and entry.can_revalidate):
+            return False
+        # 条件请求同样是对源站的请求，经过源站的限流
+        self.rate_limiter.acquire_sync(url)
+        try:
+            with get_sync_client().stream(
+                "GET", url, headers=_conditional_headers(entry)
+            ) as response:
+                not_modified = response.status_code == 304
+        except Exception:
+            return False
+        if not_modified:
+            self.cache.refresh(url)
+        return not_modified
+
+    async def _arevalidate(self, url: str, entry: CacheEntry) -> bool:
+        """
+        _revalidate的异步版本
+        """
+        if not (CRAWL_CACHE_REVALIDATE and entry.can_revalidate):
+            return False
+        await self.rate_limiter.acquire(url)
+        try:
+            async with get_async_client().stream(
+                "GET", url, headers=_conditional_headers(entry)
+            ) as response:
+                not_modified = response.status_code == 304
+        except Exception:
+            return False
+        if not_modified:
+            self.cache.refresh(url)
+        return not_modified
+
+    def _probe_validators(self, url: str) -> Validators:
+        """
+        向源站发送HEAD请求，获取ETag和Last-Modified
+
+        探测请求经过源站的限流；探测失败不影响爬取，只是之后无法进行条件请求。
+        源站不返回验证信息时记录下来，之后不再探测该源站。
+
+        参数:
+            url: 网页URL
+
+        返回:
+            Validators: (ETag, Last-Modified)，缺失时为None
+        """
+        self.rate_limiter.acquire_sync(url)
+        try:
+            response = get_sync_client().head(url, follow_redirects=True)
+        except Exception:
+            return None, None
+        validators = _validators(response)
+        _remember_validators(url, validators)
+        return validators
+
+    async def _aprobe_validators(self, url: str) -> Validators:
+        """
+        _probe_validators的异步版本
+        """
+        await self.rate_limiter.acquire(url)
+        try:
+            response = await get_async_client().head(url, follow_redirects=True)
+        except Exception:
+            return None, None
+        validators = _validators(response)
+        _remember_validators(url, validators)
+        return validators
+
+    async def acrawl_many(
+        self, urls: list[str], max_concurrency: Optional[int] = None
+    ) -> AsyncIterator[CrawlResult]:
+        """
+        并发爬取多个URL，按完成顺序逐个返回结果
+
+        全局并发数受max_concurrency限制，同时每个请求都会经过
+        主机限流器，避免超出Jina和源站的请求频率限制。
+        单个URL失败不会影响其他URL，失败信息记录在结果中。
+
+        参数:
+            urls: 要爬取的URL列表，重复的URL只爬取一次
+            max_concurrency: 最大并发数，默认使用CRAWLER_MAX_CONCURRENCY
+
+        返回:
+            AsyncIterator[CrawlResult]: 按完成顺序产出的爬取结果
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or CRAWLER_MAX_CONCURRENCY)
+
+        async def crawl_one(url: str) -> CrawlResult:
+            async with semaphore:
+                try:
+                    return CrawlResult(url=url, article=await self.acrawl(url))
+                except Exception as e:
+                    return CrawlResult(url=url, error=e)
+
+        tasks = [asyncio.create_task(crawl_one(url)) for url in dict.fromkeys(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # 调用方提前停止迭代时，取消尚未完成的爬取任务
+            for task in tasks:
+                task.cancel()
+
+    def crawl_many(
+        self, urls: list[str], max_concurrency: Optional[int] = None
+    ) -> Iterator[CrawlResult]:
+        """
+        acrawl_many的同步版本，按完成顺序逐个返回结果
+
+        在后台线程的独立事件循环中执行并发爬取，
+        结果一经完成即通过队列交给调用方。
+
+        参数:
+            urls: 要爬取的URL列表
+            max_concurrency: 最大并发数，默认使用CRAWLER_MAX_CONCURRENCY
+
+        返回:
+            Iterator[CrawlResult]: 按完成顺序产出的爬取结果
+        """
+        results: queue.Queue = queue.Queue()
+        finished = object()
+
+        async def produce():
+            try:
+                async for result in self.acrawl_many(urls, max_concurrency):
+                    results.put(result)
+            finally:
+                await aclose_async_client()
+                results.put(finished)
+
+        loop = asyncio.new_event_loop()
+        task = loop.create_task(produce())
+
+        def run():
+            try:
+                loop.run_until_complete(task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        try:
+            while (result := results.get()) is not finished:
+                yield result
+        finally:
+            if not task.done():
+                loop.call_soon_threadsafe(task.cancel)
+            thread.join()
+
 
 if __name__ == "__main__":
     """主函数：用于直接运行模块进行测试"""
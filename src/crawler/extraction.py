@@ -0,0 +1,243 @@
+"""
+正文提取执行器模块 - 在进程池中执行CPU密集型的可读性提取
+
+readability提取需要完整解析和遍历DOM，耗时与网页复杂度相关，
+如果在调用工具的线程中直接执行，会与服务SSE流的事件循环争抢CPU。
+该模块提供ExtractionExecutor：
+1. 维护预热好的进程池，使大网页可以在所有CPU核心上并行解析
+2. 超过大小上限的网页直接使用轻量提取器
+3. 进程池预热完成后才分配工作进程，只在有空闲工作进程时提交任务，
+   超时从工作进程开始提取时计算，等待空闲进程或提取超时后退回轻量提取器
+4. 提取超时后终止进程池的工作进程并重建进程池，卡住的进程不会一直占用名额
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from src.config.tools import (
+    EXTRACTION_USE_PROCESS_POOL,
+    EXTRACTION_WORKERS,
+    EXTRACTION_MAX_HTML_BYTES,
+    EXTRACTION_TIMEOUT,
+)
+
+from .article import Article
+from .readability_extractor import FallbackExtractor, ReadabilityExtractor
+
+logger = logging.getLogger(__name__)
+
+
+def _extract_in_worker(html: str) -> tuple[Optional[str], Optional[str]]:
+    """
+    在工作进程中执行可读性提取
+
+    只返回标题和正文，避免在进程间传递完整的Article对象。
+    """
+    article = ReadabilityExtractor().extract_article(html)
+    return article.title, article.html_content
+
+
+def _warm_up_worker() -> None:
+    """在工作进程中预先导入提取依赖"""
+    import readabilipy  # noqa: F401
+
+
+class ExtractionExecutor:
+    """
+    正文提取执行器：在进程池中执行可读性提取，超时或过大时退回轻量提取器
+
+    进程池创建后先等待所有预热任务完成，之后提交的任务数不超过工作进程数，任务提交后
+    立即开始执行，因此超时不包含进程启动和排队时间；等待空闲工作进程超过timeout时
+    同样退回轻量提取器，排队的调用方数量因此有界。
+
+    注意：ProcessPoolExecutor无法只终止执行某个任务的进程，提取超时时会终止整个进程池
+    并在下次使用时重建，同时在执行的其他提取退回轻量提取器。
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = EXTRACTION_WORKERS,
+        max_html_bytes: int = EXTRACTION_MAX_HTML_BYTES,
+        timeout: float = EXTRACTION_TIMEOUT,
+        use_process_pool: bool = EXTRACTION_USE_PROCESS_POOL,
+    ):
+        """
+        初始化正文提取执行器
+
+        参数:
+            max_workers: 进程池大小，None表示使用CPU核数
+            max_html_bytes: 使用可读性提取的最大网页大小
+            timeout: 单个网页可读性提取的超时时间（秒）
+            use_process_pool: 是否使用进程池，为False时在当前进程中提取
+        """
+        self.max_workers = max_workers or multiprocessing.cpu_count()
+        self.max_html_bytes = max_html_bytes
+        self.timeout = timeout
+        self.use_process_pool = use_process_pool
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        # 空闲工作进程名额，任务完成（包括超时后才完成）时归还
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        """获取进程池，首次使用或进程池重置后重新创建，并等待预热完成"""
+        with self._lock:
+            if self._pool is None:
+                # 使用spawn启动方式，避免在多线程进程中fork带来的死锁风险
+                pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+                # 预热完成前不提交提取任务，启动进程和导入依赖的时间不计入提取超时
+                wait([pool.submit(_warm_up_worker) for _ in range(self.max_workers)])
+                self._pool = pool
+            return self._pool
+
+    def _reset_pool(self, pool: ProcessPoolExecutor, terminate: bool = False) -> None:
+        """
+        丢弃进程池，下次使用时重新创建
+
+        参数:
+            pool: 要丢弃的进程池
+            terminate: 是否终止仍在执行任务的工作进程（提取超时时）
+        """
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        # ProcessPoolExecutor没有公开终止工作进程的接口，直接终止其进程；
+        # 被终止的任务以BrokenProcessPool结束，并归还空闲进程名额
+        processes = list((pool._processes or {}).values()) if terminate else []
+        pool.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    def warm_up(self) -> None:
+        """提前创建并预热进程池，避免首个网页承担进程启动开销"""
+        if self.use_process_pool:
+            self._get_pool()
+
+    def _submit(self, pool: ProcessPoolExecutor, html: str) -> Future:
+        """向进程池提交提取任务，调用方需已获得空闲进程名额"""
+        try:
+            future = pool.submit(_extract_in_worker, html)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    async def _aacquire_slot(self) -> bool:
+        """在线程中等待空闲进程名额，调用方被取消时归还随后获得的名额"""
+        acquiring = asyncio.ensure_future(
+            asyncio.to_thread(self._slots.acquire, True, self.timeout)
+        )
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+
+            def release_if_acquired(future: asyncio.Future) -> None:
+                if not future.cancelled() and future.result():
+                    self._slots.release()
+
+            acquiring.add_done_callback(release_if_acquired)
+            raise
+
+    def _fallback(self, html: str, reason: str) -> Article:
+        logger.warning(f"Using fallback extractor: {reason}")
+        return FallbackExtractor().extract_article(html)
+
+    def extract(self, html: str) -> Article:
+        """
+        从HTML内容中提取文章
+
+        参数:
+            html: HTML字符串内容
+
+        返回:
+            Article: 提取的文章对象
+        """
+        if len(html.encode("utf-8")) > self.max_html_bytes:
+            return self._fallback(html, "html exceeds the size limit")
+        if not self.use_process_pool:
+            return ReadabilityExtractor().extract_article(html)
+
+        pool = self._get_pool()
+        if not self._slots.acquire(timeout=self.timeout):
+            return self._fallback(html, "no idle extraction worker")
+        try:
+            title, content = self._submit(pool, html).result(timeout=self.timeout)
+        except TimeoutError:
+            self._reset_pool(pool, terminate=True)
+            return self._fallback(html, "readability extraction timed out")
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            return self._fallback(html, "extraction worker crashed")
+        return Article(title=title, html_content=content)
+
+    async def aextract(self, html: str) -> Article:
+        """
+        extract的异步版本，等待提取结果时不阻塞事件循环
+
+        参数:
+            html: HTML字符串内容
+
+        返回:
+            Article: 提取的文章对象
+        """
+        if len(html.encode("utf-8")) > self.max_html_bytes:
+            return await asyncio.to_thread(
+                self._fallback, html, "html exceeds the size limit"
+            )
+        if not self.use_process_pool:
+            return await asyncio.to_thread(ReadabilityExtractor().extract_article, html)
+
+        pool = await asyncio.to_thread(self._get_pool)
+        if not await self._aacquire_slot():
+            return await asyncio.to_thread(
+                self._fallback, html, "no idle extraction worker"
+            )
+        try:
+            title, content = await asyncio.wait_for(
+                asyncio.wrap_future(self._submit(pool, html)), timeout=self.timeout
+            )
+        except asyncio.TimeoutError:
+            self._reset_pool(pool, terminate=True)
+            return await asyncio.to_thread(
+                self._fallback, html, "readability extraction timed out"
+            )
+        except BrokenProcessPool:
+            self._reset_pool(pool)
+            return await asyncio.to_thread(
+                self._fallback, html, "extraction worker crashed"
+            )
+        return Article(title=title, html_content=content)
+
+    def shutdown(self) -> None:
+        """关闭进程池"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+_default_executor: Optional[ExtractionExecutor] = None
+_default_executor_lock = threading.Lock()
+
+
+def get_extraction_executor() -> ExtractionExecutor:
+    """
+    获取进程级共享的正文提取执行器
+
+    返回:
+        ExtractionExecutor: 使用配置参数的执行器
+    """
+    global _default_executor
+    with _default_executor_lock:
+        if _default_executor is None:
+            _default_executor = ExtractionExecutor()
+        return _default_executor
@@ -1,25 +1,110 @@
+import asyncio
 import logging
 import os
+import threading
+import weakref
 
-import requests
+import httpx
+
+from src.config.tools import (
+    JINA_READER_URL,
+    JINA_HTTP2,
+    JINA_MAX_CONNECTIONS,
+    JINA_MAX_KEEPALIVE_CONNECTIONS,
+    JINA_KEEPALIVE_EXPIRY,
+    JINA_CONNECT_TIMEOUT,
+    JINA_READ_TIMEOUT,
+)
 
 logger = logging.getLogger(__name__)
 
+# 进程级共享的HTTP客户端，复用连接池以避免每次爬取都重新握手
+# 异步客户端绑定在创建它的事件循环上，因此按事件循环分别缓存
+_client_lock = threading.Lock()
+_sync_client: httpx.Client | None = None
+_async_clients: (
+    "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]"
+) = weakref.WeakKeyDictionary()
+
+
+def _client_options() -> dict:
+    """
+    构建共享客户端的连接池、超时和协议配置
+
+    返回:
+        dict: 传给httpx客户端构造函数的参数
+    """
+    return {
+        "http2": JINA_HTTP2,
+        "limits": httpx.Limits(
+            max_connections=JINA_MAX_CONNECTIONS,
+            max_keepalive_connections=JINA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=JINA_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(
+            JINA_READ_TIMEOUT,
+            connect=JINA_CONNECT_TIMEOUT,
+        ),
+    }
+
+
+def get_sync_client() -> httpx.Client:
+    """
+    获取进程级共享的同步HTTP客户端
+
+    返回:
+        httpx.Client: 带连接池的同步客户端
+    """
+    global _sync_client
+    with _client_lock:
+        if _sync_client is None or _sync_client.is_closed:
+            _sync_client = httpx.Client(**_client_options())
+        return _sync_client
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    获取当前事件循环共享的异步HTTP客户端
+
+    返回:
+        httpx.AsyncClient: 带连接池的异步客户端
+    """
+    loop = asyncio.get_running_loop()
+    with _client_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**_client_options())
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_async_client() -> None:
+    """
+    关闭当前事件循环的共享异步客户端
+
+    适用于临时事件循环结束前或服务关闭时释放连接。
+    """
+    with _client_lock:
+        client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
 
 class JinaClient:
     """
     Jina API客户端：用于通过Jina AI的服务抓取网页内容
     """
-    def crawl(self, url: str, return_format: str = "html") -> str:
+
+    def _build_request(self, url: str, return_format: str) -> dict:
         """
-        抓取指定URL的网页内容
-        
+        构建Jina Reader请求的参数
+
         参数:
             url: 要抓取的网页URL
-            return_format: 返回格式，默认为"html"
-            
+            return_format: 返回格式
+
         返回:
-            str: 网页内容，格式由return_format参数指定
+            dict: 请求的headers和json数据
         """
         headers = {
             "Content-Type": "application/json",
@@ -32,6 +117,42 @@ class JinaClient:
                 "Jina API key is not set. Provide your own key to access a higher rate limit. See https://jina.ai/reader for more information."
                 # Jina API密钥未设置。提供自己的密钥可以获得更高的请求限制。更多信息请访问https://jina.ai/reader
             )
-        data = {"url": url}
-        response = requests.post("https://r.jina.ai/", headers=headers, json=data)
+        return {"headers": headers, "json": {"url": url}}
+
+    async def acrawl(self, url: str, return_format: str = "html") -> str:
+        """
+        异步抓取指定URL的网页内容
+
+        使用进程级共享的连接池，复用与Jina之间的TLS连接。
+
+        参数:
+            url: 要抓取的网页URL
+            return_format: 返回格式，默认为"html"
+
+        返回:
+            str: 网页内容，格式由return_format参数指定
+        """
+        client = get_async_client()
+        response = await client.post(
+            JINA_READER_URL, **self._build_request(url, return_format)
+        )
+        response.raise_for_status()
+        return response.text
+
+    def crawl(self, url: str, return_format: str = "html") -> str:
+        """
+        抓取指定URL的网页内容
+
+        参数:
+            url: 要抓取的网页URL
+            return_format: 返回格式，默认为"html"
+
+        返回:
+            str: 网页内容，格式由return_format参数指定
+        """
+        client = get_sync_client()
+        response = client.post(
+            JINA_READER_URL, **self._build_request(url, return_format)
+        )
+        response.raise_for_status()
         return response.text
@@ -0,0 +1,221 @@
+"""
+本地搜索索引模块 - 为爬取过的网页建立可离线查询的全文索引
+
+该模块实现了持久化在SQLite中的增量BM25倒排索引：
+1. 爬虫每成功爬取一个网页就将其加入索引，重复爬取时更新原有文档
+2. 查询时只读取查询词的倒排列表，按BM25为文档打分
+3. 返回与Tavily搜索结果相同格式的结果（标题、URL、摘要、分数）
+
+研究重复主题时可以直接从已爬取的语料中得到结果，也可以作为完全离线的搜索后端，
+用于测试和基准评测。
+"""
+
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from typing import Optional
+
+from src.config.tools import LOCAL_INDEX_PATH, LOCAL_INDEX_MAX_CHARS
+
+from .article import Article
+from .ranking import idf, tokenize
+from .urls import normalize_url
+
+# BM25参数
+_K1 = 1.5
+_B = 0.75
+# 原始BM25分数归一化到0-1时的半饱和点：分数等于该值时归一化结果为0.5
+_SCORE_HALF_POINT = 5.0
+# 摘要的最大字符数
+_SNIPPET_CHARS = 500
+
+_PARAGRAPH_SEPARATOR = re.compile(r"\n\s*\n")
+
+
+class LocalIndex:
+    """
+    基于SQLite的增量BM25倒排索引
+    """
+
+    def __init__(
+        self, path: str = LOCAL_INDEX_PATH, max_chars: int = LOCAL_INDEX_MAX_CHARS
+    ):
+        """
+        打开或创建本地索引
+
+        参数:
+            path: 索引数据库路径
+            max_chars: 每个网页最多索引和保存的字符数
+        """
+        self.path = path
+        self.max_chars = max_chars
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                id INTEGER PRIMARY KEY,
+                key TEXT NOT NULL UNIQUE,
+                url TEXT NOT NULL,
+                title TEXT,
+                content TEXT NOT NULL,
+                length INTEGER NOT NULL,
+                indexed_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc ON postings (doc_id);
+            """
+        )
+
+    def add(self, url: str, article: Article) -> None:
+        """
+        将文章加入索引，已索引的URL会被替换为新内容
+
+        参数:
+            url: 网页URL
+            article: 提取后的文章
+        """
+        content = article.to_markdown(including_title=False)[: self.max_chars]
+        title = article.title or ""
+        # 标题中的词对相关性更重要，计入两次
+        terms = Counter(tokenize(title) * 2 + tokenize(content))
+        key = normalize_url(url)
+        with self._lock:
+            self._delete(key)
+            cursor = self._db.execute(
+                "INSERT INTO docs (key, url, title, content, length, indexed_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, url, title, content, sum(terms.values()), time.time()),
+            )
+            self._db.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?)",
+                [(term, cursor.lastrowid, tf) for term, tf in terms.items()],
+            )
+            self._db.commit()
+
+    def remove(self, url: str) -> None:
+        """
+        从索引中删除URL对应的文档
+
+        参数:
+            url: 网页URL
+        """
+        with self._lock:
+            self._delete(normalize_url(url))
+            self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM docs").fetchone()[0]
+
+    def search(self, query: str, max_results: int = 5) -> list[dict]:
+        """
+        按BM25查询索引
+
+        参数:
+            query: 查询文本
+            max_results: 最多返回的结果数量
+
+        返回:
+            list[dict]: 与Tavily格式一致的结果，包含title、url、content和score，
+                score为归一化到0-1的相关性分数
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        placeholders = ", ".join("?" * len(terms))
+        with self._lock:
+            doc_count, total_length = self._db.execute(
+                "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs"
+            ).fetchone()
+            if doc_count == 0:
+                return []
+            rows = self._db.execute(
+                f"SELECT p.term, p.doc_id, p.tf, d.length FROM postings p"
+                f" JOIN docs d ON d.id = p.doc_id WHERE p.term IN ({placeholders})",
+                terms,
+            ).fetchall()
+        avg_length = total_length / doc_count or 1
+        doc_freqs = Counter(term for term, *_ in rows)
+        scores: Counter = Counter()
+        for term, doc_id, tf, length in rows:
+            norm = _K1 * (1 - _B + _B * length / avg_length)
+            scores[doc_id] += (
+                idf(doc_count, doc_freqs[term]) * tf * (_K1 + 1) / (tf + norm)
+            )
+
+        top = scores.most_common(max_results)
+        if not top:
+            return []
+        with self._lock:
+            docs = {
+                doc_id: (url, title, content)
+                for doc_id, url, title, content in self._db.execute(
+                    "SELECT id, url, title, content FROM docs WHERE id IN"
+                    f" ({', '.join('?' * len(top))})",
+                    [doc_id for doc_id, _ in top],
+                )
+            }
+        results = []
+        for doc_id, score in top:
+            if doc_id not in docs:
+                # 查询期间文档被其他线程替换
+                continue
+            url, title, content = docs[doc_id]
+            results.append(
+                {
+                    "title": title,
+                    "url": url,
+                    "content": _snippet(content, set(terms)),
+                    "score": round(score / (score + _SCORE_HALF_POINT), 4),
+                }
+            )
+        return results
+
+    def _delete(self, key: str) -> None:
+        """删除文档及其倒排记录，调用方需持有锁"""
+        row = self._db.execute("SELECT id FROM docs WHERE key = ?", (key,)).fetchone()
+        if row is not None:
+            self._db.execute("DELETE FROM postings WHERE doc_id = ?", row)
+            self._db.execute("DELETE FROM docs WHERE id = ?", row)
+
+
+def _snippet(content: str, terms: set[str]) -> str:
+    """选出包含查询词最多的段落作为摘要"""
+    paragraphs = [p.strip() for p in _PARAGRAPH_SEPARATOR.split(content) if p.strip()]
+    if not paragraphs:
+        return ""
+    best = max(
+        paragraphs,
+        key=lambda paragraph: sum(1 for token in tokenize(paragraph) if token in terms),
+    )
+    return best[:_SNIPPET_CHARS]
+
+
+_default_index: Optional[LocalIndex] = None
+_default_index_lock = threading.Lock()
+
+
+def get_default_index() -> LocalIndex:
+    """
+    获取进程级共享的本地搜索索引，首次调用时创建
+
+    返回:
+        LocalIndex: 使用配置路径的索引实例
+    """
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None:
+            _default_index = LocalIndex()
+        return _default_index
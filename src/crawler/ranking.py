@@ -0,0 +1,111 @@
+"""
+词法排序模块 - 在本地计算文本与查询的相关性
+
+该模块实现了不依赖网络的BM25排序：
+1. tokenize将文本切分为词项，英文按单词、中日韩文字按相邻双字切分
+2. BM25根据词频、逆文档频率和文档长度为一组文档打分
+
+用于网页压缩时挑选与研究步骤最相关的片段。
+"""
+
+import math
+import re
+from collections import Counter
+
+# 英文单词/数字，或连续的中日韩字符
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+|[぀-ヿ㐀-䶿一-鿿가-힯]+")
+_CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+# 常见英文停用词，对相关性没有帮助
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have how in is it its of on or"
+    " that the this to was were what when where which who why will with".split()
+)
+
+
+def idf(doc_count: int, doc_freq: int) -> float:
+    """
+    计算BM25的逆文档频率（加1平滑，保证非负）
+
+    参数:
+        doc_count: 文档总数
+        doc_freq: 包含该词项的文档数
+
+    返回:
+        float: 逆文档频率
+    """
+    return math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    将文本切分为用于排序的词项
+
+    英文转小写并去除停用词；中日韩文字没有空格分词，
+    按相邻两个字符组成一个词项（单字时保留单字）。
+
+    参数:
+        text: 要切分的文本
+
+    返回:
+        list[str]: 词项列表
+    """
+    tokens: list[str] = []
+    for match in _TOKEN_PATTERN.finditer(text.lower()):
+        token = match.group()
+        if _CJK_PATTERN.match(token):
+            if len(token) == 1:
+                tokens.append(token)
+            else:
+                tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+        elif token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+class BM25:
+    """
+    Okapi BM25排序器：对一组固定的文档计算与查询的相关性分数
+    """
+
+    def __init__(self, documents: list[list[str]], k1: float = 1.5, b: float = 0.75):
+        """
+        初始化排序器并统计文档词频
+
+        参数:
+            documents: 已切分为词项的文档列表
+            k1: 词频饱和参数
+            b: 文档长度归一化参数
+        """
+        self.k1 = k1
+        self.b = b
+        self.term_freqs = [Counter(document) for document in documents]
+        self.lengths = [len(document) for document in documents]
+        self.avg_length = sum(self.lengths) / len(documents) if documents else 0.0
+        doc_freqs: Counter = Counter()
+        for freqs in self.term_freqs:
+            doc_freqs.update(freqs.keys())
+        total = len(documents)
+        self.idf = {term: idf(total, freq) for term, freq in doc_freqs.items()}
+
+    def scores(self, query: list[str]) -> list[float]:
+        """
+        计算每个文档与查询的BM25分数
+
+        参数:
+            query: 已切分为词项的查询
+
+        返回:
+            list[float]: 与文档顺序对应的分数
+        """
+        terms = [term for term in dict.fromkeys(query) if term in self.idf]
+        results = []
+        for freqs, length in zip(self.term_freqs, self.lengths):
+            norm = self.k1 * (1 - self.b + self.b * length / (self.avg_length or 1))
+            score = 0.0
+            for term in terms:
+                freq = freqs.get(term)
+                if freq:
+                    score += self.idf[term] * freq * (self.k1 + 1) / (freq + norm)
+            results.append(score)
+        return results
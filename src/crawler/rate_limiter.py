@@ -0,0 +1,124 @@
+"""
+限流模块 - 为爬虫提供按主机划分的令牌桶限流
+
+该模块实现了爬虫使用的请求限流功能：
+1. TokenBucket类：经典令牌桶，按预约方式计算等待时间
+2. HostRateLimiter类：为每个主机维护独立的令牌桶
+
+令牌桶采用"预约"方式实现：获取令牌时立即计算需要等待的时间，
+状态只在线程锁内修改，等待在锁外进行，因此可以在多个线程和
+多个事件循环之间安全共享。
+"""
+
+import asyncio
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """
+    令牌桶：以固定速率补充令牌，允许一定程度的突发请求
+    """
+
+    def __init__(self, rate: float, burst: int):
+        """
+        初始化令牌桶
+
+        参数:
+            rate: 每秒补充的令牌数
+            burst: 桶容量，即允许的最大突发请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        预约一个令牌
+
+        令牌数允许变为负数，表示已被后续请求预约，
+        调用方需要等待返回的时长后再发出请求。
+
+        返回:
+            float: 需要等待的秒数，0表示可以立即执行
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated_at) * self.rate
+            )
+            self._updated_at = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class HostRateLimiter:
+    """
+    主机限流器：为每个主机维护独立的令牌桶
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        overrides: dict[str, tuple[float, int]] | None = None,
+    ):
+        """
+        初始化主机限流器
+
+        参数:
+            rate: 默认每个主机每秒允许的请求数
+            burst: 默认每个主机允许的突发请求数
+            overrides: 特定主机的(rate, burst)配置
+        """
+        self.rate = rate
+        self.burst = burst
+        self.overrides = overrides or {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url: str) -> TokenBucket:
+        """
+        获取URL所属主机的令牌桶
+
+        参数:
+            url: 请求的URL
+
+        返回:
+            TokenBucket: 该主机对应的令牌桶
+        """
+        host = (urlparse(url).hostname or "").lower()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                rate, burst = self.overrides.get(host, (self.rate, self.burst))
+                bucket = TokenBucket(rate, burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    async def acquire(self, *urls: str) -> None:
+        """
+        异步等待，直到所有给定URL所属主机都允许发出请求
+
+        参数:
+            urls: 本次请求涉及的URL（例如Jina地址和源站地址）
+        """
+        delay = max((self.bucket_for(url).reserve() for url in urls), default=0.0)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def acquire_sync(self, *urls: str) -> None:
+        """
+        阻塞等待，直到所有给定URL所属主机都允许发出请求
+
+        参数:
+            urls: 本次请求涉及的URL（例如Jina地址和源站地址）
+        """
+        delay = max((self.bucket_for(url).reserve() for url in urls), default=0.0)
+        if delay > 0:
+            time.sleep(delay)
@@ -1,3 +1,4 @@
+from bs4 import BeautifulSoup
 from readabilipy import simple_json_from_html_string
 
 from .article import Article
@@ -7,13 +8,14 @@ class ReadabilityExtractor:
     """
     可读性提取器：使用readabilipy库从HTML内容中提取干净的文章内容
     """
+
     def extract_article(self, html: str) -> Article:
         """
         从HTML内容中提取文章
-        
+
         参数:
             html: HTML字符串内容
-            
+
         返回:
             Article: 提取的文章对象
         """
@@ -22,3 +24,43 @@ class ReadabilityExtractor:
             title=article.get("title"),
             html_content=article.get("content"),
         )
+
+
+class FallbackExtractor:
+    """
+    轻量提取器：当可读性提取超时或网页过大时使用的纯Python实现
+
+    仅移除脚本、导航等样板元素，并取<article>、<main>或<body>作为正文，
+    提取质量不如readability，但耗时与网页大小成线性关系。
+    """
+
+    # 不属于正文内容的标签
+    BOILERPLATE_TAGS = [
+        "script",
+        "style",
+        "noscript",
+        "nav",
+        "header",
+        "footer",
+        "aside",
+        "form",
+        "iframe",
+        "svg",
+    ]
+
+    def extract_article(self, html: str) -> Article:
+        """
+        从HTML内容中提取文章
+
+        参数:
+            html: HTML字符串内容
+
+        返回:
+            Article: 提取的文章对象
+        """
+        soup = BeautifulSoup(html, "html.parser")
+        title = soup.title.get_text(strip=True) if soup.title else None
+        for tag in soup(self.BOILERPLATE_TAGS):
+            tag.decompose()
+        root = soup.find("article") or soup.find("main") or soup.body or soup
+        return Article(title=title, html_content=str(root))
@@ -1,5 +1,8 @@
 from .builder import build_graph
+from .checkpoint import create_checkpointer, register_checkpointer
 
 __all__ = [
     "build_graph",
+    "create_checkpointer",
+    "register_checkpointer",
 ]
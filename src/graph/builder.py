@@ -1,21 +1,53 @@
+from typing import Callable, Optional, get_args, get_type_hints
+
+from langchain_core.runnables import RunnableLambda
+from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.graph import StateGraph, START
 
+from .executor import executor_node, aexecutor_node
 from .types import State
 from .nodes import (
     supervisor_node,
+    asupervisor_node,
     research_node,
+    aresearch_node,
     code_node,
+    acode_node,
     coordinator_node,
+    acoordinator_node,
     browser_node,
+    abrowser_node,
     reporter_node,
+    areporter_node,
     planner_node,
+    aplanner_node,
 )
 
 
-def build_graph():
+def add_node(builder: StateGraph, name: str, func: Callable, afunc: Callable) -> None:
+    """
+    添加同时具有同步和异步实现的节点
+
+    同步调用图（invoke/stream）时执行func，异步调用图（ainvoke/astream_events）时
+    执行afunc，等待LLM和工具的I/O时不占用工作线程。节点可跳转的目标从func的
+    返回类型Command[Literal[...]]中读取。
+
+    Args:
+        builder: 状态图构建器
+        name: 节点名称
+        func: 节点的同步实现
+        afunc: 节点的异步实现
+    """
+    command = get_type_hints(func)["return"]
+    destinations = get_args(get_args(command)[0])
+    # 内部Runnable沿用函数名，避免与节点同名而重复产生节点的流式事件
+    builder.add_node(name, RunnableLambda(func, afunc=afunc), destinations=destinations)
+
+
+def build_graph(checkpointer: Optional[BaseCheckpointSaver] = None):
     """
     构建并返回代理工作流图
-    
+
     此函数创建了系统的核心工作流图，定义了各个代理节点及其连接关系：
     - coordinator: 协调者，负责任务分配和工作流程控制
     - planner: 规划者，负责制定任务执行计划
@@ -24,24 +56,31 @@ def build_graph():
     - coder: 编码者，负责代码实现
     - browser: 浏览器代理，处理网页交互
     - reporter: 报告者，汇总结果并生成报告
-    
+    - executor: 计划执行者，并行执行模式下按依赖关系同时分派计划步骤
+
+    Args:
+        checkpointer: 检查点存储，每个节点完成后保存状态，以便按workflow_id
+            （thread_id）恢复；None表示不保存检查点
+
     Returns:
         编译后的可执行工作流图
     """
     # 创建基于State类型的状态图构建器
     builder = StateGraph(State)
-    
+
     # 设置工作流起点为coordinator节点
     builder.add_edge(START, "coordinator")
-    
-    # 添加各个功能节点
-    builder.add_node("coordinator", coordinator_node)  # 协调节点
-    builder.add_node("planner", planner_node)          # 规划节点
-    builder.add_node("supervisor", supervisor_node)    # 监督节点
-    builder.add_node("researcher", research_node)      # 研究节点
-    builder.add_node("coder", code_node)               # 代码节点
-    builder.add_node("browser", browser_node)          # 浏览器节点
-    builder.add_node("reporter", reporter_node)        # 报告节点
-    
+
+    # 添加各个功能节点（同时注册同步和异步实现）
+    add_node(builder, "coordinator", coordinator_node, acoordinator_node)  # 协调节点
+    add_node(builder, "planner", planner_node, aplanner_node)  # 规划节点
+    add_node(builder, "supervisor", supervisor_node, asupervisor_node)  # 监督节点
+    add_node(builder, "researcher", research_node, aresearch_node)  # 研究节点
+    add_node(builder, "coder", code_node, acode_node)  # 代码节点
+    add_node(builder, "browser", browser_node, abrowser_node)  # 浏览器节点
+    add_node(builder, "reporter", reporter_node, areporter_node)  # 报告节点
+    # 计划执行节点（并行执行模式）
+    add_node(builder, "executor", executor_node, aexecutor_node)
+
     # 编译并返回可执行图
-    return builder.compile()
+    return builder.compile(checkpointer=checkpointer)
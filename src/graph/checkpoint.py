@@ -0,0 +1,576 @@
+"""
+检查点模块 - 持久化工作流状态，支持按workflow_id从中断处恢复
+
+工作流没有检查点时，进程重启或某一步失败都会使之前所有的LLM调用、搜索和爬取
+结果丢失，只能从头重新运行。该模块提供可替换的检查点存储：
+1. 实现LangGraph的BaseCheckpointSaver接口，每个节点完成后保存一次状态，
+   以workflow_id作为thread_id，从最后一个完成的节点继续执行
+2. 按内容寻址保存数据：每条消息和每个通道值按内容哈希只保存一次，
+   检查点中只记录哈希，消息历史增长时每次只写入新增的消息
+3. 数据使用zlib压缩后保存在SQLite中；未变化的通道和消息直接复用已有的哈希，
+   不重复序列化
+4. 通过CHECKPOINT_BACKEND选择存储（memory、sqlite或none），
+   其他存储可以通过register_checkpointer注册
+5. 工作流完成后不能再恢复，由调用方通过delete_thread删除其检查点和中间写入；
+   refs表记录每个工作流引用的内容哈希，不再被任何工作流引用的内容随之删除
+"""
+
+import asyncio
+import hashlib
+import os
+import random
+import sqlite3
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Sequence
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.types import TASKS
+
+from src.config import CHECKPOINT_BACKEND
+from src.config.agents import (
+    CHECKPOINT_COMPRESSION_LEVEL,
+    CHECKPOINT_PATH,
+    CHECKPOINT_REF_CACHE_SIZE,
+)
+
+
+class SQLiteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    基于SQLite的检查点存储，消息和通道值按内容寻址并压缩保存
+    """
+
+    def __init__(
+        self,
+        path: str = CHECKPOINT_PATH,
+        compression_level: int = CHECKPOINT_COMPRESSION_LEVEL,
+        ref_cache_size: int = CHECKPOINT_REF_CACHE_SIZE,
+    ):
+        """
+        初始化检查点存储
+
+        Args:
+            path: SQLite数据库路径，":memory:"表示只使用内存
+            compression_level: zlib压缩级别（0-9）
+            ref_cache_size: 最多缓存的通道值和消息哈希数，用于跳过未变化内容的序列化
+        """
+        super().__init__()
+        self.path = path
+        self.compression_level = compression_level
+        self.ref_cache_size = ref_cache_size
+        self._lock = threading.Lock()
+        # (thread_id, checkpoint_ns, channel, version) -> 通道值的引用
+        self._channel_refs: OrderedDict[tuple, Any] = OrderedDict()
+        # 消息ID -> (消息对象, 哈希)，只有同一个消息对象才复用哈希
+        self._message_refs: OrderedDict[str, tuple[BaseMessage, str]] = OrderedDict()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                parent_checkpoint_id TEXT,
+                checkpoint BLOB NOT NULL,
+                metadata BLOB NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+            );
+            CREATE TABLE IF NOT EXISTS writes (
+                thread_id TEXT NOT NULL,
+                checkpoint_ns TEXT NOT NULL,
+                checkpoint_id TEXT NOT NULL,
+                task_id TEXT NOT NULL,
+                idx INTEGER NOT NULL,
+                channel TEXT NOT NULL,
+                value BLOB NOT NULL,
+                task_path TEXT NOT NULL,
+                PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+            );
+            CREATE TABLE IF NOT EXISTS blobs (
+                hash TEXT PRIMARY KEY,
+                type TEXT NOT NULL,
+                value BLOB NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS refs (
+                hash TEXT NOT NULL,
+                thread_id TEXT NOT NULL,
+                PRIMARY KEY (hash, thread_id)
+            );
+            CREATE INDEX IF NOT EXISTS refs_thread_id ON refs (thread_id);
+            """
+        )
+
+    # ---- 内容寻址的序列化 ----
+
+    def _cache(self, cache: OrderedDict, key: Any, value: Any) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.ref_cache_size:
+            cache.popitem(last=False)
+
+    def _store(self, obj: Any, thread_id: str) -> str:
+        """序列化对象并按内容哈希保存（已存在时不重复写入），记录引用它的工作流，返回哈希"""
+        type_, data = self.serde.dumps_typed(obj)
+        digest = hashlib.sha256(type_.encode() + b"\0" + data).hexdigest()
+        self._db.execute(
+            "INSERT OR IGNORE INTO blobs VALUES (?, ?, ?)",
+            (digest, type_, zlib.compress(data, self.compression_level)),
+        )
+        self._db.execute(
+            "INSERT OR IGNORE INTO refs VALUES (?, ?)", (digest, thread_id)
+        )
+        return digest
+
+    def _store_message(self, message: BaseMessage, thread_id: str) -> str:
+        # 先读取消息ID：LangGraph合并消息时会为没有ID的消息原地分配ID，
+        # 可能与后台保存中间写入时的序列化同时发生
+        message_id = message.id
+        cached = self._message_refs.get(message_id) if message_id else None
+        if cached is not None and cached[0] is message:
+            return cached[1]
+        digest = self._store(message, thread_id)
+        if message_id:
+            self._cache(self._message_refs, message_id, (message, digest))
+        return digest
+
+    def _store_value(self, value: Any, thread_id: str) -> tuple[str, Any]:
+        """保存一个通道值，消息列表中的每条消息单独保存"""
+        if (
+            isinstance(value, list)
+            and value
+            and all(isinstance(item, BaseMessage) for item in value)
+        ):
+            return (
+                "messages",
+                [self._store_message(item, thread_id) for item in value],
+            )
+        return ("value", self._store(value, thread_id))
+
+    def _load(self, digest: str) -> Any:
+        row = self._db.execute(
+            "SELECT type, value FROM blobs WHERE hash = ?", (digest,)
+        ).fetchone()
+        return self.serde.loads_typed((row[0], zlib.decompress(row[1])))
+
+    def _load_value(self, ref: tuple[str, Any]) -> Any:
+        kind, payload = ref
+        if kind == "messages":
+            return [self._load(digest) for digest in payload]
+        return self._load(payload)
+
+    def _dumps(self, obj: Any) -> bytes:
+        """序列化检查点或元数据本身（只包含哈希引用，体积很小）"""
+        type_, data = self.serde.dumps_typed(obj)
+        return zlib.compress(type_.encode() + b"\0" + data, self.compression_level)
+
+    def _loads(self, blob: bytes) -> Any:
+        type_, data = zlib.decompress(blob).split(b"\0", 1)
+        return self.serde.loads_typed((type_.decode(), data))
+
+    # ---- BaseCheckpointSaver接口 ----
+
+    def _tuple(
+        self,
+        thread_id: str,
+        checkpoint_ns: str,
+        checkpoint_id: str,
+        parent_checkpoint_id: Optional[str],
+        checkpoint_blob: bytes,
+        metadata_blob: bytes,
+    ) -> CheckpointTuple:
+        """从数据库行还原检查点"""
+        stored = self._loads(checkpoint_blob)
+        checkpoint = {
+            **stored,
+            "channel_values": {
+                channel: self._load_value(ref)
+                for channel, ref in stored["channel_values"].items()
+            },
+        }
+        writes = self._db.execute(
+            "SELECT task_id, channel, value FROM writes WHERE thread_id = ?"
+            " AND checkpoint_ns = ? AND checkpoint_id = ? ORDER BY task_id, idx",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        sends = []
+        if parent_checkpoint_id:
+            # 上一个检查点中通过Send分派的任务
+            sends = self._db.execute(
+                "SELECT value FROM writes WHERE thread_id = ? AND checkpoint_ns = ?"
+                " AND checkpoint_id = ? AND channel = ? ORDER BY task_path, task_id, idx",
+                (thread_id, checkpoint_ns, parent_checkpoint_id, TASKS),
+            ).fetchall()
+        checkpoint["pending_sends"] = [self._load_value(self._loads(v)) for v, in sends]
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=checkpoint,
+            metadata=self._loads(metadata_blob),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_checkpoint_id,
+                    }
+                }
+                if parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self._load_value(self._loads(value)))
+                for task_id, channel, value in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """
+        获取检查点，config中没有checkpoint_id时返回最新的检查点
+
+        Args:
+            config: 包含thread_id（以及可选的checkpoint_ns、checkpoint_id）的配置
+
+        Returns:
+            检查点，不存在时返回None
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        query = (
+            "SELECT checkpoint_id, parent_checkpoint_id, checkpoint, metadata"
+            " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+        )
+        params: tuple = (thread_id, checkpoint_ns)
+        if checkpoint_id := get_checkpoint_id(config):
+            query += " AND checkpoint_id = ?"
+            params += (checkpoint_id,)
+        else:
+            query += " ORDER BY checkpoint_id DESC LIMIT 1"
+        with self._lock:
+            row = self._db.execute(query, params).fetchone()
+            if row is None:
+                return None
+            return self._tuple(thread_id, checkpoint_ns, *row)
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """
+        按时间倒序列出检查点
+
+        Args:
+            config: 按thread_id、checkpoint_ns和checkpoint_id筛选，None表示所有工作流
+            filter: 按元数据筛选
+            before: 只返回该检查点之前的检查点
+            limit: 最多返回的检查点数
+
+        Returns:
+            依次产生的检查点
+        """
+        conditions, params = [], []
+        configurable = (config or {}).get("configurable", {})
+        for key in ("thread_id", "checkpoint_ns"):
+            if configurable.get(key) is not None:
+                conditions.append(f"{key} = ?")
+                params.append(configurable[key])
+        if config and (checkpoint_id := get_checkpoint_id(config)):
+            conditions.append("checkpoint_id = ?")
+            params.append(checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            conditions.append("checkpoint_id < ?")
+            params.append(before_id)
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+                f" checkpoint, metadata FROM checkpoints{where}"
+                " ORDER BY checkpoint_id DESC",
+                params,
+            ).fetchall()
+        for row in rows:
+            if limit is not None and limit <= 0:
+                break
+            if filter:
+                metadata = self._loads(row[5])
+                if not all(metadata.get(k) == v for k, v in filter.items()):
+                    continue
+            if limit is not None:
+                limit -= 1
+            with self._lock:
+                item = self._tuple(*row)
+            yield item
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """
+        保存检查点，未变化的通道复用之前保存的引用
+
+        Args:
+            config: 当前配置，其中的checkpoint_id为上一个检查点
+            checkpoint: 要保存的检查点
+            metadata: 检查点元数据
+            new_versions: 本步中发生变化的通道版本
+
+        Returns:
+            指向新检查点的配置
+        """
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"]["checkpoint_ns"]
+        stored = {k: v for k, v in checkpoint.items() if k != "pending_sends"}
+        with self._lock:
+            refs = {}
+            for channel, value in checkpoint["channel_values"].items():
+                key = (
+                    thread_id,
+                    checkpoint_ns,
+                    channel,
+                    checkpoint["channel_versions"].get(channel),
+                )
+                ref = (
+                    self._channel_refs.get(key) if channel not in new_versions else None
+                )
+                if ref is None:
+                    ref = self._store_value(value, thread_id)
+                    self._cache(self._channel_refs, key, ref)
+                refs[channel] = ref
+            stored["channel_values"] = refs
+            self._db.execute(
+                "INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    config["configurable"].get("checkpoint_id"),
+                    self._dumps(stored),
+                    self._dumps(get_checkpoint_metadata(config, metadata)),
+                ),
+            )
+            self._db.commit()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """
+        保存节点的中间写入，使失败的步骤中已完成的任务在恢复时不必重新执行
+
+        Args:
+            config: 指向所属检查点的配置
+            writes: (通道, 值)列表
+            task_id: 产生写入的任务ID
+            task_path: 产生写入的任务路径
+        """
+        configurable = config["configurable"]
+        key = (
+            configurable["thread_id"],
+            configurable.get("checkpoint_ns", ""),
+            configurable["checkpoint_id"],
+            task_id,
+        )
+        with self._lock:
+            for idx, (channel, value) in enumerate(writes):
+                write_idx = WRITES_IDX_MAP.get(channel, idx)
+                # 特殊写入（错误、中断等）覆盖之前的值，普通写入只保存一次
+                verb = "INSERT OR REPLACE" if write_idx < 0 else "INSERT OR IGNORE"
+                self._db.execute(
+                    f"{verb} INTO writes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        *key,
+                        write_idx,
+                        channel,
+                        self._dumps(self._store_value(value, key[0])),
+                        task_path,
+                    ),
+                )
+            self._db.commit()
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        删除工作流的所有检查点和中间写入，以及不再被其他工作流引用的内容
+
+        Args:
+            thread_id: 工作流ID
+        """
+        with self._lock:
+            hashes = [
+                digest
+                for digest, in self._db.execute(
+                    "SELECT hash FROM refs WHERE thread_id = ?", (thread_id,)
+                )
+            ]
+            for table in ("checkpoints", "writes", "refs"):
+                self._db.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,)
+                )
+            self._db.executemany(
+                "DELETE FROM blobs WHERE hash = ?"
+                " AND NOT EXISTS (SELECT 1 FROM refs WHERE refs.hash = blobs.hash)",
+                [(digest,) for digest in hashes],
+            )
+            self._db.commit()
+            # 缓存中的哈希可能指向已删除的内容，不能再复用
+            deleted = set(hashes)
+            for key in [key for key in self._channel_refs if key[0] == thread_id]:
+                del self._channel_refs[key]
+            for message_id, (_, digest) in list(self._message_refs.items()):
+                if digest in deleted:
+                    del self._message_refs[message_id]
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """get_tuple的异步版本，在工作线程中访问数据库"""
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        """list的异步版本，在工作线程中访问数据库"""
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """put的异步版本，在工作线程中序列化和写入"""
+        return await asyncio.to_thread(
+            self.put, config, checkpoint, metadata, new_versions
+        )
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """put_writes的异步版本，在工作线程中序列化和写入"""
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """delete_thread的异步版本，在工作线程中访问数据库"""
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    def get_next_version(self, current: Optional[str], channel: Any) -> str:
+        """生成通道的下一个版本号（可排序的字符串，与InMemorySaver一致）"""
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+
+class MemoryCheckpointSaver(InMemorySaver):
+    """
+    只保存在当前进程内存中的检查点存储，支持删除已完成的工作流
+    """
+
+    def delete_thread(self, thread_id: str) -> None:
+        """
+        删除工作流的所有检查点和中间写入
+
+        Args:
+            thread_id: 工作流ID
+        """
+        self.storage.pop(thread_id, None)
+        for key in [key for key in self.writes if key[0] == thread_id]:
+            del self.writes[key]
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        """delete_thread的异步版本"""
+        self.delete_thread(thread_id)
+
+
+# 检查点存储名称到工厂函数的映射，返回None表示不保存检查点；
+# 存储实现delete_thread/adelete_thread时，已完成的工作流的检查点会被删除
+CHECKPOINTER_FACTORIES: dict[str, Callable[[], Optional[BaseCheckpointSaver]]] = {
+    "sqlite": SQLiteCheckpointSaver,
+    "memory": MemoryCheckpointSaver,
+    "none": lambda: None,
+}
+
+
+def register_checkpointer(
+    name: str, factory: Callable[[], Optional[BaseCheckpointSaver]]
+) -> None:
+    """
+    注册检查点存储，之后可以通过CHECKPOINT_BACKEND选择
+
+    Args:
+        name: 存储名称
+        factory: 创建检查点存储的函数
+    """
+    CHECKPOINTER_FACTORIES[name] = factory
+
+
+def create_checkpointer(
+    backend: str = CHECKPOINT_BACKEND,
+) -> Optional[BaseCheckpointSaver]:
+    """
+    创建检查点存储
+
+    Args:
+        backend: 存储名称，默认使用CHECKPOINT_BACKEND配置
+
+    Returns:
+        检查点存储，backend为"none"时返回None
+
+    Raises:
+        ValueError: 当存储名称未注册时抛出
+    """
+    if backend not in CHECKPOINTER_FACTORIES:
+        raise ValueError(f"Unknown checkpoint backend: {backend}")
+    return CHECKPOINTER_FACTORIES[backend]()
@@ -0,0 +1,177 @@
+"""
+计划执行模块 - 按步骤依赖关系并行执行计划
+
+默认的执行方式由监督节点逐步决定下一个代理，同一时间只有一个代理在工作。
+并行执行模式（execution_mode="parallel"）下，规划完成后由executor节点调度：
+1. 从计划中读取各步骤的依赖关系：步骤可以用depends_on显式列出依赖的步骤编号，
+   未标注时reporter依赖之前的所有步骤，其他步骤之间相互独立
+2. 每一轮把依赖已经完成的步骤通过LangGraph的Send同时分派给对应的代理节点
+3. 代理节点把结果写入step_results，本轮所有步骤完成后回到executor，
+   按步骤顺序将结果合并到消息历史中，再分派下一轮
+4. 所有步骤完成后结束工作流
+"""
+
+import json
+import logging
+from typing import Literal, Optional
+
+from langchain_core.messages import HumanMessage
+from langgraph.types import Command, Send
+
+from src.config import TEAM_MEMBERS
+
+from .types import RESPONSE_FORMAT, State
+
+logger = logging.getLogger(__name__)
+
+# 分派步骤时附加给代理的任务说明
+STEP_INSTRUCTION = "Please execute step {number} of the plan: {title}\n\n{description}"
+
+
+def parse_plan_steps(full_plan: str) -> Optional[list[dict]]:
+    """
+    解析计划中的步骤
+
+    Args:
+        full_plan: 规划节点输出的JSON计划
+
+    Returns:
+        步骤列表；计划无法解析或包含未知代理时返回None
+    """
+    try:
+        steps = json.loads(full_plan).get("steps")
+    except (json.JSONDecodeError, AttributeError):
+        return None
+    if not isinstance(steps, list) or not steps:
+        return None
+    for step in steps:
+        if not isinstance(step, dict) or step.get("agent_name") not in TEAM_MEMBERS:
+            return None
+    return steps
+
+
+def step_instruction(index: int, step: dict) -> str:
+    """
+    生成分派步骤时附加给代理的任务说明
+
+    Args:
+        index: 步骤编号（从0开始）
+        step: 计划步骤
+
+    Returns:
+        任务说明文本
+    """
+    instruction = STEP_INSTRUCTION.format(
+        number=index + 1,
+        title=step.get("title", ""),
+        description=step.get("description", ""),
+    )
+    if step.get("note"):
+        instruction += f"\n\nNote: {step['note']}"
+    return instruction
+
+
+def plan_dependencies(steps: list[dict]) -> list[set[int]]:
+    """
+    计算每个步骤依赖的步骤（从0开始编号）
+
+    depends_on中的编号从1开始，只能引用之前的步骤；未标注时reporter依赖
+    之前的所有步骤，其他步骤不依赖任何步骤。
+
+    Args:
+        steps: 计划中的步骤
+
+    Returns:
+        与步骤一一对应的依赖集合
+    """
+    dependencies = []
+    for index, step in enumerate(steps):
+        depends_on = step.get("depends_on")
+        if isinstance(depends_on, list):
+            dependencies.append(
+                {
+                    number - 1
+                    for number in depends_on
+                    if isinstance(number, int) and 1 <= number <= index
+                }
+            )
+        elif step["agent_name"] == "reporter":
+            dependencies.append(set(range(index)))
+        else:
+            dependencies.append(set())
+    return dependencies
+
+
+def executor_node(
+    state: State,
+) -> Command[Literal[*TEAM_MEMBERS, "supervisor", "__end__"]]:
+    """
+    计划执行节点 - 合并已完成步骤的结果，并分派依赖已满足的步骤
+
+    Args:
+        state: 当前工作流状态
+
+    Returns:
+        包含合并后的消息和下一轮分派（Send列表）的Command对象
+    """
+    steps = parse_plan_steps(state.get("full_plan", ""))
+    if steps is None:
+        # 计划中没有可以调度的步骤时，退回由监督逐步决策
+        logger.warning(
+            "Plan cannot be executed in parallel, falling back to supervisor"
+        )
+        return Command(goto="supervisor", update={"execution_mode": "sequential"})
+
+    results = state.get("step_results") or {}
+    merged = list(state.get("merged_steps") or [])
+    # 按步骤顺序合并上一轮完成的结果
+    new_messages = [
+        HumanMessage(
+            content=RESPONSE_FORMAT.format(steps[index]["agent_name"], results[index]),
+            name=steps[index]["agent_name"],
+        )
+        for index in sorted(results)
+        if index not in merged
+    ]
+    merged.extend(sorted(index for index in results if index not in merged))
+    update = {"messages": new_messages, "merged_steps": merged}
+
+    done = set(results)
+    dependencies = plan_dependencies(steps)
+    ready = [
+        index
+        for index in range(len(steps))
+        if index not in done and dependencies[index] <= done
+    ]
+    if not ready:
+        # 依赖只能引用之前的步骤，没有可分派的步骤说明所有步骤都已完成
+        logger.info("Workflow completed")
+        return Command(goto="__end__", update=update)
+
+    logger.info(f"Executor dispatching steps: {[index + 1 for index in ready]}")
+    messages = state["messages"] + new_messages
+    sends = []
+    for index in ready:
+        step = steps[index]
+        instruction = step_instruction(index, step)
+        sends.append(
+            Send(
+                step["agent_name"],
+                {
+                    **state,
+                    "messages": messages + [HumanMessage(content=instruction)],
+                    "current_step": index,
+                },
+            )
+        )
+    return Command(goto=sends, update=update)
+
+
+async def aexecutor_node(
+    state: State,
+) -> Command[Literal[*TEAM_MEMBERS, "supervisor", "__end__"]]:
+    """
+    executor_node的异步版本：调度本身不涉及I/O，直接在事件循环中执行，
+    避免异步运行工作流时为每一轮调度切换到线程池
+    """
+    return executor_node(state)
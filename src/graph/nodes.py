@@ -6,49 +6,46 @@ from langchain_core.messages import HumanMessage
 from langgraph.types import Command
 from langgraph.graph import END
 
-from src.agents import research_agent, coder_agent, browser_agent
-from src.agents.llm import get_llm_by_type
+from src.agents import get_agent
+from src.agents.llm import get_llm_for_agent
 from src.config import TEAM_MEMBERS
-from src.config.agents import AGENT_LLM_MAP
 from src.prompts.template import apply_prompt_template
-from src.tools.search import tavily_tool
-from .types import State, Router
+from .plan_follower import follow_plan, plan_update
+from .plan_stream import PlanStreamParser, StepSpeculation, adopt_step, prefetch_step
+from .preplanning import AsyncPlanningPreparation, PlanningPreparation
+from .types import RESPONSE_FORMAT, State, Router
 
 # 初始化日志记录器
 logger = logging.getLogger(__name__)
 
-# 定义代理响应的格式模板
-# 包含代理名称和响应内容，并添加执行下一步的提示
-RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
 
-
-def research_node(state: State) -> Command[Literal["supervisor"]]:
+def agent_output(
+    state: State, agent_name: str, content: str
+) -> Command[Literal["supervisor", "executor"]]:
     """
-    研究节点 - 负责执行信息收集和研究任务
-    
-    该节点调用research_agent执行搜索和爬取操作，收集任务所需的信息。
-    完成后，将结果添加到消息历史中，并将控制权交回给supervisor节点。
-    
+    将代理的输出写回工作流状态
+
+    逐步执行时，输出作为消息添加到历史中并交回supervisor节点；并行执行计划步骤时
+    （状态中带有executor分派的current_step），输出写入step_results并交回executor节点，
+    由executor按步骤顺序合并到消息历史中。
+
     Args:
-        state: 当前工作流状态
-        
+        state: 代理节点收到的状态
+        agent_name: 代理名称
+        content: 代理的输出内容
+
     Returns:
         包含状态更新和下一节点信息的Command对象
     """
-    logger.info("Research agent starting task")
-    # 调用研究代理处理当前状态
-    result = research_agent.invoke(state)
-    logger.info("Research agent completed task")
-    logger.debug(f"Research agent response: {result['messages'][-1].content}")
-    # 将研究代理的响应添加到消息历史，并转到supervisor节点
+    step = state.get("current_step")
+    if step is not None:
+        return Command(update={"step_results": {step: content}}, goto="executor")
     return Command(
         update={
             "messages": [
                 HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "researcher", result["messages"][-1].content
-                    ),
-                    name="researcher",
+                    content=RESPONSE_FORMAT.format(agent_name, content),
+                    name=agent_name,
                 )
             ]
         },
@@ -56,99 +53,175 @@ def research_node(state: State) -> Command[Literal["supervisor"]]:
     )
 
 
-def code_node(state: State) -> Command[Literal["supervisor"]]:
+async def _aagent_response(state: State, agent_name: str) -> str:
+    """
+    异步运行代理并返回其输出
+
+    规划节点已推测执行该步骤并交给工作流时，领取并等待推测执行的结果，不再重新运行代理。
+
+    Args:
+        state: 代理节点收到的状态
+        agent_name: 代理名称
+
+    Returns:
+        代理的输出内容
+    """
+    content = await adopt_step(state, agent_name)
+    if content is None:
+        result = await get_agent(agent_name).ainvoke(state)
+        content = result["messages"][-1].content
+    return content
+
+
+def research_node(state: State) -> Command[Literal["supervisor", "executor"]]:
+    """
+    研究节点 - 负责执行信息收集和研究任务
+
+    该节点调用research_agent执行搜索和爬取操作，收集任务所需的信息。
+    完成后通过agent_output将结果写回状态，并将控制权交回给supervisor（或executor）节点。
+
+    Args:
+        state: 当前工作流状态
+
+    Returns:
+        包含状态更新和下一节点信息的Command对象
+    """
+    logger.info("Research agent starting task")
+    # 调用研究代理处理当前状态
+    result = get_agent("researcher").invoke(state)
+    logger.info("Research agent completed task")
+    logger.debug(f"Research agent response: {result['messages'][-1].content}")
+    # 将研究代理的响应写回状态
+    return agent_output(state, "researcher", result["messages"][-1].content)
+
+
+async def aresearch_node(state: State) -> Command[Literal["supervisor", "executor"]]:
+    """
+    research_node的异步版本，代理的LLM调用和工具调用都在事件循环中等待
+    """
+    logger.info("Research agent starting task")
+    content = await _aagent_response(state, "researcher")
+    logger.info("Research agent completed task")
+    logger.debug(f"Research agent response: {content}")
+    return agent_output(state, "researcher", content)
+
+
+def code_node(state: State) -> Command[Literal["supervisor", "executor"]]:
     """
     代码节点 - 负责执行代码实现和测试任务
-    
+
     该节点调用coder_agent执行Python代码和系统命令，实现和测试功能。
-    完成后，将结果添加到消息历史中，并将控制权交回给supervisor节点。
-    
+    完成后通过agent_output将结果写回状态，并将控制权交回给supervisor（或executor）节点。
+
     Args:
         state: 当前工作流状态
-        
+
     Returns:
         包含状态更新和下一节点信息的Command对象
     """
     logger.info("Code agent starting task")
     # 调用代码代理处理当前状态
-    result = coder_agent.invoke(state)
+    result = get_agent("coder").invoke(state)
     logger.info("Code agent completed task")
     logger.debug(f"Code agent response: {result['messages'][-1].content}")
-    # 将代码代理的响应添加到消息历史，并转到supervisor节点
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "coder", result["messages"][-1].content
-                    ),
-                    name="coder",
-                )
-            ]
-        },
-        goto="supervisor",  # 返回supervisor进行下一步决策
-    )
+    # 将代码代理的响应写回状态
+    return agent_output(state, "coder", result["messages"][-1].content)
+
+
+async def acode_node(state: State) -> Command[Literal["supervisor", "executor"]]:
+    """
+    code_node的异步版本，代理的LLM调用和工具调用都在事件循环中等待
+    """
+    logger.info("Code agent starting task")
+    content = await _aagent_response(state, "coder")
+    logger.info("Code agent completed task")
+    logger.debug(f"Code agent response: {content}")
+    return agent_output(state, "coder", content)
 
 
-def browser_node(state: State) -> Command[Literal["supervisor"]]:
+def browser_node(state: State) -> Command[Literal["supervisor", "executor"]]:
     """
     浏览器节点 - 负责执行网页浏览和交互任务
-    
+
     该节点调用browser_agent模拟浏览器行为，访问网站和提取信息。
-    完成后，将结果添加到消息历史中，并将控制权交回给supervisor节点。
-    
+    完成后通过agent_output将结果写回状态，并将控制权交回给supervisor（或executor）节点。
+
     Args:
         state: 当前工作流状态
-        
+
     Returns:
         包含状态更新和下一节点信息的Command对象
     """
     logger.info("Browser agent starting task")
     # 调用浏览器代理处理当前状态
-    result = browser_agent.invoke(state)
+    result = get_agent("browser").invoke(state)
     logger.info("Browser agent completed task")
     logger.debug(f"Browser agent response: {result['messages'][-1].content}")
-    # 将浏览器代理的响应添加到消息历史，并转到supervisor节点
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format(
-                        "browser", result["messages"][-1].content
-                    ),
-                    name="browser",
-                )
-            ]
-        },
-        goto="supervisor",  # 返回supervisor进行下一步决策
-    )
+    # 将浏览器代理的响应写回状态
+    return agent_output(state, "browser", result["messages"][-1].content)
+
+
+async def abrowser_node(state: State) -> Command[Literal["supervisor", "executor"]]:
+    """
+    browser_node的异步版本，代理的LLM调用和工具调用都在事件循环中等待
+    """
+    logger.info("Browser agent starting task")
+    content = await _aagent_response(state, "browser")
+    logger.info("Browser agent completed task")
+    logger.debug(f"Browser agent response: {content}")
+    return agent_output(state, "browser", content)
 
 
 def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     """
     监督节点 - 决定下一步执行哪个代理
-    
+
     该节点是工作流的核心决策点，负责评估当前状态，并决定：
     1. 将任务委派给特定的团队成员
     2. 结束工作流
-    
-    使用Router类型格式化输出，确保决策有效。
-    
+
+    使用Router类型格式化输出，确保决策有效。按计划执行模式下由follow_plan按计划
+    分派下一步，只有上一步的输出需要检查时才调用LLM。
+
     Args:
         state: 当前工作流状态
-        
+
     Returns:
         包含下一节点信息的Command对象
     """
     logger.info("Supervisor evaluating next action")
+    # 按计划执行模式下，上一步输出正常时直接分派计划中的下一步，不调用LLM
+    if state.get("execution_mode") == "planned":
+        command = follow_plan(state)
+        if command is not None:
+            return command
     # 应用supervisor提示模板
     messages = apply_prompt_template("supervisor", state)
     # 使用LLM进行结构化输出，决定下一步
     response = (
-        get_llm_by_type(AGENT_LLM_MAP["supervisor"])
-        .with_structured_output(Router)
-        .invoke(messages)
+        get_llm_for_agent("supervisor").with_structured_output(Router).invoke(messages)
     )
+    return _supervisor_command(state, response)
+
+
+async def asupervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
+    """
+    supervisor_node的异步版本，等待LLM响应时不占用工作线程
+    """
+    logger.info("Supervisor evaluating next action")
+    if state.get("execution_mode") == "planned":
+        command = follow_plan(state)
+        if command is not None:
+            return command
+    messages = apply_prompt_template("supervisor", state)
+    response = await (
+        get_llm_for_agent("supervisor").with_structured_output(Router).ainvoke(messages)
+    )
+    return _supervisor_command(state, response)
+
+
+def _supervisor_command(state: State, response: Router) -> Command:
+    """根据监督的决策生成跳转到下一节点的Command"""
     goto = response["next"]
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"Supervisor response: {response}")
@@ -160,51 +233,132 @@ def supervisor_node(state: State) -> Command[Literal[*TEAM_MEMBERS, "__end__"]]:
     else:
         logger.info(f"Supervisor delegating to: {goto}")
 
+    update = {"next": goto}
+    if state.get("execution_mode") == "planned":
+        # 根据监督的决策移动计划游标，偏离计划时切换为由监督逐步决策
+        update.update(plan_update(state, goto))
+
     # 返回下一步信息并更新状态
-    return Command(goto=goto, update={"next": goto})
+    return Command(goto=goto, update=update)
 
 
-def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
+def planner_node(state: State) -> Command[Literal["supervisor", "executor", "__end__"]]:
     """
     规划节点 - 生成完整的执行计划
-    
+
     该节点负责分析任务并生成详细的执行计划，包括：
     1. 根据深度思考模式决定使用哪种LLM
     2. 可选地在规划前进行相关搜索
-    3. 生成结构化的计划（JSON格式）
-    
+    3. 生成结构化的计划（JSON格式），每个步骤生成完毕后立即预取对应的代理
+
     Args:
         state: 当前工作流状态
-        
+
     Returns:
         包含计划和下一节点信息的Command对象
     """
     logger.info("Planner generating full plan")
-    # 应用planner提示模板
-    messages = apply_prompt_template("planner", state)
-    
-    # 根据深度思考模式选择LLM类型
-    llm = get_llm_by_type("basic")
-    if state.get("deep_thinking_mode"):
-        llm = get_llm_by_type("reasoning")
-        
-    # 如果启用了规划前搜索，执行相关搜索并将结果添加到消息中
+    llm, messages = _planner_llm_and_messages(state)
+
+    # 如果启用了规划前搜索，将搜索结果添加到消息中；
+    # 协调节点运行时已完成搜索的，直接使用其结果
     if state.get("search_before_planning"):
-        searched_content = tavily_tool.invoke({"query": state["messages"][-1].content})
-        messages = deepcopy(messages)
-        # 确保searched_content是列表格式
-        if isinstance(searched_content, str):
-            searched_content = [{"title": "搜索结果", "content": searched_content}]
-        elif not isinstance(searched_content, list):
-            searched_content = [{"title": "搜索结果", "content": str(searched_content)}]
-            
-        messages[-1].content += f"\n\n# Relative Search Results\n\n{json.dumps([{'title': elem.get('title', '无标题'), 'content': elem.get('content', '无内容')} for elem in searched_content], ensure_ascii=False)}"
-    
-    # 流式处理LLM响应
+        searched_content = state.get("planning_search_results")
+        if searched_content is None:
+            # 搜索工具在首次使用时才加载（编译图时LangGraph会解析节点函数引用的
+            # 模块属性，因此不能以src.tools.tavily_tool的形式在模块级引用）
+            from src.tools.search import tavily_tool
+
+            searched_content = tavily_tool.invoke(
+                {"query": state["messages"][-1].content}
+            )
+        messages = _with_search_results(messages, searched_content)
+
+    # 流式处理LLM响应，每个步骤生成完毕后立即在后台预取对应的代理
     stream = llm.stream(messages)
     full_response = ""
+    parser = PlanStreamParser(on_step=prefetch_step)
     for chunk in stream:
         full_response += chunk.content
+        parser.feed(chunk.content)
+    return _planner_command(state, full_response)
+
+
+async def aplanner_node(
+    state: State,
+) -> Command[Literal["supervisor", "executor", "__end__"]]:
+    """
+    planner_node的异步版本，规划前搜索和流式生成计划都不占用工作线程
+
+    按计划执行模式下，第一个步骤生成完毕后立即推测执行（见plan_stream.StepSpeculation），
+    计划完成后交给工作流，由该步骤的代理节点领取。
+    """
+    logger.info("Planner generating full plan")
+    llm, messages = _planner_llm_and_messages(state)
+
+    if state.get("search_before_planning"):
+        searched_content = state.get("planning_search_results")
+        if searched_content is None:
+            from src.tools.search import tavily_tool
+
+            searched_content = await tavily_tool.ainvoke(
+                {"query": state["messages"][-1].content}
+            )
+        messages = _with_search_results(messages, searched_content)
+
+    # 按计划执行模式下，第一个步骤生成完毕后立即推测执行，计划完成后交给工作流
+    speculation = StepSpeculation(state, _arun_step_agent)
+    full_response = ""
+    try:
+        async for chunk in llm.astream(messages):
+            full_response += chunk.content
+            speculation.feed(chunk.content)
+    except BaseException:
+        await speculation.cancel()
+        raise
+    command = _planner_command(state, full_response)
+    if command.goto != "supervisor":
+        await speculation.cancel()
+        return command
+    update = await speculation.handover(command.update["full_plan"])
+    return Command(goto=command.goto, update={**command.update, **update})
+
+
+async def _arun_step_agent(agent_name: str, state: State, config: dict) -> str:
+    """运行代理并返回其输出（推测执行计划的第一个步骤）"""
+    result = await get_agent(agent_name).ainvoke(state, config)
+    return result["messages"][-1].content
+
+
+def _planner_llm_and_messages(state: State) -> tuple:
+    """选择规划使用的LLM并构建规划提示"""
+    # 应用planner提示模板
+    messages = apply_prompt_template("planner", state)
+
+    # 根据深度思考模式选择LLM类型
+    llm = get_llm_for_agent("planner", "basic")
+    if state.get("deep_thinking_mode"):
+        llm = get_llm_for_agent("planner", "reasoning")
+    return llm, messages
+
+
+def _with_search_results(messages: list, searched_content) -> list:
+    """将规划前的搜索结果附加到最后一条消息中（不修改原消息）"""
+    messages = deepcopy(messages)
+    # 确保searched_content是列表格式
+    if isinstance(searched_content, str):
+        searched_content = [{"title": "搜索结果", "content": searched_content}]
+    elif not isinstance(searched_content, list):
+        searched_content = [{"title": "搜索结果", "content": str(searched_content)}]
+
+    messages[
+        -1
+    ].content += f"\n\n# Relative Search Results\n\n{json.dumps([{'title': elem.get('title', '无标题'), 'content': elem.get('content', '无内容')} for elem in searched_content], ensure_ascii=False)}"
+    return messages
+
+
+def _planner_command(state: State, full_response: str) -> Command:
+    """校验生成的计划，并生成写入计划和跳转到下一节点的Command"""
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"Planner response: {full_response}")
 
@@ -215,8 +369,8 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
     if full_response.endswith("```"):
         full_response = full_response.removesuffix("```")
 
-    # 设置默认下一步为supervisor
-    goto = "supervisor"
+    # 设置默认下一步：并行执行模式下由executor按依赖关系调度，否则由supervisor逐步决策
+    goto = "executor" if state.get("execution_mode") == "parallel" else "supervisor"
     # 验证响应是否为有效的JSON
     try:
         json.loads(full_response)
@@ -237,23 +391,60 @@ def planner_node(state: State) -> Command[Literal["supervisor", "__end__"]]:
 def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     """
     协调节点 - 与用户沟通并决定是否启动规划
-    
+
     该节点是工作流的入口点，负责：
     1. 与用户进行初步交流
     2. 确定是否需要进一步规划
     3. 决定是将控制权交给planner还是结束工作流
-    
+
+    调用LLM的同时开始规划前搜索和推理模型预热（见preplanning模块），
+    交给planner时带上搜索结果，否则取消。
+
     Args:
         state: 当前工作流状态
-        
+
     Returns:
         包含下一节点信息的Command对象
     """
     logger.info("Coordinator talking.")
     # 应用coordinator提示模板
     messages = apply_prompt_template("coordinator", state)
-    # 获取LLM响应
-    response = get_llm_by_type(AGENT_LLM_MAP["coordinator"]).invoke(messages)
+    # 在等待LLM响应的同时开始规划前准备
+    preparation = PlanningPreparation(state)
+    try:
+        # 获取LLM响应
+        response = get_llm_for_agent("coordinator").invoke(messages)
+    except BaseException:
+        preparation.cancel()
+        raise
+    command = _coordinator_command(state, response)
+    if command.goto != "planner":
+        preparation.cancel()
+        return command
+    return Command(goto=command.goto, update=preparation.result())
+
+
+async def acoordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
+    """
+    coordinator_node的异步版本，等待LLM响应时不占用工作线程
+    """
+    logger.info("Coordinator talking.")
+    messages = apply_prompt_template("coordinator", state)
+    preparation = AsyncPlanningPreparation(state)
+    try:
+        response = await get_llm_for_agent("coordinator").ainvoke(messages)
+    except BaseException:
+        preparation.cancel()
+        raise
+    command = _coordinator_command(state, response)
+    if command.goto != "planner":
+        preparation.cancel()
+        return command
+    return Command(goto=command.goto, update=await preparation.result())
+
+
+def _coordinator_command(state: State, response) -> Command:
+    """根据协调者的回复决定是否交给planner"""
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"coordinator response: {response}")
 
@@ -269,16 +460,16 @@ def coordinator_node(state: State) -> Command[Literal["planner", "__end__"]]:
     )
 
 
-def reporter_node(state: State) -> Command[Literal["supervisor"]]:
+def reporter_node(state: State) -> Command[Literal["supervisor", "executor"]]:
     """
     报告节点 - 生成最终的任务报告
-    
+
     该节点负责汇总工作流的执行结果，生成结构化的报告。
-    完成后，将结果添加到消息历史中，并将控制权交回给supervisor节点。
-    
+    完成后通过agent_output将结果写回状态，并将控制权交回给supervisor（或executor）节点。
+
     Args:
         state: 当前工作流状态
-        
+
     Returns:
         包含状态更新和下一节点信息的Command对象
     """
@@ -286,19 +477,21 @@ def reporter_node(state: State) -> Command[Literal["supervisor"]]:
     # 应用reporter提示模板
     messages = apply_prompt_template("reporter", state)
     # 获取LLM响应
-    response = get_llm_by_type(AGENT_LLM_MAP["reporter"]).invoke(messages)
+    response = get_llm_for_agent("reporter").invoke(messages)
     logger.debug(f"Current state messages: {state['messages']}")
     logger.debug(f"reporter response: {response}")
 
-    # 将报告者的响应添加到消息历史，并转到supervisor节点
-    return Command(
-        update={
-            "messages": [
-                HumanMessage(
-                    content=RESPONSE_FORMAT.format("reporter", response.content),
-                    name="reporter",
-                )
-            ]
-        },
-        goto="supervisor",  # 返回supervisor进行下一步决策
-    )
+    # 将报告者的响应写回状态
+    return agent_output(state, "reporter", response.content)
+
+
+async def areporter_node(state: State) -> Command[Literal["supervisor", "executor"]]:
+    """
+    reporter_node的异步版本，等待LLM响应时不占用工作线程
+    """
+    logger.info("Reporter write final report")
+    messages = apply_prompt_template("reporter", state)
+    response = await get_llm_for_agent("reporter").ainvoke(messages)
+    logger.debug(f"Current state messages: {state['messages']}")
+    logger.debug(f"reporter response: {response}")
+    return agent_output(state, "reporter", response.content)
@@ -0,0 +1,109 @@
+"""
+计划跟随模块 - 按计划中的步骤顺序确定下一个代理
+
+默认的执行方式下，监督在每一步之前都调用一次LLM来选择下一个代理，而规划完成后
+下一步通常就是计划中的下一个步骤。按计划执行模式（execution_mode="planned"）下：
+1. 状态中的plan_cursor记录已分派的计划步骤数，监督直接分派下一个步骤，不调用LLM
+2. 分派前用简单的规则检查上一步的输出：输出来自计划中的代理、正文不为空、
+   不以PLAN_FOLLOWER_FAILURE_PATTERNS中的失败短语开头
+3. 检查不通过或计划无法解析时仍由监督LLM决策：LLM重试当前步骤或选择计划中的
+   下一步时继续跟随计划，选择计划之外的代理时切换为由监督逐步决策
+4. 所有步骤完成后直接结束工作流
+"""
+
+import logging
+import re
+from typing import Optional
+
+from langchain_core.messages import BaseMessage
+from langgraph.types import Command
+
+from src.config.agents import PLAN_FOLLOWER_FAILURE_PATTERNS
+from src.prompts.context import RESPONSE_PATTERN
+
+from .executor import parse_plan_steps
+from .types import State
+
+logger = logging.getLogger(__name__)
+
+# 匹配输出正文开头的失败短语
+FAILURE_PATTERN = re.compile(
+    "|".join(f"(?:{pattern})" for pattern in PLAN_FOLLOWER_FAILURE_PATTERNS)
+)
+
+
+def step_issue(message: BaseMessage, agent_name: str) -> Optional[str]:
+    """
+    检查一个计划步骤的输出是否可以直接进入下一步
+
+    Args:
+        message: 步骤完成后消息历史中的最后一条消息
+        agent_name: 计划中执行该步骤的代理
+
+    Returns:
+        需要由监督LLM决策的原因；输出正常时返回None
+    """
+    if message.name != agent_name:
+        return f"expected output from {agent_name}, got {message.name or message.type}"
+    content = message.content if isinstance(message.content, str) else ""
+    match = RESPONSE_PATTERN.search(content)
+    body = (match.group(1) if match else content).strip()
+    if not body:
+        return f"{agent_name} returned an empty response"
+    if FAILURE_PATTERN.match(body):
+        return f"{agent_name} reported a failure"
+    return None
+
+
+def follow_plan(state: State) -> Optional[Command]:
+    """
+    按计划确定下一个代理
+
+    Args:
+        state: 监督节点收到的状态
+
+    Returns:
+        跳转到下一个计划步骤（或结束工作流）的Command；需要由监督LLM决策时返回None
+    """
+    steps = parse_plan_steps(state.get("full_plan", ""))
+    if steps is None:
+        logger.warning("Plan cannot be followed, asking the supervisor")
+        return None
+    cursor = state.get("plan_cursor") or 0
+    if cursor > 0:
+        issue = step_issue(state["messages"][-1], steps[cursor - 1]["agent_name"])
+        if issue is not None:
+            logger.warning(
+                f"Step {cursor} needs review ({issue}), asking the supervisor"
+            )
+            return None
+    if cursor >= len(steps):
+        logger.info("All plan steps completed, workflow completed")
+        return Command(goto="__end__", update={"next": "__end__"})
+    goto = steps[cursor]["agent_name"]
+    logger.info(f"Following plan step {cursor + 1}/{len(steps)}: {goto}")
+    return Command(goto=goto, update={"next": goto, "plan_cursor": cursor + 1})
+
+
+def plan_update(state: State, goto: str) -> dict:
+    """
+    监督LLM做出决策后更新计划游标
+
+    Args:
+        state: 监督节点收到的状态
+        goto: 监督LLM选择的下一节点
+
+    Returns:
+        需要写入状态的更新
+    """
+    steps = parse_plan_steps(state.get("full_plan", ""))
+    if steps is None:
+        return {"execution_mode": "sequential"}
+    cursor = state.get("plan_cursor") or 0
+    if goto == "__end__" or (cursor > 0 and goto == steps[cursor - 1]["agent_name"]):
+        # 结束工作流，或重试当前步骤
+        return {}
+    if cursor < len(steps) and goto == steps[cursor]["agent_name"]:
+        return {"plan_cursor": cursor + 1}
+    logger.info(f"Supervisor deviated from the plan ({goto}), following the supervisor")
+    return {"execution_mode": "sequential"}
@@ -0,0 +1,389 @@
+"""
+计划流解析模块 - 在规划节点生成计划的同时解析出已完成的步骤
+
+规划节点流式生成JSON计划，使用推理模型时整个计划可能需要数十秒才能生成完毕。
+该模块：
+1. 增量解析Plan的JSON流，steps中的每个步骤一完整就立即返回，
+   忽略JSON之前的代码块标记，流格式异常时停止解析（计划仍按完整文本校验）
+2. 每个步骤解析出来后在后台执行该代理的预取函数（STEP_PREFETCHERS）：
+   创建代理、加载工具依赖、启动浏览器等，使计划完成后第一个步骤可以立即开始，
+   之后的步骤也不必等待初始化
+3. 其他代理的预取函数可以通过register_prefetcher注册
+4. 按计划执行模式下，异步规划节点在第一个步骤解析出来后立即推测执行该步骤
+   （StepSpeculation），不再等待计划生成完毕；计划完成且第一个步骤不变时交给
+   工作流，由代理节点领取并等待其完成，计划作废或第一个步骤改变时取消
+"""
+
+import asyncio
+import contextvars
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Awaitable, Callable, Optional
+
+from langchain_core.callbacks import adispatch_custom_event
+from langchain_core.messages import HumanMessage
+from langchain_core.runnables import ensure_config
+
+from src.agents import get_agent
+from src.config.agents import (
+    PLANNER_SPECULATIVE_AGENTS,
+    PLANNER_SPECULATIVE_FIRST_STEP,
+)
+
+from .executor import parse_plan_steps, step_instruction
+from .types import State
+
+logger = logging.getLogger(__name__)
+
+
+class PlanStreamParser:
+    """
+    Plan JSON流的增量解析器：逐块输入文本，返回其中新完成的步骤
+    """
+
+    def __init__(self, on_step: Optional[Callable[[int, dict], None]] = None):
+        """
+        初始化解析器
+
+        Args:
+            on_step: 每解析出一个步骤时调用，参数为步骤编号（从0开始）和步骤
+        """
+        self.on_step = on_step
+        self.steps: list[dict] = []  # 已解析出的步骤
+        self.failed = False  # 流格式异常，已停止解析
+        self.done = False  # 顶层JSON对象已结束
+        self._text = ""
+        self._pos = 0
+        self._stack: list[str] = []  # 未闭合的括号
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_string: Optional[str] = None  # 顶层对象中最近的字符串（原始文本）
+        self._key: Optional[str] = None  # 顶层对象中当前值对应的键
+        self._in_steps = False  # 是否位于steps数组中
+        self._step_start: Optional[int] = None  # 当前步骤对象的起始位置
+        self._object_start = 0  # 顶层对象的起始位置
+        self._step_end = 0  # 最近完成的步骤对象的结束位置
+
+    def feed(self, chunk: str) -> list[dict]:
+        """
+        输入一块流式文本
+
+        Args:
+            chunk: LLM输出的下一块文本
+
+        Returns:
+            本块中新完成的步骤
+        """
+        if self.failed or self.done:
+            return []
+        self._text += chunk
+        text = self._text
+        completed = []
+        for index in range(self._pos, len(text)):
+            char = text[index]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        self._last_string = text[self._string_start : index + 1]
+                continue
+            if not self._stack:
+                # 忽略顶层对象之前的内容（如```json代码块标记）
+                if char == "{":
+                    self._object_start = index
+                    self._stack.append(char)
+                continue
+            if char == '"':
+                self._in_string = True
+                self._string_start = index
+            elif char == ":" and len(self._stack) == 1:
+                self._key = self._last_string
+            elif char in "{[":
+                if char == "[" and len(self._stack) == 1 and self._key == '"steps"':
+                    self._in_steps = True
+                elif char == "{" and self._in_steps and len(self._stack) == 2:
+                    self._step_start = index
+                self._stack.append(char)
+            elif char in "}]":
+                if self._stack.pop() != ("{" if char == "}" else "["):
+                    self._fail("mismatched brackets")
+                    break
+                if len(self._stack) == 2 and self._step_start is not None:
+                    self._step_end = index + 1
+                    step = self._parse_step(text[self._step_start : index + 1])
+                    self._step_start = None
+                    if step is None:
+                        break
+                    completed.append(step)
+                elif len(self._stack) == 1:
+                    self._in_steps = False
+                elif not self._stack:
+                    self.done = True
+                    break
+        self._pos = len(text)
+        return completed
+
+    def partial_plan(self) -> Optional[str]:
+        """
+        截至最近完成的步骤的计划文本，补全steps数组和顶层对象的结尾
+
+        Returns:
+            JSON文本；还没有完成的步骤时返回None
+        """
+        if not self.steps:
+            return None
+        return self._text[self._object_start : self._step_end] + "]}"
+
+    def _parse_step(self, source: str) -> Optional[dict]:
+        """解析一个完整的步骤对象并通知回调"""
+        try:
+            step = json.loads(source)
+        except json.JSONDecodeError:
+            self._fail("invalid step")
+            return None
+        self.steps.append(step)
+        if self.on_step is not None:
+            self.on_step(len(self.steps) - 1, step)
+        return step
+
+    def _fail(self, reason: str) -> None:
+        logger.debug(f"Stopped parsing the plan stream: {reason}")
+        self.failed = True
+
+
+def _prefetch_agent(step: dict) -> None:
+    """创建步骤对应的代理（同时加载其工具依赖）"""
+    get_agent(step["agent_name"])
+
+
+def _prefetch_browser(step: dict) -> None:
+    """创建浏览器代理，并提前加载browser_use和启动配置的浏览器"""
+    _prefetch_agent(step)
+    import browser_use  # noqa: F401
+
+    from src.tools.browser import get_browser
+
+    get_browser()
+
+
+# 代理名称到预取函数的映射，计划中出现该代理的步骤时在后台调用（每个进程每个代理一次）
+STEP_PREFETCHERS: dict[str, Callable[[dict], None]] = {
+    "researcher": _prefetch_agent,
+    "coder": _prefetch_agent,
+    "browser": _prefetch_browser,
+}
+
+_prefetched: set[str] = set()
+_prefetch_lock = threading.Lock()
+_prefetch_executor: Optional[ThreadPoolExecutor] = None
+
+
+def register_prefetcher(agent_name: str, prefetcher: Callable[[dict], None]) -> None:
+    """
+    注册代理的预取函数
+
+    Args:
+        agent_name: 代理名称
+        prefetcher: 接收计划步骤的函数，在后台线程中调用
+    """
+    STEP_PREFETCHERS[agent_name] = prefetcher
+
+
+def _run_prefetcher(prefetcher: Callable[[dict], None], step: dict) -> None:
+    try:
+        prefetcher(step)
+    except Exception as e:
+        # 预取失败不影响工作流，代理会在执行步骤时正常初始化
+        logger.warning(f"Prefetch for {step['agent_name']} failed: {e!r}")
+
+
+def prefetch_step(index: int, step: dict) -> None:
+    """
+    在后台执行计划步骤对应代理的预取函数
+
+    Args:
+        index: 步骤编号（从0开始）
+        step: 计划步骤
+    """
+    global _prefetch_executor
+    agent_name = step.get("agent_name") if isinstance(step, dict) else None
+    prefetcher = STEP_PREFETCHERS.get(agent_name)
+    logger.info(f"Plan step {index + 1} ready while planning: {agent_name}")
+    if prefetcher is None:
+        return
+    with _prefetch_lock:
+        if agent_name in _prefetched:
+            return
+        _prefetched.add(agent_name)
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(
+                max_workers=2, thread_name_prefix="plan-prefetch"
+            )
+    _prefetch_executor.submit(_run_prefetcher, prefetcher, step)
+
+
+# 推测执行的步骤在运行配置的metadata中带有该键，值为步骤的令牌
+SPECULATIVE_STEP_KEY = "speculative_step"
+# 推测执行被丢弃时规划节点发出的自定义事件名称（供前端结束该代理的展示）
+SPECULATIVE_STEP_DISCARDED_EVENT = "speculative_step_discarded"
+
+# 已交给工作流的推测执行步骤：令牌到代理名称、任务和交接时间的映射，由代理节点领取
+_handed_over: dict[str, tuple[str, asyncio.Task, float]] = {}
+# 交接后超过该时间（秒）仍未被领取的步骤（如工作流在交接后被取消）被取消并清除
+_HANDOVER_TTL = 600.0
+
+
+def _should_speculate(state: State, index: int, step: dict) -> bool:
+    return bool(
+        PLANNER_SPECULATIVE_FIRST_STEP
+        and state.get("execution_mode") == "planned"
+        and index == 0
+        and isinstance(step, dict)
+        and step.get("agent_name") in PLANNER_SPECULATIVE_AGENTS
+    )
+
+
+class StepSpeculation:
+    """
+    异步规划节点中第一个步骤的推测执行
+
+    代理作为当前事件循环中的任务运行，使用规划节点的回调，但运行名称和metadata
+    改为该代理（checkpoint_ns以代理名称开头），其LLM和工具事件与正常的代理节点一样
+    流向前端。计划完成且第一个步骤不变时通过handover交给工作流，由代理节点领取
+    （adopt_step）并等待其完成，规划节点不等待该步骤；否则取消任务，代理在下一个
+    await处停止。同步规划节点只预取代理，不推测执行。
+    """
+
+    def __init__(
+        self, state: State, run_agent: Callable[[str, State, dict], Awaitable[str]]
+    ):
+        """
+        初始化推测执行，需要在规划节点的运行上下文中调用
+
+        Args:
+            state: 规划节点收到的状态
+            run_agent: 运行代理并返回其输出的协程函数，参数为代理名称、状态和运行配置
+        """
+        self._state = state
+        self._run_agent = run_agent
+        # 规划节点的回调，推测执行的代理作为规划节点的子运行上报事件
+        self._callbacks = ensure_config().get("callbacks")
+        self._parser = PlanStreamParser(on_step=self._on_step)
+        self._task: Optional[asyncio.Task] = None
+        self._token: Optional[str] = None
+        self.step: Optional[dict] = None  # 推测执行的步骤
+
+    def feed(self, chunk: str) -> None:
+        """
+        输入一块流式计划文本，解析出步骤后预取代理并按条件开始推测执行
+
+        Args:
+            chunk: LLM输出的下一块文本
+        """
+        self._parser.feed(chunk)
+
+    def _on_step(self, index: int, step: dict) -> None:
+        prefetch_step(index, step)
+        if not _should_speculate(self._state, index, step):
+            return
+        agent_name = step["agent_name"]
+        logger.info(f"Speculatively starting plan step 1: {agent_name}")
+        self.step = step
+        self._token = uuid.uuid4().hex
+        config = {
+            "callbacks": self._callbacks,
+            "run_name": agent_name,
+            "metadata": {
+                "langgraph_node": agent_name,
+                "checkpoint_ns": f"{agent_name}:{self._token}",
+                SPECULATIVE_STEP_KEY: self._token,
+            },
+        }
+        # 在空的上下文中运行，代理不会继承规划节点的LangGraph内部配置
+        self._task = asyncio.create_task(
+            self._run_agent(agent_name, self._step_state(step), config),
+            context=contextvars.Context(),
+        )
+
+    def _step_state(self, step: dict) -> State:
+        """推测执行时代理收到的状态：已生成部分的计划和第一个步骤的说明"""
+        return {
+            **self._state,
+            "messages": self._state["messages"]
+            + [
+                HumanMessage(content=self._parser.partial_plan(), name="planner"),
+                HumanMessage(content=step_instruction(0, step)),
+            ],
+        }
+
+    async def handover(self, full_plan: str) -> dict:
+        """
+        计划生成完毕后把推测执行的步骤交给工作流
+
+        Args:
+            full_plan: 完整的计划
+
+        Returns:
+            写入状态的更新；第一个步骤已改变时取消推测执行并返回空的更新
+        """
+        if self._task is None:
+            return {}
+        if not _is_first_step(full_plan, self.step):
+            await self.cancel()
+            return {}
+        now = time.monotonic()
+        for token, (_, task, handed_over_at) in list(_handed_over.items()):
+            if now - handed_over_at > _HANDOVER_TTL:
+                task.cancel()
+                del _handed_over[token]
+        _handed_over[self._token] = (self.step["agent_name"], self._task, now)
+        return {SPECULATIVE_STEP_KEY: self._token}
+
+    async def cancel(self) -> None:
+        """取消推测执行，并通知前端结束该代理的展示"""
+        if self._task is None or self._task.done():
+            return
+        logger.info("Discarding the speculative plan step 1")
+        self._task.cancel()
+        await adispatch_custom_event(
+            SPECULATIVE_STEP_DISCARDED_EVENT,
+            {"agent_name": self.step["agent_name"], "token": self._token},
+        )
+
+
+async def adopt_step(state: State, agent_name: str) -> Optional[str]:
+    """
+    代理节点领取规划节点推测执行的步骤，等待其完成
+
+    Args:
+        state: 代理节点收到的状态
+        agent_name: 代理名称
+
+    Returns:
+        推测执行的输出；没有可领取的步骤或推测执行失败时返回None，由代理节点正常执行
+    """
+    token = state.get(SPECULATIVE_STEP_KEY)
+    if token is None or _handed_over.get(token, (None,))[0] != agent_name:
+        return None
+    _, task, _ = _handed_over.pop(token)
+    try:
+        # 代理节点被取消时，推测执行的任务随之取消
+        return await task
+    except Exception as e:
+        logger.warning(f"Speculative plan step 1 failed, running it again: {e!r}")
+        return None
+
+
+def _is_first_step(full_plan: str, step: Optional[dict]) -> bool:
+    """完整计划是否有效且第一个步骤与推测执行的步骤相同"""
+    steps = parse_plan_steps(full_plan)
+    return steps is not None and steps[0] == step
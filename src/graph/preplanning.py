@@ -0,0 +1,160 @@
+"""
+规划前准备模块 - 在协调节点运行的同时提前开始规划节点的准备工作
+
+协调节点、规划前搜索和规划节点的首次LLM请求原本依次执行，而规划前搜索只依赖
+用户的任务，不依赖协调节点的回复。该模块：
+1. 协调节点调用LLM的同时开始规划前搜索（search_before_planning开启时）
+2. 深度思考模式下同时预热规划节点使用的推理模型连接，协调节点使用的是基础模型，
+   规划节点的首次请求不必再等待建立连接
+3. 协调节点移交给规划节点时，搜索结果写入状态的planning_search_results，
+   规划节点直接使用；协调节点结束工作流时取消尚未完成的准备工作，结果被丢弃
+"""
+
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional
+
+from src.agents.llm import awarm_up_llm, warm_up_llm
+from src.config.agents import (
+    PLANNING_SPECULATIVE_SEARCH,
+    PLANNING_WARM_UP,
+    PLANNING_WARM_UP_TIMEOUT,
+)
+
+from .types import State
+
+logger = logging.getLogger(__name__)
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# 移交后仍在运行的异步预热任务，保留引用以免被垃圾回收
+_background_tasks: set[asyncio.Task] = set()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="preplanning"
+            )
+        return _executor
+
+
+def _search(query: str):
+    # 搜索工具在首次使用时才加载
+    from src.tools.search import tavily_tool
+
+    return tavily_tool.invoke({"query": query})
+
+
+async def _asearch(query: str):
+    from src.tools.search import tavily_tool
+
+    return await tavily_tool.ainvoke({"query": query})
+
+
+def _should_search(state: State) -> bool:
+    return bool(PLANNING_SPECULATIVE_SEARCH and state.get("search_before_planning"))
+
+
+def _should_warm_up(state: State) -> bool:
+    return bool(PLANNING_WARM_UP and state.get("deep_thinking_mode"))
+
+
+def _search_update(search_results) -> dict:
+    """生成写入状态的搜索结果，结果为None时规划节点自行搜索"""
+    return {"planning_search_results": search_results}
+
+
+class PlanningPreparation:
+    """
+    规划前准备的同步版本，准备工作在后台线程中执行
+    """
+
+    def __init__(self, state: State):
+        """
+        按状态中的配置开始规划前准备
+
+        Args:
+            state: 当前工作流状态
+        """
+        self._search: Optional[Future] = None
+        self._warm_up: Optional[Future] = None
+        if _should_search(state):
+            self._search = _get_executor().submit(
+                _search, state["messages"][-1].content
+            )
+        if _should_warm_up(state):
+            self._warm_up = _get_executor().submit(
+                warm_up_llm, "planner", "reasoning", PLANNING_WARM_UP_TIMEOUT
+            )
+
+    def result(self) -> dict:
+        """
+        等待规划前搜索完成（预热不需要等待）
+
+        Returns:
+            写入状态的更新；搜索未开始或失败时planning_search_results为None
+        """
+        if self._search is None:
+            return _search_update(None)
+        try:
+            return _search_update(self._search.result())
+        except Exception as e:
+            logger.warning(f"Search before planning failed: {e!r}")
+            return _search_update(None)
+
+    def cancel(self) -> None:
+        """取消尚未开始的准备工作，已在执行的搜索完成后结果被丢弃"""
+        for future in (self._search, self._warm_up):
+            if future is not None:
+                future.cancel()
+
+
+class AsyncPlanningPreparation:
+    """
+    规划前准备的异步版本，准备工作作为当前事件循环中的任务执行
+    """
+
+    def __init__(self, state: State):
+        """
+        按状态中的配置开始规划前准备，需要在事件循环中调用
+
+        Args:
+            state: 当前工作流状态
+        """
+        self._search: Optional[asyncio.Task] = None
+        self._warm_up: Optional[asyncio.Task] = None
+        if _should_search(state):
+            self._search = asyncio.create_task(_asearch(state["messages"][-1].content))
+        if _should_warm_up(state):
+            self._warm_up = asyncio.create_task(
+                awarm_up_llm("planner", "reasoning", PLANNING_WARM_UP_TIMEOUT)
+            )
+
+    async def result(self) -> dict:
+        """
+        等待规划前搜索完成，预热任务在后台继续执行
+
+        Returns:
+            写入状态的更新；搜索未开始或失败时planning_search_results为None
+        """
+        if self._warm_up is not None:
+            _background_tasks.add(self._warm_up)
+            self._warm_up.add_done_callback(_background_tasks.discard)
+        if self._search is None:
+            return _search_update(None)
+        try:
+            return _search_update(await self._search)
+        except Exception as e:
+            logger.warning(f"Search before planning failed: {e!r}")
+            return _search_update(None)
+
+    def cancel(self) -> None:
+        """取消所有准备工作"""
+        for task in (self._search, self._warm_up):
+            if task is not None:
+                task.cancel()
@@ -1,4 +1,4 @@
-from typing import Literal
+from typing import Annotated, Literal, Optional
 from typing_extensions import TypedDict
 from langgraph.graph import MessagesState
 
@@ -8,11 +8,15 @@ from src.config import TEAM_MEMBERS
 # 选项包括所有团队成员名称和一个FINISH标记，表示工作流结束
 OPTIONS = TEAM_MEMBERS + ["FINISH"]
 
+# 定义代理响应的格式模板
+# 包含代理名称和响应内容，并添加执行下一步的提示
+RESPONSE_FORMAT = "Response from {}:\n\n<response>\n{}\n</response>\n\n*Please execute the next step.*"
+
 
 class Router(TypedDict):
     """
     路由器类型，用于确定下一个处理节点
-    
+
     当工作流需要选择下一个执行的代理时，使用此类型指定目标
     如果不需要继续执行，可以路由到FINISH标记结束工作流
     """
@@ -20,10 +24,21 @@ class Router(TypedDict):
     next: Literal[*OPTIONS]  # 下一个执行节点的名称，必须是OPTIONS中的一个值
 
 
+def merge_step_results(
+    left: Optional[dict[int, str]], right: Optional[dict[int, str]]
+) -> dict[int, str]:
+    """
+    合并计划步骤的执行结果
+
+    并行执行的多个步骤在同一轮中分别写入自己的结果，按步骤编号合并。
+    """
+    return {**(left or {}), **(right or {})}
+
+
 class State(MessagesState):
     """
     代理系统的状态类型，继承自MessagesState并添加额外字段
-    
+
     MessagesState基类提供了消息历史管理功能
     State类添加了系统运行所需的各种状态变量
     """
@@ -32,7 +47,28 @@ class State(MessagesState):
     TEAM_MEMBERS: list[str]  # 团队成员列表，从配置中获取
 
     # 运行时变量
-    next: str                # 下一个执行节点的名称
-    full_plan: str           # 完整执行计划
-    deep_thinking_mode: bool # 是否启用深度思考模式
+    next: str  # 下一个执行节点的名称
+    full_plan: str  # 完整执行计划
+    deep_thinking_mode: bool  # 是否启用深度思考模式
     search_before_planning: bool  # 是否在规划前进行搜索
+    planning_search_results: Optional[
+        list | str
+    ]  # 与协调节点并行完成的规划前搜索结果，None表示由规划节点自行搜索
+    execution_mode: Literal[
+        "sequential", "planned", "parallel"
+    ]  # 计划执行模式：由监督逐步决策、按计划顺序执行，或按依赖关系并行执行
+
+    # 按计划执行模式的变量
+    plan_cursor: int  # 已分派的计划步骤数
+    # 规划节点推测执行并交给工作流的第一个步骤的令牌，由该步骤的代理节点领取
+    # （只有异步执行的规划节点设置）
+    speculative_step: Optional[str]
+
+    # 并行执行模式的变量
+    step_results: Annotated[
+        dict[int, str], merge_step_results
+    ]  # 各步骤（从0开始编号）的执行结果
+    merged_steps: list[int]  # 结果已合并到消息历史中的步骤
+    # 当前代理节点执行的步骤编号（从0开始），只由executor分派步骤时的Send参数设置，
+    # 不会写回共享状态；由监督或顺序计划调度时为None
+    current_step: Optional[int]
@@ -1,6 +1,7 @@
-from .template import apply_prompt_template, get_prompt_template
+from .template import apply_prompt_template, get_prompt_template, prompt_registry
 
 __all__ = [
     "apply_prompt_template",
     "get_prompt_template",
+    "prompt_registry",
 ]
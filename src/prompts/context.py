@@ -0,0 +1,120 @@
+"""
+上下文窗口管理模块 - 将发送给各节点的消息历史控制在Token预算内
+
+State.messages只会增长：每个代理的输出（包括完整的网页内容）都会追加到历史中，
+并随每次调用发送给监督、报告等节点。该模块在构建提示时：
+1. 使用本地Token计数（带缓存）计算消息历史的大小
+2. 按节点的Token预算（AGENT_CONTEXT_BUDGET）判断是否需要压缩
+3. 从最早的代理输出开始，压缩为与用户任务最相关的片段；仍然超出预算时
+   再替换为简短的引用说明
+4. 用户任务、计划、最近一步的代理输出以及代理自身的工具调用始终完整保留
+
+压缩结果按内容缓存，同一条输出在之后的调用中不会被重复压缩。
+"""
+
+import functools
+import re
+from typing import Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.config import TEAM_MEMBERS
+from src.config.agents import AGENT_CONTEXT_BUDGET, CONTEXT_COMPACT_TOKENS
+from src.utils.tokens import count_tokens
+
+# 代理输出中<response>标签内的正文（见src.graph.types.RESPONSE_FORMAT）
+RESPONSE_PATTERN = re.compile(r"<response>\n(.*)\n</response>", re.DOTALL)
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """计算一条消息正文的Token数，多模态内容只计算其中的文本"""
+    content = message.content
+    if isinstance(content, str):
+        return count_tokens(content)
+    return sum(
+        count_tokens(part.get("text", "") if isinstance(part, dict) else part)
+        for part in content
+    )
+
+
+@functools.lru_cache(maxsize=256)
+def _compact(name: str, content: str, query: str, budget: int) -> str:
+    """将一条代理输出压缩为与查询最相关的片段"""
+    # 爬虫模块在首次需要压缩时才加载
+    from src.crawler.compression import compress_text
+
+    match = RESPONSE_PATTERN.search(content)
+    body = match.group(1) if match else content
+    excerpt = compress_text(body, query, budget)
+    return (
+        f"Earlier response from {name} (compacted from ~{count_tokens(body)} tokens,"
+        f" only the parts most relevant to the task are kept):\n\n"
+        f"<response>\n{excerpt}\n</response>"
+    )
+
+
+def _reference(name: str, tokens: int) -> str:
+    """代理输出被完全省略时的引用说明"""
+    return (
+        f"[Earlier response from {name} omitted to fit the context window"
+        f" (~{tokens} tokens).]"
+    )
+
+
+def fit_messages(
+    node: str, messages: list[BaseMessage], budget: Optional[int] = None
+) -> list[BaseMessage]:
+    """
+    将消息历史压缩到节点的Token预算内
+
+    Args:
+        node: 节点（代理）名称，用于查找AGENT_CONTEXT_BUDGET中的预算
+        messages: 消息历史，不会被修改
+        budget: Token预算，默认使用节点的配置
+
+    Returns:
+        不超过预算的消息列表；无需压缩时返回原列表
+    """
+    if budget is None:
+        budget = AGENT_CONTEXT_BUDGET.get(node)
+    if budget is None:
+        return messages
+    sizes = [message_tokens(message) for message in messages]
+    total = sum(sizes)
+    if total <= budget:
+        return messages
+
+    # 可以压缩的消息：除最近一条以外的代理输出，从最早的开始
+    outputs = [
+        index
+        for index, message in enumerate(messages)
+        if message.type == "human"
+        and message.name in TEAM_MEMBERS
+        and isinstance(message.content, str)
+    ][:-1]
+    query = "\n".join(
+        message.content
+        for message in messages
+        if message.type == "human"
+        and message.name is None
+        and isinstance(message.content, str)
+    )
+    fitted = list(messages)
+    # 第一轮压缩为相关片段，第二轮替换为引用说明，每轮都从最早的输出开始
+    for stage in ("compact", "reference"):
+        for index in outputs:
+            if total <= budget:
+                return fitted
+            message = messages[index]
+            if stage == "compact":
+                content = _compact(
+                    message.name, message.content, query, CONTEXT_COMPACT_TOKENS
+                )
+            else:
+                content = _reference(message.name, sizes[index])
+            current = message_tokens(fitted[index])
+            tokens = count_tokens(content)
+            if tokens < current:
+                total -= current - tokens
+                fitted[index] = message.model_copy(update={"content": content})
+    return fitted
@@ -0,0 +1,75 @@
+"""
+提示前缀报告模块 - 检查各节点系统提示中可被服务商缓存的前缀长度
+
+服务商的提示前缀缓存只对完全相同的前缀生效，模板开头的任何易变内容都会使
+整个系统提示及其后的历史消息无法命中缓存。该模块：
+1. 在不同时间点渲染每个节点的系统提示，计算其中保持不变的前缀长度
+2. 分别报告同一天内的连续调用之间、跨天的调用之间可缓存的前缀长度
+
+用法：python -m src.prompts.prefix_report
+"""
+
+import os
+from datetime import datetime, timedelta
+from typing import Optional
+
+from src.config import TEAM_MEMBERS
+
+from .template import render_system_prompt
+
+
+def list_prompt_names() -> list[str]:
+    """列出prompts目录下的所有模板名称"""
+    directory = os.path.dirname(__file__)
+    return sorted(
+        name[: -len(".md")] for name in os.listdir(directory) if name.endswith(".md")
+    )
+
+
+def common_prefix_length(first: str, second: str) -> int:
+    """计算两个字符串的公共前缀长度"""
+    return len(os.path.commonprefix([first, second]))
+
+
+def prefix_report(now: Optional[datetime] = None) -> list[dict]:
+    """
+    生成各节点系统提示的前缀缓存报告
+
+    Args:
+        now: 作为第一次调用时间的基准时间，默认为当前时间
+
+    Returns:
+        每个节点的报告，包含系统提示长度、同一天内和跨天可缓存的前缀长度（字符数）
+    """
+    # 第一次调用放在当天开始后一分钟，第二次调用分别在一小时后和一天后
+    first = (now or datetime.now()).replace(hour=0, minute=1, second=0, microsecond=0)
+    state = {"TEAM_MEMBERS": TEAM_MEMBERS, "messages": []}
+    report = []
+    for name in list_prompt_names():
+        prompt = render_system_prompt(name, state, first)
+        same_day = render_system_prompt(name, state, first + timedelta(hours=1))
+        next_day = render_system_prompt(name, state, first + timedelta(days=1))
+        report.append(
+            {
+                "node": name,
+                "length": len(prompt),
+                "same_day_prefix": common_prefix_length(prompt, same_day),
+                "next_day_prefix": common_prefix_length(prompt, next_day),
+            }
+        )
+    return report
+
+
+def main() -> None:
+    """打印前缀缓存报告"""
+    print(f"{'node':<14}{'length':>8}{'same day':>10}{'next day':>10}")
+    for row in prefix_report():
+        print(
+            f"{row['node']:<14}{row['length']:>8}"
+            f"{row['same_day_prefix']:>10}{row['next_day_prefix']:>10}"
+            f"  ({row['next_day_prefix'] / row['length']:.0%} cacheable across days)"
+        )
+
+
+if __name__ == "__main__":
+    main()
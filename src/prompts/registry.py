@@ -0,0 +1,164 @@
+"""
+提示模板注册表模块 - 一次加载并预编译所有提示模板
+
+每次监督决策和代理的每一轮ReAct迭代都需要渲染提示，该模块避免在每次调用时
+重新读取文件和处理模板：
+1. 启动时加载prompts目录下的所有模板，转换占位符并编译为PromptTemplate
+2. 加载时校验模板引用的变量，渲染前校验状态中是否提供了所需变量
+3. 开发模式下（PROMPT_RELOAD）根据文件修改时间自动重新加载模板
+4. 为每个模板版本提供内容哈希，可用于缓存键和调用追踪
+"""
+
+import hashlib
+import os
+import re
+import threading
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from langchain_core.prompts import PromptTemplate
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    """
+    编译后的提示模板
+    """
+
+    name: str  # 模板名称（不包含.md后缀）
+    template: PromptTemplate  # 编译后的模板
+    variables: frozenset[str]  # 模板引用的变量
+    content_hash: str  # 模板文件内容的哈希，模板修改后随之变化
+    mtime: float  # 加载时模板文件的修改时间
+
+    def render(self, **values) -> str:
+        """
+        用给定的变量渲染模板
+
+        Raises:
+            ValueError: 当缺少模板需要的变量时抛出
+        """
+        missing = self.variables - values.keys()
+        if missing:
+            raise ValueError(
+                f"Prompt {self.name} is missing variables: {', '.join(sorted(missing))}"
+            )
+        return self.template.format(**values)
+
+
+def compile_prompt(source: str) -> str:
+    """
+    将Markdown模板转换为PromptTemplate格式
+
+    1. 将普通花括号转义，以避免与模板变量冲突
+    2. 将特殊标记 <<VAR>> 转换为模板变量格式 {VAR}
+
+    Args:
+        source: 模板文件内容
+
+    Returns:
+        处理后的模板字符串
+    """
+    # 转义花括号，避免与模板变量冲突
+    template = source.replace("{", "{{").replace("}", "}}")
+    # 将 <<VAR>> 格式替换为模板变量格式 {VAR}
+    return re.sub(r"<<([^>>]+)>>", r"{\1}", template)
+
+
+class PromptRegistry:
+    """
+    提示模板注册表：按名称获取预编译的模板
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        reload: bool = False,
+        known_variables: Optional[Iterable[str]] = None,
+    ):
+        """
+        初始化注册表并加载目录下的所有模板
+
+        Args:
+            directory: 模板所在目录
+            reload: 是否在模板文件修改后自动重新加载（开发模式）
+            known_variables: 模板可以引用的变量，None表示不校验
+
+        Raises:
+            ValueError: 当模板引用了未知变量时抛出
+        """
+        self.directory = directory
+        self.reload = reload
+        self.known_variables = (
+            frozenset(known_variables) if known_variables is not None else None
+        )
+        self._prompts: dict[str, CompiledPrompt] = {}
+        self._lock = threading.Lock()
+        for filename in sorted(os.listdir(directory)):
+            if filename.endswith(".md"):
+                self._load(filename[: -len(".md")])
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, f"{name}.md")
+
+    def _load(self, name: str) -> CompiledPrompt:
+        """读取、校验并编译一个模板"""
+        path = self._path(name)
+        mtime = os.stat(path).st_mtime
+        with open(path, encoding="utf-8") as f:
+            source = f.read()
+        template = PromptTemplate.from_template(compile_prompt(source))
+        variables = frozenset(template.input_variables)
+        if self.known_variables is not None:
+            unknown = variables - self.known_variables
+            if unknown:
+                raise ValueError(
+                    f"Prompt {name} uses unknown variables: {', '.join(sorted(unknown))}"
+                )
+        prompt = CompiledPrompt(
+            name=name,
+            template=template,
+            variables=variables,
+            content_hash=hashlib.sha256(source.encode("utf-8")).hexdigest()[:12],
+            mtime=mtime,
+        )
+        with self._lock:
+            self._prompts[name] = prompt
+        return prompt
+
+    def get(self, name: str) -> CompiledPrompt:
+        """
+        获取编译后的模板
+
+        Args:
+            name: 模板名称（不包含.md后缀）
+
+        Returns:
+            编译后的模板
+
+        Raises:
+            KeyError: 当模板不存在时抛出
+        """
+        prompt = self._prompts.get(name)
+        if not self.reload:
+            if prompt is None:
+                raise KeyError(f"Unknown prompt: {name}")
+            return prompt
+        # 开发模式：文件新增或修改后重新加载
+        try:
+            mtime = os.stat(self._path(name)).st_mtime
+        except FileNotFoundError:
+            raise KeyError(f"Unknown prompt: {name}") from None
+        if prompt is None or mtime != prompt.mtime:
+            prompt = self._load(name)
+        return prompt
+
+    def versions(self) -> dict[str, str]:
+        """
+        获取所有已加载模板的内容哈希
+
+        Returns:
+            模板名称到内容哈希的映射
+        """
+        with self._lock:
+            return {name: prompt.content_hash for name, prompt in self._prompts.items()}
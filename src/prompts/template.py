@@ -1,58 +1,104 @@
 import os
-import re
 from datetime import datetime
+from typing import Optional
 
-from langchain_core.prompts import PromptTemplate
 from langgraph.prebuilt.chat_agent_executor import AgentState
 
+from src.config import PROMPT_RELOAD
+
+from .context import fit_messages
+from .registry import PromptRegistry
+from .views import project_messages
+
+# 提示中当前时间的格式：只精确到天。时间放在模板末尾且同一天内保持不变，
+# 系统提示和其后的历史消息才能命中服务商的提示前缀缓存
+CURRENT_TIME_FORMAT = "%a %b %d %Y"
+
+# 模板可以引用的变量：当前时间，以及工作流状态和代理状态中的字段
+PROMPT_VARIABLES = frozenset(
+    {
+        "CURRENT_TIME",
+        "TEAM_MEMBERS",
+        "next",
+        "full_plan",
+        "deep_thinking_mode",
+        "search_before_planning",
+        *AgentState.__annotations__,
+    }
+)
+
+# 启动时加载并编译prompts目录下的所有模板
+prompt_registry = PromptRegistry(
+    os.path.dirname(__file__), reload=PROMPT_RELOAD, known_variables=PROMPT_VARIABLES
+)
+
 
 def get_prompt_template(prompt_name: str) -> str:
     """
     获取指定名称的提示模板内容
-    
-    该函数从prompts目录下读取对应名称的Markdown文件，并进行模板格式处理：
+
+    模板在启动时由prompt_registry读取并完成格式处理：
     1. 将普通花括号转义，以避免与模板变量冲突
     2. 将特殊标记 <<VAR>> 转换为模板变量格式 {VAR}
-    
+
     Args:
         prompt_name: 提示模板名称（不包含.md后缀）
-        
+
     Returns:
         处理后的模板字符串
     """
-    # 读取模板文件
-    template = open(os.path.join(os.path.dirname(__file__), f"{prompt_name}.md")).read()
-    # 转义花括号，避免与模板变量冲突
-    template = template.replace("{", "{{").replace("}", "}}")
-    # 将 <<VAR>> 格式替换为模板变量格式 {VAR}
-    template = re.sub(r"<<([^>>]+)>>", r"{\1}", template)
-    return template
+    return prompt_registry.get(prompt_name).template.template
+
+
+def render_system_prompt(
+    prompt_name: str, state: AgentState, now: Optional[datetime] = None
+) -> str:
+    """
+    将当前时间和状态变量填充到模板中，生成系统提示
+
+    Args:
+        prompt_name: 提示模板名称
+        state: 代理的当前状态
+        now: 填入模板的时间，默认为当前时间
+
+    Returns:
+        系统提示内容
+
+    Raises:
+        ValueError: 当状态中缺少模板需要的变量时抛出
+    """
+    # 使用预编译的模板进行变量替换
+    return prompt_registry.get(prompt_name).render(
+        CURRENT_TIME=(now or datetime.now()).strftime(CURRENT_TIME_FORMAT),  # 当前日期
+        **state,  # 展开状态中的所有变量
+    )
 
 
 def apply_prompt_template(prompt_name: str, state: AgentState) -> list:
     """
     应用提示模板，将当前状态填充到模板中并构建完整的消息列表
-    
+
     该函数执行以下步骤：
     1. 获取模板内容
     2. 将当前时间和状态变量填充到模板中
     3. 创建系统提示消息
-    4. 将系统提示与历史消息合并
-    
+    4. 按代理的消息视图投影历史消息，超出节点的Token预算时压缩较早的代理输出
+    5. 将系统提示与历史消息合并
+
+    静态的指令在前、历史消息在后，易变的当前时间放在系统提示末尾且只精确到天，
+    使连续调用（如每一步的监督决策）之间的消息前缀保持不变。
+
     Args:
         prompt_name: 提示模板名称
         state: 代理的当前状态，包含消息历史和其他状态变量
-        
+
     Returns:
         完整的消息列表，包含系统提示和历史消息
     """
-    # 使用PromptTemplate进行变量替换
-    system_prompt = PromptTemplate(
-        input_variables=["CURRENT_TIME"],  # 定义模板中的变量
-        template=get_prompt_template(prompt_name),  # 获取模板内容
-    ).format(
-        CURRENT_TIME=datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),  # 当前时间格式化
-        **state  # 展开状态中的所有变量
+    system_prompt = render_system_prompt(prompt_name, state)
+    # 按代理的消息视图投影历史消息，超出节点的Token预算时再压缩较早的代理输出
+    messages = fit_messages(
+        prompt_name, project_messages(prompt_name, state["messages"])
     )
     # 返回系统提示消息和历史消息的组合
-    return [{"role": "system", "content": system_prompt}] + state["messages"]
+    return [{"role": "system", "content": system_prompt}] + messages
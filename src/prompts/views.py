@@ -0,0 +1,158 @@
+"""
+消息视图模块 - 为每个代理投影出它需要的消息历史
+
+工作流的所有节点共享同一份消息历史，但各代理需要的内容不同：编码代理不需要
+研究代理抓取的原始网页，监督只需要每一步的简短结果。该模块：
+1. 按AGENT_MESSAGE_VIEWS中的配置，根据消息发送者决定是否包含、保留多少Token、
+   是否保留图片
+2. 截断代理输出时保留RESPONSE_FORMAT的外层格式，并注明截断前的长度
+3. 按消息ID缓存每条消息的投影结果，历史增长时只处理新增的消息
+
+投影只作用于用户消息和代理输出（HumanMessage），代理自身的工具调用消息原样保留。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from langchain_core.messages import BaseMessage
+
+from src.config.agents import AGENT_MESSAGE_VIEWS
+from src.utils.tokens import count_tokens, truncate_tokens
+
+from .context import RESPONSE_PATTERN
+
+# 缓存中表示"该消息不包含在视图中"的标记
+_EXCLUDED = object()
+
+
+def _truncate(text: str, max_tokens: int) -> str:
+    """截断文本并注明截断前的长度，代理输出只截断<response>标签内的正文"""
+    match = RESPONSE_PATTERN.search(text)
+    body = match.group(1) if match else text
+    tokens = count_tokens(body)
+    if tokens <= max_tokens:
+        return text
+    truncated = (
+        f"{truncate_tokens(body, max_tokens)}\n"
+        f"[... truncated, showing ~{max_tokens} of ~{tokens} tokens]"
+    )
+    if not match:
+        return truncated
+    return text[: match.start(1)] + truncated + text[match.end(1) :]
+
+
+class MessageView:
+    """
+    一个代理的消息视图：按发送者投影消息，并缓存每条消息的投影结果
+    """
+
+    def __init__(self, spec: dict[str, dict], max_cached: int = 4096):
+        """
+        初始化消息视图
+
+        Args:
+            spec: 发送者到投影规则（include、max_tokens、images）的映射，
+                "user"表示用户消息，"*"表示未列出的发送者
+            max_cached: 最多缓存的消息投影数
+        """
+        self.spec = spec
+        self.max_cached = max_cached
+        self._cache: OrderedDict[str, object] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _rule(self, message: BaseMessage) -> Optional[dict]:
+        """查找消息适用的投影规则，不需要投影时返回None"""
+        if message.type != "human":
+            return None
+        sender = message.name or "user"
+        return self.spec.get(sender, self.spec.get("*"))
+
+    def _project_one(self, message: BaseMessage, rule: dict) -> object:
+        """投影一条消息，不包含时返回_EXCLUDED，无需修改时返回原消息"""
+        if not rule.get("include", True):
+            return _EXCLUDED
+        max_tokens = rule.get("max_tokens")
+        content = message.content
+        if isinstance(content, str):
+            if max_tokens is None:
+                return message
+            projected = _truncate(content, max_tokens)
+        else:
+            projected = []
+            remaining = max_tokens
+            for part in content:
+                if isinstance(part, dict) and part.get("type") == "image_url":
+                    if rule.get("images", True):
+                        projected.append(part)
+                    continue
+                text = part.get("text", "") if isinstance(part, dict) else part
+                if remaining is not None:
+                    if remaining <= 0:
+                        continue
+                    truncated = _truncate(text, remaining)
+                    remaining -= count_tokens(text)
+                    text = truncated
+                projected.append({"type": "text", "text": text})
+        if projected == content:
+            return message
+        return message.model_copy(update={"content": projected})
+
+    def project(self, messages: list[BaseMessage]) -> list[BaseMessage]:
+        """
+        投影消息历史
+
+        Args:
+            messages: 完整的消息历史，不会被修改
+
+        Returns:
+            该代理看到的消息列表
+        """
+        projected = []
+        for message in messages:
+            rule = self._rule(message)
+            if rule is None:
+                projected.append(message)
+                continue
+            if message.id is None:
+                result = self._project_one(message, rule)
+            else:
+                with self._lock:
+                    result = self._cache.get(message.id)
+                    if result is not None:
+                        self._cache.move_to_end(message.id)
+                if result is None:
+                    result = self._project_one(message, rule)
+                    with self._lock:
+                        self._cache[message.id] = result
+                        while len(self._cache) > self.max_cached:
+                            self._cache.popitem(last=False)
+            if result is not _EXCLUDED:
+                projected.append(result)
+        return projected
+
+
+# 已创建的代理消息视图
+_views: dict[str, MessageView] = {}
+_views_lock = threading.Lock()
+
+
+def project_messages(agent: str, messages: list[BaseMessage]) -> list[BaseMessage]:
+    """
+    按AGENT_MESSAGE_VIEWS投影代理看到的消息历史
+
+    Args:
+        agent: 代理名称
+        messages: 完整的消息历史
+
+    Returns:
+        该代理看到的消息列表；代理没有配置视图时返回原列表
+    """
+    spec = AGENT_MESSAGE_VIEWS.get(agent)
+    if not spec:
+        return messages
+    view = _views.get(agent)
+    if view is None:
+        with _views_lock:
+            view = _views.setdefault(agent, MessageView(spec))
+    return view.project(messages)
@@ -1,9 +1,11 @@
 import logging
 
 from src.config import TEAM_MEMBERS
-from src.graph import build_graph
+from src.graph import build_graph, create_checkpointer
+from src.graph.plan_stream import SPECULATIVE_STEP_DISCARDED_EVENT, SPECULATIVE_STEP_KEY
 from langchain_community.adapters.openai import convert_message_to_dict
 import uuid
+from typing import Optional
 
 # Configure logging
 # 配置日志
@@ -23,9 +25,9 @@ def enable_debug_logging():
 
 logger = logging.getLogger(__name__)
 
-# Create the graph
-# 创建工作流图
-graph = build_graph()
+# Create the graph, checkpointed so runs can be resumed by workflow_id
+# 创建工作流图，保存检查点以便按workflow_id恢复运行
+graph = build_graph(checkpointer=create_checkpointer())
 
 # Cache for coordinator messages
 # 协调器消息缓存
@@ -38,6 +40,8 @@ async def run_agent_workflow(
     debug: bool = False,
     deep_thinking_mode: bool = False,
     search_before_planning: bool = False,
+    execution_mode: str = "sequential",
+    workflow_id: Optional[str] = None,
 ):
     """
     Run the agent workflow with the given user input.
@@ -47,30 +51,63 @@ async def run_agent_workflow(
         debug: If True, enables debug level logging
         deep_thinking_mode: If True, enables deep thinking mode
         search_before_planning: If True, performs search before planning
+        execution_mode: "sequential" lets the supervisor pick one agent at a time,
+            "planned" follows the plan steps in order and only asks the supervisor
+            when a step's output looks wrong, "parallel" runs independent plan
+            steps concurrently
+        workflow_id: Resume this workflow from its last checkpoint instead of
+            starting a new one; the other options are taken from the saved state
 
     Returns:
         The final state after the workflow completes
-        
+
     使用给定用户输入运行代理工作流。
-    
+
     参数:
         user_input_messages: 用户请求消息列表
         debug: 如果为True，启用调试级别的日志记录
         deep_thinking_mode: 如果为True，启用深度思考模式
         search_before_planning: 如果为True，在规划前执行搜索
-        
+        execution_mode: "sequential"由监督逐个选择代理，"planned"按计划顺序执行步骤、
+            仅在步骤输出异常时由监督决策，"parallel"并行执行相互独立的计划步骤
+        workflow_id: 从该工作流的最后一个检查点继续执行，而不是启动新的工作流；
+            其他选项使用保存的状态中的值
+
     返回:
         工作流完成后的最终状态
     """
-    if not user_input_messages:
-        raise ValueError("Input could not be empty")
-
     if debug:
         enable_debug_logging()
 
-    logger.info(f"Starting workflow with user input: {user_input_messages}")
-
-    workflow_id = str(uuid.uuid4())
+    if workflow_id is None:
+        if not user_input_messages:
+            raise ValueError("Input could not be empty")
+        logger.info(f"Starting workflow with user input: {user_input_messages}")
+        workflow_id = str(uuid.uuid4())
+        graph_input = {
+            # Constants
+            # 常量
+            "TEAM_MEMBERS": TEAM_MEMBERS,
+            # Runtime Variables
+            # 运行时变量
+            "messages": user_input_messages,
+            "deep_thinking_mode": deep_thinking_mode,
+            "search_before_planning": search_before_planning,
+            "execution_mode": execution_mode,
+        }
+    else:
+        # Resume from the last checkpoint: passing no input continues the saved run
+        # 从最后一个检查点恢复：不传入输入时LangGraph继续执行保存的运行
+        if graph.checkpointer is None:
+            raise ValueError("Resuming a workflow requires a checkpoint backend")
+        snapshot = await graph.aget_state({"configurable": {"thread_id": workflow_id}})
+        if not snapshot.values:
+            raise ValueError(f"Unknown workflow: {workflow_id}")
+        if not snapshot.next:
+            raise ValueError(f"Workflow {workflow_id} has already completed")
+        logger.info(f"Resuming workflow {workflow_id} at {snapshot.next}")
+        execution_mode = snapshot.values.get("execution_mode", execution_mode)
+        graph_input = None
 
     streaming_llm_agents = [*TEAM_MEMBERS, "planner", "coordinator"]
 
@@ -80,19 +117,14 @@ async def run_agent_workflow(
     coordinator_cache = []
     global is_handoff_case
     is_handoff_case = False
+    # Agents whose plan step the planner started early, by agent id shown to the client
+    # 规划节点提前开始执行的代理，值为展示给前端的代理ID
+    speculative_agents = {}
 
     # TODO: extract message content from object, specifically for on_chat_model_stream
     async for event in graph.astream_events(
-        {
-            # Constants
-            # 常量
-            "TEAM_MEMBERS": TEAM_MEMBERS,
-            # Runtime Variables
-            # 运行时变量
-            "messages": user_input_messages,
-            "deep_thinking_mode": deep_thinking_mode,
-            "search_before_planning": search_before_planning,
-        },
+        graph_input,
+        {"configurable": {"thread_id": workflow_id}},
         version="v2",
     ):
         kind = event.get("event")
@@ -110,9 +142,21 @@ async def run_agent_workflow(
             else str(metadata["langgraph_step"])
         )
         run_id = "" if (event.get("run_id") is None) else str(event["run_id"])
+        agent_id = f"{workflow_id}_{name}_{langgraph_step}"
+        if execution_mode == "parallel" and name in TEAM_MEMBERS:
+            # Parallel plan steps may run the same agent in the same step
+            # 并行执行时同一步中可能有多个相同的代理，用运行ID区分
+            agent_id += f"_{run_id}"
 
+        speculative = metadata.get(SPECULATIVE_STEP_KEY) is not None
         # 处理代理启动事件
         if kind == "on_chain_start" and name in streaming_llm_agents:
+            if speculative:
+                # The planner started this plan step early; its agent node only waits for it
+                # 规划节点提前开始的计划步骤，之后的代理节点只是等待其完成，不再单独展示
+                speculative_agents[name] = agent_id
+            elif name in speculative_agents:
+                continue
             if name == "planner":
                 yield {
                     "event": "start_of_workflow",
@@ -122,16 +166,19 @@ async def run_agent_workflow(
                 "event": "start_of_agent",
                 "data": {
                     "agent_name": name,
-                    "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
+                    "agent_id": agent_id,
                 },
             }
         # 处理代理结束事件
         elif kind == "on_chain_end" and name in streaming_llm_agents:
+            if speculative:
+                continue
+            agent_id = speculative_agents.pop(name, agent_id)
             ydata = {
                 "event": "end_of_agent",
                 "data": {
                     "agent_name": name,
-                    "agent_id": f"{workflow_id}_{name}_{langgraph_step}",
+                    "agent_id": agent_id,
                 },
             }
         # 处理LLM开始事件
@@ -206,6 +253,18 @@ async def run_agent_workflow(
                             "delta": {"content": content},
                         },
                     }
+        # A discarded speculative plan step will not end by itself
+        # 规划节点丢弃推测执行的步骤时结束该代理的展示
+        elif kind == "on_custom_event" and name == SPECULATIVE_STEP_DISCARDED_EVENT:
+            if data["agent_name"] not in speculative_agents:
+                continue
+            ydata = {
+                "event": "end_of_agent",
+                "data": {
+                    "agent_name": data["agent_name"],
+                    "agent_id": speculative_agents.pop(data["agent_name"]),
+                },
+            }
         # 处理工具调用开始事件
         elif kind == "on_tool_start" and node in TEAM_MEMBERS:
             ydata = {
@@ -230,6 +289,14 @@ async def run_agent_workflow(
             continue
         yield ydata
 
+    # A completed workflow cannot be resumed; drop its checkpoints to keep storage bounded
+    # 已完成的工作流不能再恢复，删除其检查点，避免存储无限增长
+    checkpointer = graph.checkpointer
+    if checkpointer is not None and hasattr(checkpointer, "adelete_thread"):
+        config = {"configurable": {"thread_id": workflow_id}}
+        if not (await graph.aget_state(config)).next:
+            await checkpointer.adelete_thread(workflow_id)
+
     if is_handoff_case:
         yield {
             "event": "end_of_workflow",
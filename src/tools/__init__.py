@@ -10,22 +10,31 @@
 - 浏览器模拟
 
 每个工具都设计为可被代理调用的函数，并通过langchain_core.tools装饰器暴露给LLM。
+
+各工具在首次访问时才导入所在的子模块，导入某一个工具（或本包）
+不会加载其他工具的依赖，例如浏览器自动化库和HTML解析库。
 """
 
-# 导入各种工具
-from .crawl import crawl_tool  # 网页爬取工具
-from .file_management import write_file_tool  # 文件写入工具
-from .python_repl import python_repl_tool  # Python代码执行工具
-from .search import tavily_tool  # Tavily搜索工具
-from .bash_tool import bash_tool  # Bash命令执行工具
-from .browser import browser_tool  # 浏览器模拟工具
+import importlib
+
+# 工具名称到所在子模块的映射
+_TOOL_MODULES = {
+    "bash_tool": ".bash_tool",  # 执行系统命令
+    "crawl_tool": ".crawl",  # 爬取网页内容
+    "crawl_many_tool": ".crawl",  # 并发爬取多个网页
+    "tavily_tool": ".search",  # 进行互联网搜索
+    "tavily_multi_search_tool": ".search",  # 并发执行多个搜索查询
+    "python_repl_tool": ".python_repl",  # 执行Python代码
+    "write_file_tool": ".file_management",  # 写入文件内容
+    "browser_tool": ".browser",  # 模拟浏览器操作
+}
 
 # 定义公开的工具列表
-__all__ = [
-    "bash_tool",  # 执行系统命令
-    "crawl_tool",  # 爬取网页内容
-    "tavily_tool",  # 进行互联网搜索
-    "python_repl_tool",  # 执行Python代码
-    "write_file_tool",  # 写入文件内容
-    "browser_tool",  # 模拟浏览器操作
-]
+__all__ = list(_TOOL_MODULES)
+
+
+def __getattr__(name: str):
+    """模块级属性的延迟加载：首次访问工具时导入其所在的子模块"""
+    if name in _TOOL_MODULES:
+        return getattr(importlib.import_module(_TOOL_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,27 +1,29 @@
+import asyncio
 import logging
 import subprocess
 from typing import Annotated
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from .decorators import log_io
 
 # 初始化日志记录器
 logger = logging.getLogger(__name__)
 
 
-@tool  # 使用langchain_core的工具装饰器，将函数转换为可被代理调用的工具
 @log_io  # 自定义装饰器，用于记录工具的输入和输出
-def bash_tool(
-    cmd: Annotated[str, "The bash command to be executed."],  # 使用Annotated提供参数说明
+def bash(
+    cmd: Annotated[
+        str, "The bash command to be executed."
+    ],  # 使用Annotated提供参数说明
 ):
     """
     执行Bash命令并返回结果
-    
+
     此工具允许代理执行系统命令，进行文件操作、安装软件、运行脚本等操作。
     工具会捕获命令的标准输出和错误输出，并返回给调用者。
-    
+
     Args:
         cmd: 要执行的Bash命令
-        
+
     Returns:
         命令执行的输出结果或错误信息
     """
@@ -45,6 +47,47 @@ def bash_tool(
         return error_message
 
 
+@log_io  # 记录输入和输出
+async def abash(
+    cmd: Annotated[
+        str, "The bash command to be executed."
+    ],  # 使用Annotated提供参数说明
+):
+    """
+    bash的异步版本，等待命令执行时不占用工作线程
+    """
+    logger.info(f"Executing Bash Command: {cmd}")
+    try:
+        # 在子进程中执行命令并等待其结束
+        process = await asyncio.create_subprocess_shell(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        stdout, stderr = stdout.decode(errors="replace"), stderr.decode(
+            errors="replace"
+        )
+        if process.returncode != 0:
+            # 如果命令执行失败，返回错误信息
+            error_message = f"Command failed with exit code {process.returncode}.\nStdout: {stdout}\nStderr: {stderr}"
+            logger.error(error_message)
+            return error_message
+        return stdout
+    except Exception as e:
+        # 捕获其他异常（保留任务取消信号）
+        error_message = f"Error executing command: {str(e)}"
+        logger.error(error_message)
+        return error_message
+
+
+# 将同步与异步实现注册为同一个LangChain工具
+# 同步调用（invoke）走bash，异步调用（ainvoke）走abash
+bash_tool = StructuredTool.from_function(
+    func=bash,
+    coroutine=abash,
+    name="bash_tool",
+)
+
+
 if __name__ == "__main__":
     # 当脚本直接运行时的测试代码
     print(bash_tool.invoke("ls -all"))
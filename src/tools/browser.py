@@ -8,27 +8,45 @@
 4. 处理浏览器交互可能的错误
 
 浏览器工具极大扩展了代理与网络内容交互的能力，使其能够执行复杂的网页任务。
+
+browser_use依赖较重，只在第一次执行浏览器任务时导入，浏览器实例也在那时创建。
 """
 
 import asyncio
+import threading
 
 from pydantic import BaseModel, Field
-from typing import Optional, ClassVar, Type
+from typing import Any, Optional, ClassVar, Type
 from langchain.tools import BaseTool
-from browser_use import AgentHistoryList, Browser, BrowserConfig
-from browser_use import Agent as BrowserAgent
-from src.agents.llm import vl_llm
+from src.agents.llm import get_llm_by_type
 from src.tools.decorators import create_logged_tool
 from src.config import CHROME_INSTANCE_PATH
 
-# 全局浏览器实例
+# 全局浏览器实例，首次使用时创建
 expected_browser = None
+_browser_lock = threading.Lock()
 
-# 如果配置了Chrome实例路径，则创建浏览器实例
-if CHROME_INSTANCE_PATH:
-    expected_browser = Browser(
-        config=BrowserConfig(chrome_instance_path=CHROME_INSTANCE_PATH)
-    )
+
+def get_browser():
+    """
+    获取全局浏览器实例
+
+    如果配置了Chrome实例路径，首次调用时创建连接该实例的浏览器；
+    否则返回None，由browser_use自行启动浏览器。
+
+    Returns:
+        browser_use的Browser实例或None
+    """
+    global expected_browser
+    if CHROME_INSTANCE_PATH and expected_browser is None:
+        from browser_use import Browser, BrowserConfig
+
+        with _browser_lock:
+            if expected_browser is None:
+                expected_browser = Browser(
+                    config=BrowserConfig(chrome_instance_path=CHROME_INSTANCE_PATH)
+                )
+    return expected_browser
 
 
 class BrowserUseInput(BaseModel):
@@ -40,51 +58,65 @@ class BrowserUseInput(BaseModel):
 class BrowserTool(BaseTool):
     """
     浏览器工具类，用于执行网页浏览和交互任务
-    
+
     该工具创建一个浏览器代理，能够理解自然语言指令并执行相应的
     浏览器操作，如导航到网站、搜索内容、点击元素等。
     """
-    
+
     name: ClassVar[str] = "browser"  # 工具名称
     args_schema: Type[BaseModel] = BrowserUseInput  # 输入模式
     description: ClassVar[str] = (
         "Use this tool to interact with web browsers. Input should be a natural language description of what you want to do with the browser, such as 'Go to google.com and search for browser-use', or 'Navigate to Reddit and find the top post about AI'."
     )
 
-    _agent: Optional[BrowserAgent] = None  # 浏览器代理实例
+    _agent: Optional[Any] = None  # 浏览器代理实例（browser_use.Agent）
+
+    def _create_agent(self, instruction: str) -> Any:
+        """创建执行指定指令的浏览器代理"""
+        from browser_use import Agent as BrowserAgent
+
+        self._agent = BrowserAgent(
+            task=instruction,  # 设置任务指令
+            llm=get_llm_by_type("vision"),  # 使用视觉语言模型
+            browser=get_browser(),  # 使用预先配置的浏览器
+        )
+        return self._agent
+
+    @staticmethod
+    def _format_result(result: Any) -> str:
+        """处理结果格式"""
+        from browser_use import AgentHistoryList
+
+        return (
+            str(result)
+            if not isinstance(result, AgentHistoryList)
+            else result.final_result
+        )
 
     def _run(self, instruction: str) -> str:
         """
         同步执行浏览器任务
-        
+
         创建一个浏览器代理，并在同步上下文中运行异步操作，
         处理可能的异常并返回执行结果。
-        
+
         Args:
             instruction: 用自然语言描述的浏览器操作指令
-            
+
         Returns:
             浏览器操作的结果或错误信息
         """
         # 创建浏览器代理实例
-        self._agent = BrowserAgent(
-            task=instruction,  # 设置任务指令
-            llm=vl_llm,  # 使用视觉语言模型
-            browser=expected_browser,  # 使用预先配置的浏览器
-        )
+        agent = self._create_agent(instruction)
         try:
             # 创建新的事件循环来运行异步代码
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
             try:
                 # 执行浏览器操作
-                result = loop.run_until_complete(self._agent.run())
+                result = loop.run_until_complete(agent.run())
                 # 处理结果格式
-                return (
-                    str(result)
-                    if not isinstance(result, AgentHistoryList)
-                    else result.final_result
-                )
+                return self._format_result(result)
             finally:
                 # 确保事件循环关闭
                 loop.close()
@@ -95,30 +127,22 @@ class BrowserTool(BaseTool):
     async def _arun(self, instruction: str) -> str:
         """
         异步执行浏览器任务
-        
+
         创建一个浏览器代理并异步运行，便于在异步环境中使用。
-        
+
         Args:
             instruction: 用自然语言描述的浏览器操作指令
-            
+
         Returns:
             浏览器操作的结果或错误信息
         """
         # 创建浏览器代理实例
-        self._agent = BrowserAgent(
-            task=instruction, 
-            llm=vl_llm,  # 使用视觉语言模型
-            browser=expected_browser,  # 使用预先配置的浏览器
-        )
+        agent = self._create_agent(instruction)
         try:
             # 异步执行浏览器操作
-            result = await self._agent.run()
+            result = await agent.run()
             # 处理结果格式
-            return (
-                str(result)
-                if not isinstance(result, AgentHistoryList)
-                else result.final_result
-            )
+            return self._format_result(result)
         except Exception as e:
             # 捕获并返回任何异常
             return f"Error executing browser task: {str(e)}"
@@ -4,38 +4,49 @@
 该模块实现了网页爬取工具，允许代理获取和处理网页内容：
 1. 支持从给定URL爬取网页
 2. 清理和格式化网页内容为可读的Markdown格式
-3. 处理潜在的错误并提供有用的错误信息
+3. 按Token预算压缩长网页，只保留与查询最相关的片段
+4. 处理潜在的错误并提供有用的错误信息
 
 该工具对于搜集网页信息、分析在线内容非常有用。
 """
 
 import logging
-from typing import Annotated
+from typing import Annotated, Optional
 
 from langchain_core.messages import HumanMessage
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
 from .decorators import log_io
 
-from src.crawler import Crawler
+from src.config.tools import CRAWL_CHUNK_TOKENS, CRAWL_MANY_TOKEN_BUDGET
+from src.crawler import Crawler, CrawlResult
+from src.crawler.compression import compress_article
 
 # 初始化日志记录器
 logger = logging.getLogger(__name__)
 
 
-@tool  # 将函数注册为LangChain工具
 @log_io  # 记录输入和输出
-def crawl_tool(
+def crawl(
     url: Annotated[str, "The url to crawl."],  # 要爬取的URL
+    query: Annotated[
+        Optional[str], "What you are looking for on the page."
+    ] = None,  # 用于挑选相关片段的查询
+    sections: Annotated[
+        Optional[list[int]], "Section numbers of a compressed page to read."
+    ] = None,  # 要读取的片段编号
 ) -> HumanMessage:
     """
     爬取指定URL并获取可读的Markdown格式内容
-    
+
     该工具使用Crawler类爬取指定网页，提取主要内容，
     并将其转换为结构化的Markdown格式，便于LLM理解和处理。
-    
+    长网页只返回与query最相关的片段，并注明被省略的片段编号。
+
     Args:
         url: 要爬取的网页URL
-        
+        query: 要在网页中查找的内容，用于挑选相关片段
+        sections: 要读取的片段编号，用于获取压缩时省略的部分
+
     Returns:
         包含格式化内容的HumanMessage对象，或错误信息字符串
     """
@@ -44,10 +55,132 @@ def crawl_tool(
         crawler = Crawler()
         # 爬取指定URL
         article = crawler.crawl(url)
-        # 返回格式化的消息
-        return {"role": "user", "content": article.to_message()}
+        # 返回压缩后的格式化消息
+        return {
+            "role": "user",
+            "content": compress_article(article, query, sections=sections),
+        }
     except BaseException as e:
         # 捕获并记录所有异常
         error_msg = f"Failed to crawl. Error: {repr(e)}"
         logger.error(error_msg)
         return error_msg
+
+
+@log_io  # 记录输入和输出
+async def acrawl(
+    url: Annotated[str, "The url to crawl."],  # 要爬取的URL
+    query: Annotated[
+        Optional[str], "What you are looking for on the page."
+    ] = None,  # 用于挑选相关片段的查询
+    sections: Annotated[
+        Optional[list[int]], "Section numbers of a compressed page to read."
+    ] = None,  # 要读取的片段编号
+) -> HumanMessage:
+    """
+    crawl的异步版本，通过共享连接池爬取网页，不占用工作线程
+    """
+    try:
+        # 异步爬取，不占用工作线程
+        article = await Crawler().acrawl(url)
+        return {
+            "role": "user",
+            "content": compress_article(article, query, sections=sections),
+        }
+    except Exception as e:
+        # 捕获并记录异常（保留任务取消信号）
+        error_msg = f"Failed to crawl. Error: {repr(e)}"
+        logger.error(error_msg)
+        return error_msg
+
+
+# 将同步与异步实现注册为同一个LangChain工具
+# 同步调用（invoke）走crawl，异步调用（ainvoke）走acrawl
+crawl_tool = StructuredTool.from_function(
+    func=crawl,
+    coroutine=acrawl,
+    name="crawl_tool",
+)
+
+
+def _format_crawl_results(
+    urls: list[str], results: list[CrawlResult], query: Optional[str] = None
+) -> dict:
+    """
+    将批量爬取结果合并为一条用户消息
+
+    结果按输入URL的顺序排列，每篇文章前附带来源标题，
+    爬取失败的URL以错误说明代替。总Token预算平均分配给各网页。
+
+    Args:
+        urls: 调用方传入的URL列表
+        results: 批量爬取结果
+        query: 用于挑选相关片段的查询
+
+    Returns:
+        包含所有文章内容的消息字典
+    """
+    order = {url: index for index, url in enumerate(dict.fromkeys(urls))}
+    if not order:
+        return {
+            "role": "user",
+            "content": [{"type": "text", "text": "No urls to crawl."}],
+        }
+    page_budget = None
+    if CRAWL_MANY_TOKEN_BUDGET is not None:
+        page_budget = max(CRAWL_MANY_TOKEN_BUDGET // len(order), CRAWL_CHUNK_TOKENS)
+    content: list[dict] = []
+    for result in sorted(results, key=lambda r: order[r.url]):
+        if result.article is None:
+            error_msg = f"Failed to crawl {result.url}. Error: {repr(result.error)}"
+            logger.error(error_msg)
+            content.append({"type": "text", "text": error_msg})
+            continue
+        content.append({"type": "text", "text": f"Content of {result.url}:"})
+        content.extend(compress_article(result.article, query, page_budget))
+    return {"role": "user", "content": content}
+
+
+@log_io  # 记录输入和输出
+def crawl_many(
+    urls: Annotated[list[str], "The urls to crawl."],  # 要爬取的URL列表
+    query: Annotated[
+        Optional[str], "What you are looking for on the page."
+    ] = None,  # 用于挑选相关片段的查询
+) -> HumanMessage:
+    """
+    并发爬取多个URL并获取可读的Markdown格式内容
+
+    当需要阅读多个网页时，使用该工具一次性并发爬取，
+    比逐个调用crawl_tool快得多。长网页只返回与query最相关的片段。
+
+    Args:
+        urls: 要爬取的网页URL列表
+        query: 要在网页中查找的内容，用于挑选相关片段
+
+    Returns:
+        包含所有网页格式化内容的HumanMessage对象
+    """
+    return _format_crawl_results(urls, list(Crawler().crawl_many(urls)), query)
+
+
+@log_io  # 记录输入和输出
+async def acrawl_many(
+    urls: Annotated[list[str], "The urls to crawl."],  # 要爬取的URL列表
+    query: Annotated[
+        Optional[str], "What you are looking for on the page."
+    ] = None,  # 用于挑选相关片段的查询
+) -> HumanMessage:
+    """
+    crawl_many的异步版本，直接在当前事件循环中并发爬取
+    """
+    results = [result async for result in Crawler().acrawl_many(urls)]
+    return _format_crawl_results(urls, results, query)
+
+
+# 批量爬取工具
+crawl_many_tool = StructuredTool.from_function(
+    func=crawl_many,
+    coroutine=acrawl_many,
+    name="crawl_many_tool",
+)
@@ -5,13 +5,19 @@
 1. 提供函数级装饰器，记录工具输入和输出
 2. 提供类级混入，增强工具类的日志能力
 3. 提供工具类转换工厂，创建带日志的工具类
+4. 提供结果缓存混入和工厂，使相同查询共享一次工具调用
+5. 提供本地搜索混入和工厂，优先或仅使用本地索引回答搜索
 
 这些装饰器使代理工具的使用更加透明，便于调试和监控。
 """
 
+import asyncio
 import logging
 import functools
-from typing import Any, Callable, Type, TypeVar
+import inspect
+from typing import Any, Callable, ClassVar, Optional, Type, TypeVar
+
+from .search_cache import SearchCache
 
 # 初始化日志记录器
 logger = logging.getLogger(__name__)
@@ -23,31 +29,45 @@ T = TypeVar("T")
 def log_io(func: Callable) -> Callable:
     """
     记录工具函数输入参数和输出结果的装饰器
-    
+
     此装饰器包装工具函数，在函数执行前记录输入参数，
     执行后记录返回结果，便于跟踪工具的使用情况。
-    
+
     Args:
         func: 要装饰的工具函数
-        
+
     Returns:
         带有日志功能的包装函数
     """
 
-    @functools.wraps(func)  # 保留原函数的元数据（名称、文档等）
-    def wrapper(*args: Any, **kwargs: Any) -> Any:
+    def log_input(*args: Any, **kwargs: Any) -> None:
         # 记录输入参数
-        func_name = func.__name__
         params = ", ".join(
             [*(str(arg) for arg in args), *(f"{k}={v}" for k, v in kwargs.items())]
         )
-        logger.debug(f"Tool {func_name} called with parameters: {params}")
+        logger.debug(f"Tool {func.__name__} called with parameters: {params}")
+
+    # 协程函数需要异步包装，否则返回的是未等待的协程对象
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            log_input(*args, **kwargs)
+            result = await func(*args, **kwargs)
+            logger.debug(f"Tool {func.__name__} returned: {result}")
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)  # 保留原函数的元数据（名称、文档等）
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        log_input(*args, **kwargs)
 
         # 执行原函数
         result = func(*args, **kwargs)
 
         # 记录输出结果
-        logger.debug(f"Tool {func_name} returned: {result}")
+        logger.debug(f"Tool {func.__name__} returned: {result}")
 
         return result
 
@@ -57,7 +77,7 @@ def log_io(func: Callable) -> Callable:
 class LoggedToolMixin:
     """
     为工具类添加日志功能的混入类
-    
+
     此混入类可以与任何工具类组合，为其添加自动日志记录功能。
     它重写了工具类的_run方法，在执行前后添加日志记录。
     """
@@ -65,7 +85,7 @@ class LoggedToolMixin:
     def _log_operation(self, method_name: str, *args: Any, **kwargs: Any) -> None:
         """
         记录工具操作的辅助方法
-        
+
         Args:
             method_name: 被调用的方法名
             *args, **kwargs: 方法的参数
@@ -79,9 +99,9 @@ class LoggedToolMixin:
     def _run(self, *args: Any, **kwargs: Any) -> Any:
         """
         重写_run方法，添加日志记录
-        
+
         In the execution of the original _run method before and after adding logging.
-        
+
         Returns:
             工具执行结果
         """
@@ -96,21 +116,204 @@ class LoggedToolMixin:
 def create_logged_tool(base_tool_class: Type[T]) -> Type[T]:
     """
     创建带日志功能的工具类的工厂函数
-    
+
     此函数接收一个基础工具类，返回一个新类，该新类同时继承
     LoggedToolMixin和基础工具类，从而具备日志功能。
-    
+
     Args:
         base_tool_class: 原始工具类
-        
+
     Returns:
         带有日志功能的新工具类
     """
 
     class LoggedTool(LoggedToolMixin, base_tool_class):
         """带有日志功能的工具类"""
+
         pass
 
     # 设置更具描述性的类名
     LoggedTool.__name__ = f"Logged{base_tool_class.__name__}"
     return LoggedTool
+
+
+class CachedToolMixin:
+    """
+    为工具类添加结果缓存的混入类
+
+    此混入类重写了工具类的_run和_arun方法，以查询文本和影响结果的
+    工具参数作为缓存键，命中时直接返回缓存结果，并发的相同查询只调用一次工具。
+    """
+
+    search_cache: ClassVar[Optional[SearchCache]] = None  # 使用的缓存，None表示不缓存
+    cache_key_fields: ClassVar[tuple[str, ...]] = ()  # 参与生成缓存键的工具属性
+
+    def _cache_key(self, query: str) -> str:
+        params = {field: getattr(self, field, None) for field in self.cache_key_fields}
+        return self.search_cache.make_key(query, tool=self.name, **params)
+
+    @staticmethod
+    def _is_cacheable(result: Any) -> bool:
+        """
+        判断工具结果是否可以缓存
+
+        content_and_artifact格式的工具出错时返回(错误信息, {})，这类结果不缓存。
+        """
+        return not (
+            isinstance(result, tuple) and isinstance(result[0], str) and not result[1]
+        )
+
+    def _run(self, query: str, run_manager: Any = None) -> Any:
+        """
+        重写_run方法，优先返回缓存结果
+
+        Returns:
+            工具执行结果
+        """
+        run = super()._run
+        if self.search_cache is None:
+            return run(query, run_manager=run_manager)
+        return self.search_cache.get_or_compute(
+            self._cache_key(query),
+            lambda: run(query, run_manager=run_manager),
+            self._is_cacheable,
+        )
+
+    async def _arun(self, query: str, run_manager: Any = None) -> Any:
+        """
+        重写_arun方法，优先返回缓存结果
+
+        Returns:
+            工具执行结果
+        """
+        arun = super()._arun
+        if self.search_cache is None:
+            return await arun(query, run_manager=run_manager)
+        return await self.search_cache.aget_or_compute(
+            self._cache_key(query),
+            lambda: arun(query, run_manager=run_manager),
+            self._is_cacheable,
+        )
+
+
+def create_cached_tool(
+    base_tool_class: Type[T],
+    cache: Optional[SearchCache],
+    key_fields: tuple[str, ...] = (),
+) -> Type[T]:
+    """
+    创建带结果缓存的工具类的工厂函数
+
+    Args:
+        base_tool_class: 原始工具类，其_run/_arun接收单个查询参数
+        cache: 共享的结果缓存，None表示不缓存
+        key_fields: 影响工具结果、需要参与生成缓存键的工具属性
+
+    Returns:
+        带有结果缓存的新工具类
+    """
+
+    class CachedTool(CachedToolMixin, base_tool_class):
+        """带有结果缓存的工具类"""
+
+        search_cache: ClassVar[Optional[SearchCache]] = cache
+        cache_key_fields: ClassVar[tuple[str, ...]] = key_fields
+
+    # 设置更具描述性的类名
+    CachedTool.__name__ = f"Cached{base_tool_class.__name__}"
+    return CachedTool
+
+
+class LocalSearchToolMixin:
+    """
+    为搜索工具添加本地索引后端的混入类
+
+    search_backend为"local"时只查询本地索引；为"local_first"时，
+    本地相关结果足够则直接返回，否则继续调用原搜索工具；为"tavily"时不查询本地索引。
+    """
+
+    local_index_factory: ClassVar[Optional[Callable[[], Any]]] = None  # 返回本地索引
+    search_backend: ClassVar[str] = "tavily"
+    min_local_results: ClassVar[int] = 1  # local_first模式下需要的最少相关结果数
+    min_local_score: ClassVar[float] = 0.0  # 本地结果被视为相关的最低分数
+
+    def _search_local(self, query: str) -> Optional[tuple[list[dict], dict]]:
+        """
+        查询本地索引
+
+        Returns:
+            content_and_artifact格式的结果；需要继续调用原搜索工具时返回None
+        """
+        if self.search_backend == "tavily" or self.local_index_factory is None:
+            return None
+        results = self.local_index_factory().search(query, self.max_results)
+        relevant = [r for r in results if r["score"] >= self.min_local_score]
+        if self.search_backend == "local" or len(relevant) >= self.min_local_results:
+            logger.debug(f"Answered {query!r} from the local index")
+            return relevant, {"query": query, "results": relevant, "backend": "local"}
+        return None
+
+    def _run(self, query: str, run_manager: Any = None) -> Any:
+        """
+        重写_run方法，按搜索后端配置优先查询本地索引
+
+        Returns:
+            工具执行结果
+        """
+        local = self._search_local(query)
+        if local is not None:
+            return local
+        return super()._run(query, run_manager=run_manager)
+
+    async def _arun(self, query: str, run_manager: Any = None) -> Any:
+        """
+        重写_arun方法，在工作线程中查询本地索引
+
+        Returns:
+            工具执行结果
+        """
+        local = await asyncio.to_thread(self._search_local, query)
+        if local is not None:
+            return local
+        return await super()._arun(query, run_manager=run_manager)
+
+
+def create_local_search_tool(
+    base_tool_class: Type[T],
+    local_index_factory: Callable[[], Any],
+    search_backend: str,
+    min_local_results: int = 1,
+    min_local_score: float = 0.0,
+) -> Type[T]:
+    """
+    创建带本地索引后端的搜索工具类的工厂函数
+
+    Args:
+        base_tool_class: 原始搜索工具类，需要有max_results属性
+        local_index_factory: 返回本地索引的函数，首次查询时才调用
+        search_backend: 搜索后端，"tavily"、"local"或"local_first"
+        min_local_results: local_first模式下需要的最少相关结果数
+        min_local_score: 本地结果被视为相关的最低分数
+
+    Returns:
+        带有本地索引后端的新工具类
+    """
+    if search_backend not in ("tavily", "local", "local_first"):
+        raise ValueError(f"Unknown search backend: {search_backend}")
+    # 类体中与属性同名的参数无法直接引用，先取别名
+    index_factory, backend = local_index_factory, search_backend
+    min_results, min_score = min_local_results, min_local_score
+
+    class LocalSearchTool(LocalSearchToolMixin, base_tool_class):
+        """带有本地索引后端的搜索工具类"""
+
+        local_index_factory: ClassVar[Optional[Callable[[], Any]]] = staticmethod(
+            index_factory
+        )
+        search_backend: ClassVar[str] = backend
+        min_local_results: ClassVar[int] = min_results
+        min_local_score: ClassVar[float] = min_score
+
+    # 设置更具描述性的类名
+    LocalSearchTool.__name__ = f"LocalSearch{base_tool_class.__name__}"
+    return LocalSearchTool
@@ -4,23 +4,199 @@
 该模块集成了Tavily搜索API，为代理提供互联网搜索能力：
 1. 使用Tavily搜索引擎进行网络搜索
 2. 限制返回结果数量，提高效率
-3. 集成日志记录功能，便于调试和监控
+3. 缓存搜索结果，规划节点和研究员的重复查询只调用一次API
+4. 可配置为优先或仅使用爬取语料的本地索引进行搜索（离线模式）
+5. 提供多查询搜索，并发执行多个查询并按URL合并去重
+6. 集成日志记录功能，便于调试和监控
+7. 搜索工具在首次使用时才创建，导入本模块不要求配置TAVILY_API_KEY
 
 搜索工具是代理获取最新信息和外部知识的重要手段。
 """
 
+import asyncio
 import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Annotated, Union
+
 from langchain_community.tools.tavily_search import TavilySearchResults
+from langchain_community.utilities.tavily_search import TavilySearchAPIWrapper
+from langchain_core.tools import StructuredTool
 from src.config import TAVILY_MAX_RESULTS
-from .decorators import create_logged_tool
+from src.config.tools import (
+    SEARCH_CACHE_ENABLED,
+    TAVILY_MULTI_SEARCH_CONCURRENCY,
+    SEARCH_BACKEND,
+    LOCAL_SEARCH_MIN_RESULTS,
+    LOCAL_SEARCH_MIN_SCORE,
+)
+from src.crawler.local_index import get_default_index
+from src.crawler.urls import normalize_url
+from .decorators import (
+    create_cached_tool,
+    create_local_search_tool,
+    create_logged_tool,
+    log_io,
+)
+from .search_cache import SearchCache
 
 # 初始化日志记录器
 logger = logging.getLogger(__name__)
 
-# 初始化带日志记录的Tavily搜索工具
+# 进程级共享的搜索结果缓存，可通过search_cache.stats()查看命中率
+search_cache = SearchCache() if SEARCH_CACHE_ENABLED else None
+
+# 初始化带缓存和日志记录的Tavily搜索工具
+# 缓存键包含影响搜索结果的参数，不同配置的工具实例不会共享结果
+CachedTavilySearch = create_cached_tool(
+    TavilySearchResults,
+    search_cache,
+    key_fields=(
+        "max_results",
+        "search_depth",
+        "include_domains",
+        "exclude_domains",
+        "include_answer",
+        "include_raw_content",
+        "include_images",
+    ),
+)
+# 按SEARCH_BACKEND配置在调用Tavily之前查询本地索引，本地结果不经过搜索缓存
+LocalTavilySearch = create_local_search_tool(
+    CachedTavilySearch,
+    get_default_index,
+    SEARCH_BACKEND,
+    min_local_results=LOCAL_SEARCH_MIN_RESULTS,
+    min_local_score=LOCAL_SEARCH_MIN_SCORE,
+)
 # 使用装饰器为搜索工具添加日志功能
-LoggedTavilySearch = create_logged_tool(TavilySearchResults)
+LoggedTavilySearch = create_logged_tool(LocalTavilySearch)
+
+_tavily_tool_lock = threading.Lock()
+
+
+def get_tavily_tool() -> LoggedTavilySearch:
+    """
+    获取Tavily搜索工具，首次调用时创建
+
+    创建工具时会从环境变量读取并校验TAVILY_API_KEY，因此推迟到首次使用，
+    导入本模块不要求配置API密钥。创建的工具保存为模块属性tavily_tool。
+
+    Returns:
+        设置了最大结果数量的搜索工具
+    """
+    tool = globals().get("tavily_tool")
+    if tool is not None:
+        return tool
+    with _tavily_tool_lock:
+        if "tavily_tool" not in globals():
+            tool_kwargs = {}
+            if SEARCH_BACKEND == "local":
+                # 离线模式不会调用Tavily，不要求配置API密钥
+                tool_kwargs["api_wrapper"] = TavilySearchAPIWrapper(
+                    tavily_api_key=os.getenv("TAVILY_API_KEY") or "offline"
+                )
+            globals()["tavily_tool"] = LoggedTavilySearch(
+                name="tavily_search", max_results=TAVILY_MAX_RESULTS, **tool_kwargs
+            )
+        return globals()["tavily_tool"]
+
+
+def __getattr__(name: str):
+    """模块级属性的延迟加载：首次访问tavily_tool时创建搜索工具"""
+    if name == "tavily_tool":
+        return get_tavily_tool()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _merge_search_results(
+    queries: list[str], results: list[Union[list[dict], str]]
+) -> Union[list[dict], str]:
+    """
+    合并多个查询的搜索结果
+
+    按规范化后的URL去重，同一URL保留得分最高的结果，
+    合并后按得分从高到低排序，最多保留TAVILY_MAX_RESULTS * 查询数量条。
+
+    Args:
+        queries: 去重后的查询列表
+        results: 与查询一一对应的搜索结果，查询失败时为错误信息字符串
+
+    Returns:
+        合并后的搜索结果；所有查询都失败时返回错误信息
+    """
+    merged: dict[str, dict] = {}
+    errors: list[str] = []
+    for query, result in zip(queries, results):
+        if isinstance(result, str):
+            # Tavily工具出错时返回错误信息字符串
+            logger.error(f"Search for {query!r} failed: {result}")
+            errors.append(f"{query}: {result}")
+            continue
+        for item in result:
+            key = normalize_url(item["url"])
+            if key not in merged or item.get("score", 0) > merged[key].get("score", 0):
+                merged[key] = item
+    if not merged and errors:
+        return "Failed to search. Errors: " + "; ".join(errors)
+    ranked = sorted(
+        merged.values(), key=lambda item: item.get("score", 0), reverse=True
+    )
+    return ranked[: TAVILY_MAX_RESULTS * len(queries)]
+
+
+@log_io  # 记录输入和输出
+def multi_search(
+    queries: Annotated[list[str], "The search queries to run together."],  # 查询列表
+) -> Union[list[dict], str]:
+    """
+    同时执行多个搜索查询，并返回按URL去重、按相关性排序的合并结果
+
+    当需要从多个角度搜索同一主题时，使用该工具一次性提交所有查询，
+    比逐个调用tavily_search快得多。
+
+    Args:
+        queries: 要执行的搜索查询列表
+
+    Returns:
+        合并后的搜索结果列表，或错误信息字符串
+    """
+    queries = list(dict.fromkeys(queries))
+    if not queries:
+        return []
+    tool = get_tavily_tool()
+    with ThreadPoolExecutor(
+        max_workers=min(TAVILY_MULTI_SEARCH_CONCURRENCY, len(queries))
+    ) as executor:
+        results = list(
+            executor.map(lambda query: tool.invoke({"query": query}), queries)
+        )
+    return _merge_search_results(queries, results)
+
+
+@log_io  # 记录输入和输出
+async def amulti_search(
+    queries: Annotated[list[str], "The search queries to run together."],  # 查询列表
+) -> Union[list[dict], str]:
+    """
+    multi_search的异步版本，在当前事件循环中并发执行查询
+    """
+    queries = list(dict.fromkeys(queries))
+    semaphore = asyncio.Semaphore(TAVILY_MULTI_SEARCH_CONCURRENCY)
+    tool = get_tavily_tool()
+
+    async def search(query: str) -> Union[list[dict], str]:
+        async with semaphore:
+            return await tool.ainvoke({"query": query})
+
+    results = await asyncio.gather(*(search(query) for query in queries))
+    return _merge_search_results(queries, results)
+
 
-# 创建搜索工具实例，设置最大结果数量
-# 该工具将在使用时自动从环境变量获取TAVILY_API_KEY
-tavily_tool = LoggedTavilySearch(name="tavily_search", max_results=TAVILY_MAX_RESULTS)
+# 多查询搜索工具，各查询仍经过tavily_tool，共享其结果缓存
+tavily_multi_search_tool = StructuredTool.from_function(
+    func=multi_search,
+    coroutine=amulti_search,
+    name="tavily_multi_search",
+)
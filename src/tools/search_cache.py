@@ -0,0 +1,310 @@
+"""
+搜索缓存模块 - 在多个节点和代理之间共享搜索结果
+
+规划节点（search_before_planning）和研究员代理经常发出相同或相近的查询，
+该模块提供SearchCache，避免重复调用搜索API：
+1. 规范化查询文本（Unicode规范化、忽略大小写和多余空白）
+2. 内存中按LRU淘汰，可选持久化到SQLite，跨进程重启复用
+3. 结果超过有效期后重新搜索
+4. 并发的相同查询共享同一次请求（single-flight）
+5. 记录命中率等统计信息
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Optional
+
+from src.config.tools import (
+    SEARCH_CACHE_MAX_ENTRIES,
+    SEARCH_CACHE_TTL,
+    SEARCH_CACHE_PATH,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_query(query: str) -> str:
+    """
+    规范化查询文本，使写法不同的相同查询得到相同的键
+
+    Args:
+        query: 原始查询
+
+    Returns:
+        规范化后的查询
+    """
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class SearchCache:
+    """
+    带有效期和LRU淘汰的搜索结果缓存，支持同步和异步调用方共享
+    """
+
+    def __init__(
+        self,
+        max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+        ttl: float = SEARCH_CACHE_TTL,
+        path: Optional[str] = SEARCH_CACHE_PATH,
+    ):
+        """
+        初始化搜索缓存
+
+        Args:
+            max_entries: 内存中最多缓存的条目数
+            ttl: 结果的有效期（秒）
+            path: SQLite持久化存储路径，None表示只使用内存
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0  # 等待其他调用方进行中请求的次数
+        self._entries: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        self._inflight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+
+    def make_key(self, query: str, **params: Any) -> str:
+        """
+        根据规范化后的查询和影响结果的工具参数生成缓存键
+
+        Args:
+            query: 查询文本
+            **params: 影响搜索结果的参数，如结果数量和域名过滤
+
+        Returns:
+            缓存键
+        """
+        payload = json.dumps(
+            [normalize_query(query), params], sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        查找未过期的缓存结果，不更新命中统计
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            缓存结果的副本，不存在或已过期时返回None
+        """
+        with self._lock:
+            value = self._lookup(key)
+        return None if value is None else copy.deepcopy(value)
+
+    def put(self, key: str, value: Any) -> None:
+        """
+        保存搜索结果
+
+        Args:
+            key: 缓存键
+            value: 可JSON序列化的搜索结果
+        """
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires_at, value)
+            db = self._get_db()
+            if db is not None:
+                try:
+                    db.execute(
+                        "INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                        (key, self._dumps(value), expires_at),
+                    )
+                    db.execute(
+                        "DELETE FROM results WHERE expires_at < ?", (time.time(),)
+                    )
+                    db.commit()
+                except (TypeError, sqlite3.Error) as e:
+                    logger.warning(f"Failed to persist search result: {e}")
+
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Any],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        返回缓存结果；未命中时执行compute，并发的相同请求只执行一次
+
+        Args:
+            key: 缓存键
+            compute: 执行实际搜索的函数
+            cacheable: 判断结果是否可以缓存（例如错误结果不缓存）
+
+        Returns:
+            搜索结果
+        """
+        future, leader = self._claim(key)
+        if not leader:
+            return copy.deepcopy(future.result())
+        try:
+            value = compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value=value, store=cacheable(value))
+        # 缓存和等待中的调用方共享value，返回副本以免调用方修改影响它们
+        return copy.deepcopy(value)
+
+    async def aget_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Any]],
+        cacheable: Callable[[Any], bool] = lambda value: True,
+    ) -> Any:
+        """
+        get_or_compute的异步版本，等待其他调用方的请求时不阻塞事件循环
+
+        Args:
+            key: 缓存键
+            compute: 执行实际搜索的协程函数
+            cacheable: 判断结果是否可以缓存
+
+        Returns:
+            搜索结果
+        """
+        future, leader = self._claim(key)
+        if not leader:
+            return copy.deepcopy(await asyncio.wrap_future(future))
+        try:
+            value = await compute()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, value=value, store=cacheable(value))
+        # 缓存和等待中的调用方共享value，返回副本以免调用方修改影响它们
+        return copy.deepcopy(value)
+
+    def stats(self) -> dict:
+        """
+        获取缓存统计信息
+
+        Returns:
+            命中、未命中、共享请求次数，命中率和内存条目数
+        """
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "hit_rate": (self.hits + self.shared) / lookups if lookups else 0.0,
+            "entries": entries,
+        }
+
+    def _claim(self, key: str) -> tuple[Future, bool]:
+        """
+        查找缓存或进行中的请求，都没有时登记为该键的执行者
+
+        Returns:
+            (结果Future, 当前调用方是否需要执行请求)
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                self.hits += 1
+                future: Future = Future()
+                future.set_result(value)
+                return future, False
+            self.misses += 1
+            future = self._inflight.get(key)
+            if future is not None:
+                self.shared += 1
+                return future, False
+            future = self._inflight[key] = Future()
+            return future, True
+
+    def _finish(
+        self,
+        key: str,
+        future: Future,
+        value: Any = None,
+        error: Optional[BaseException] = None,
+        store: bool = False,
+    ) -> None:
+        """结束进行中的请求，通知等待的调用方，并按需保存结果"""
+        if store:
+            self.put(key, value)
+        with self._lock:
+            self._inflight.pop(key, None)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(value)
+
+    def _lookup(self, key: str) -> Optional[Any]:
+        """在内存和持久化存储中查找未过期的结果，调用方需持有锁"""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                return value
+            del self._entries[key]
+        db = self._get_db()
+        if db is None:
+            return None
+        row = db.execute(
+            "SELECT value, expires_at FROM results WHERE key = ? AND expires_at > ?",
+            (key, now),
+        ).fetchone()
+        if row is None:
+            return None
+        value = self._loads(row[0])
+        self._remember(key, row[1], value)
+        return value
+
+    @staticmethod
+    def _dumps(value: Any) -> str:
+        # JSON不区分列表和元组，记录类型以便还原content_and_artifact格式的结果
+        return json.dumps({"tuple": isinstance(value, tuple), "value": value})
+
+    @staticmethod
+    def _loads(data: str) -> Any:
+        record = json.loads(data)
+        return tuple(record["value"]) if record["tuple"] else record["value"]
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        """保存到内存并按LRU淘汰，调用方需持有锁"""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _get_db(self) -> Optional[sqlite3.Connection]:
+        """首次使用时打开持久化存储，打开失败时退回纯内存缓存"""
+        if self.path is None:
+            return None
+        if self._db is None:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(self.path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results"
+                    " (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(
+                    f"Search cache store unavailable, using memory only: {e}"
+                )
+                self.path = None
+                return None
+        return self._db
@@ -0,0 +1,10 @@
+"""
+通用工具模块 - 提供跨模块共享的辅助功能
+
+目前包含：
+- tokens: 本地Token计数和截断，用于控制发送给LLM的内容长度
+"""
+
+from .tokens import count_tokens, truncate_tokens
+
+__all__ = ["count_tokens", "truncate_tokens"]
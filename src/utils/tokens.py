@@ -0,0 +1,116 @@
+"""
+Token计数模块 - 在本地估算文本的Token数量
+
+优先使用tiktoken进行精确计数；tiktoken未安装或编码文件无法加载时
+（例如离线环境），退回基于字符的估算：中日韩字符按每字1个Token计算，
+其他字符按每4个字符1个Token计算。
+
+编码器只加载一次；计数结果按文本摘要缓存在一个小的LRU中，
+缓存不持有文本本身，避免长网页内容因缓存而无法释放。
+truncate_tokens按同样的方式将文本截断到指定的Token数。
+"""
+
+import functools
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    import tiktoken
+except ImportError:  # tiktoken是可选依赖
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 使用的tiktoken编码，与主流OpenAI兼容模型接近
+ENCODING_NAME = "cl100k_base"
+
+# 匹配中日韩字符
+_CJK_PATTERN = re.compile(r"[぀-ヿ㐀-䶿一-鿿가-힯]")
+
+# 计数缓存的最大条目数，键为文本摘要而非文本本身
+TOKEN_COUNT_CACHE_SIZE = 1024
+
+_count_cache: OrderedDict[bytes, int] = OrderedDict()
+_count_cache_lock = threading.Lock()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_encoding():
+    """加载tiktoken编码器，失败时返回None"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding(ENCODING_NAME)
+    except Exception as e:
+        logger.warning(f"Failed to load tokenizer, estimating token counts: {e}")
+        return None
+
+
+def _estimate_tokens(text: str) -> int:
+    """基于字符数估算Token数量"""
+    cjk_chars = len(_CJK_PATTERN.findall(text))
+    return cjk_chars + (len(text) - cjk_chars + 3) // 4
+
+
+def count_tokens(text: str) -> int:
+    """
+    计算文本的Token数量
+
+    Args:
+        text: 要计数的文本
+
+    Returns:
+        Token数量
+    """
+    if not text:
+        return 0
+    key = hashlib.blake2b(
+        text.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
+    with _count_cache_lock:
+        tokens = _count_cache.get(key)
+        if tokens is not None:
+            _count_cache.move_to_end(key)
+            return tokens
+    encoding = _get_encoding()
+    if encoding is None:
+        tokens = _estimate_tokens(text)
+    else:
+        tokens = len(encoding.encode(text, disallowed_special=()))
+    with _count_cache_lock:
+        _count_cache[key] = tokens
+        if len(_count_cache) > TOKEN_COUNT_CACHE_SIZE:
+            _count_cache.popitem(last=False)
+    return tokens
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """
+    将文本截断到不超过指定的Token数，保留开头部分
+
+    Args:
+        text: 要截断的文本
+        max_tokens: 最多保留的Token数
+
+    Returns:
+        截断后的文本，不超过限制时原样返回
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = _get_encoding()
+    if encoding is not None:
+        return encoding.decode(
+            encoding.encode(text, disallowed_special=())[:max_tokens]
+        )
+    # 估算模式：二分查找不超过限制的最长前缀
+    low, high = 0, len(text)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if _estimate_tokens(text[:middle]) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+    return text[:low]
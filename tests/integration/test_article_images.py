@@ -0,0 +1,72 @@
+from src.crawler import Article
+from src.crawler.article import ImagePolicy
+
+
+def make_article(html):
+    article = Article(title="Page", html_content=html)
+    article.url = "https://example.com/post/"
+    return article
+
+
+def image_urls(content):
+    return [part["image_url"]["url"] for part in content if part["type"] == "image_url"]
+
+
+def test_policy_drops_trackers_icons_and_duplicates():
+    """Test that junk images are dropped and repeated images appear once."""
+    article = make_article(
+        '<p>Intro</p><img src="/img/chart.png"><img src="https://t.example/pixel.gif">'
+        '<img src="/static/site-logo.png"><img src="/img/arrow.svg">'
+        '<p>Body</p><img src="../img/chart.png#zoom"><img src="/img/chart.png?utm_source=x">'
+        '<img src="/img/photo.jpg"><p>End</p>'
+    )
+    content = article.to_message()
+
+    assert image_urls(content) == [
+        "https://example.com/img/chart.png",
+        "https://example.com/img/photo.jpg",
+    ]
+    assert [part["text"] for part in content if part["type"] == "text"][0] == (
+        "# Page\n\nIntro"
+    )
+
+
+def test_policy_caps_images_keeping_those_near_text():
+    """Test that the cap prefers images surrounded by text over gallery images."""
+    gallery = "".join(f'<img src="/g/{i}.jpg">' for i in range(5))
+    article = make_article(
+        f'<p>Short</p>{gallery}<p>{"Explanation of the figure. " * 20}</p>'
+        '<img src="/fig.png"><p>More discussion.</p>'
+    )
+    article.image_policy = ImagePolicy(max_images=2)
+
+    urls = image_urls(article.to_message())
+    assert len(urls) == 2
+    assert "https://example.com/fig.png" in urls
+
+
+def test_permissive_policy_keeps_message_unchanged():
+    """Test that a policy without rules keeps every image part."""
+    article = make_article('<p>a</p><img src="/icon.svg"><p>b</p>')
+    article.image_policy = ImagePolicy(drop_patterns=[], drop_extensions=[])
+    assert len(image_urls(article.to_message())) == 1
+
+
+def test_drop_patterns_match_whole_words_only():
+    """Test that junk keywords inside ordinary file names do not drop content images."""
+    policy = ImagePolicy()
+    for url in (
+        "https://example.com/img/silicon-wafer.jpg",
+        "https://example.com/img/soundtrack-cover.png",
+        "https://example.com/img/google-pixel-9.jpg",
+        "https://example.com/img/catalogue.png",
+    ):
+        assert not policy.is_dropped(url), url
+    for url in (
+        "https://t.example/pixel.gif?id=1",
+        "https://example.com/static/site-logo.png",
+        "https://example.com/icons/home.png",
+        "https://example.com/track/open.gif",
+        "https://example.com/img/user_avatar.jpg",
+    ):
+        assert policy.is_dropped(url), url
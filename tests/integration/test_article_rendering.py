@@ -0,0 +1,65 @@
+from markdownify import markdownify as md
+
+import src.crawler.article as article_module
+from src.crawler import Article
+from src.crawler.article import ImagePolicy, markdown_to_message
+
+HTML = (
+    "<h1>Title <img src='/inline.png' alt='inline'></h1>"
+    "<p>Intro with <b>bold</b> and a [bracket].</p>"
+    "<img src='/a.png' alt='A'>"
+    "<a href='/full'><img src='b.jpg' alt='B'></a>"
+    "<ul><li>one</li><li>two <img src='/c.gif' alt='C'></li></ul>"
+    "<p>End</p>"
+)
+
+
+def make_article(html=HTML):
+    article = Article(title="Page", html_content=html)
+    article.url = "https://example.com/post/"
+    article.image_policy = ImagePolicy(drop_patterns=[], drop_extensions=[])
+    return article
+
+
+def test_single_pass_matches_markdownify_and_regex_split():
+    """Test that the single conversion pass renders the same output as before."""
+    article = make_article()
+    assert article.to_markdown(including_title=False) == md(HTML)
+    assert article.to_message() == markdown_to_message(
+        article.to_markdown(), article.url, article.image_policy
+    )
+
+
+def test_html_is_converted_once(monkeypatch):
+    """Test that markdown and message share one conversion until the HTML changes."""
+    calls = []
+    convert_html = article_module.convert_html
+    monkeypatch.setattr(
+        article_module,
+        "convert_html",
+        lambda html: calls.append(html) or convert_html(html),
+    )
+    article = make_article()
+    article.to_markdown()
+    article.to_message()
+    article.url = "https://other.example/"
+    assert article.to_message()[1]["image_url"]["url"] == "https://other.example/a.png"
+    assert len(calls) == 1
+
+    article.html_content = "<p>new</p>"
+    assert article.to_markdown(including_title=False) == "new"
+    assert len(calls) == 2
+
+
+def test_returned_message_does_not_share_cache():
+    """Test that mutating a returned message leaves the cached message intact."""
+    article = make_article()
+    message = article.to_message()
+    message[0]["text"] = "changed"
+    message[1]["image_url"]["url"] = "changed"
+    message.clear()
+
+    again = article.to_message()
+    assert again[0]["text"].startswith("# Page")
+    assert again[1]["image_url"]["url"] == "https://example.com/a.png"
+    assert not hasattr(article, "__dict__")
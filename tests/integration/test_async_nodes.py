@@ -0,0 +1,113 @@
+import asyncio
+import json
+import time
+
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import src.graph.nodes as nodes
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+from src.tools.bash_tool import bash_tool
+
+PLAN = {
+    "thought": "Compare two phones",
+    "title": "Phone comparison",
+    "steps": [
+        {"agent_name": "researcher", "title": "Phone A", "description": "Research A"},
+        {"agent_name": "researcher", "title": "Phone B", "description": "Research B"},
+        {"agent_name": "reporter", "title": "Report", "description": "Write it up"},
+    ],
+}
+
+
+class AsyncOnly:
+    """Fake LLM/agent whose sync API fails, so only async nodes can use it."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def invoke(self, *args, **kwargs):
+        raise AssertionError(f"sync invoke called for {self.name}")
+
+    stream = invoke
+
+    async def ainvoke(self, state):
+        await asyncio.sleep(0.2)
+        if self.name == "coordinator":
+            return AIMessage(content="handoff_to_planner()")
+        if self.name == "reporter":
+            return AIMessage(content="report")
+        return {"messages": [AIMessage(content=f"{self.name} done")]}
+
+    async def astream(self, messages):
+        yield AIMessageChunk(content=json.dumps(PLAN))
+
+
+def test_async_graph_runs_async_nodes(monkeypatch):
+    """Test that concurrent workflows run the async node variants end to end."""
+    monkeypatch.setattr(nodes, "get_agent", AsyncOnly)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", lambda name, *args: AsyncOnly(name))
+    graph = build_graph()
+
+    async def run_all(count):
+        return await asyncio.gather(
+            *(
+                graph.ainvoke(
+                    {
+                        "TEAM_MEMBERS": TEAM_MEMBERS,
+                        "messages": [{"role": "user", "content": "Compare phones"}],
+                        "execution_mode": "parallel",
+                    }
+                )
+                for _ in range(count)
+            )
+        )
+
+    started = time.monotonic()
+    results = asyncio.run(run_all(50))
+    elapsed = time.monotonic() - started
+
+    # Coordinator, the two research steps together, then the reporter
+    assert elapsed < 3
+    for result in results:
+        outputs = [m.name for m in result["messages"] if m.name in TEAM_MEMBERS]
+        assert outputs == ["researcher", "researcher", "reporter"]
+
+
+def test_async_bash_tool():
+    """Test the subprocess-based async implementation of the bash tool."""
+    assert asyncio.run(bash_tool.ainvoke("echo 'Hello World'")).strip() == "Hello World"
+    result = asyncio.run(bash_tool.ainvoke("echo oops >&2; exit 3"))
+    assert "Command failed with exit code 3" in result
+    assert "oops" in result
+
+
+def test_node_events_are_not_duplicated(monkeypatch):
+    """Test that each node emits one start event under its node name."""
+    monkeypatch.setattr(nodes, "get_agent", AsyncOnly)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", lambda name, *args: AsyncOnly(name))
+    graph = build_graph()
+
+    async def started_nodes():
+        return [
+            event["name"]
+            async for event in graph.astream_events(
+                {
+                    "TEAM_MEMBERS": TEAM_MEMBERS,
+                    "messages": [{"role": "user", "content": "Compare phones"}],
+                    "execution_mode": "parallel",
+                },
+                version="v2",
+            )
+            if event["event"] == "on_chain_start"
+            and event["name"] in [*TEAM_MEMBERS, "coordinator", "planner"]
+        ]
+
+    names = asyncio.run(started_nodes())
+    assert sorted(names) == [
+        "coordinator",
+        "planner",
+        "reporter",
+        "researcher",
+        "researcher",
+    ]
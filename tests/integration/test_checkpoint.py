@@ -0,0 +1,116 @@
+import json
+
+import pytest
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+
+import src.graph.nodes as nodes
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+from src.graph.checkpoint import SQLiteCheckpointSaver
+
+PLAN = {
+    "thought": "Check a product page",
+    "title": "Product page",
+    "steps": [
+        {"agent_name": "researcher", "title": "Search", "description": "Find it"},
+        {"agent_name": "browser", "title": "Browse", "description": "Open it"},
+        {"agent_name": "reporter", "title": "Report", "description": "Write it up"},
+    ],
+}
+
+
+class FakeLLM:
+    """Fake LLM/agent; the browser fails while `browser_down` is set."""
+
+    calls = []
+    browser_down = True
+
+    def __init__(self, name, *args):
+        self.name = name
+
+    def invoke(self, state):
+        FakeLLM.calls.append(self.name)
+        if self.name == "coordinator":
+            return AIMessage(content="handoff_to_planner()")
+        if self.name == "reporter":
+            return AIMessage(content="report")
+        if self.name == "browser" and FakeLLM.browser_down:
+            raise ConnectionError("browser crashed")
+        return {"messages": [AIMessage(content=f"{self.name} done")]}
+
+    def stream(self, messages):
+        FakeLLM.calls.append(self.name)
+        yield AIMessageChunk(content=json.dumps(PLAN))
+
+
+def test_failed_workflow_resumes_from_last_node(monkeypatch, tmp_path):
+    """Test that a resumed run skips completed nodes, even from a new process."""
+    monkeypatch.setattr(nodes, "get_agent", FakeLLM)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", FakeLLM)
+    FakeLLM.calls, FakeLLM.browser_down = [], True
+    path = str(tmp_path / "checkpoints.sqlite")
+    config = {"configurable": {"thread_id": "workflow-1"}}
+
+    graph = build_graph(checkpointer=SQLiteCheckpointSaver(path))
+    with pytest.raises(ConnectionError):
+        graph.invoke(
+            {
+                "TEAM_MEMBERS": TEAM_MEMBERS,
+                "messages": [{"role": "user", "content": "Check the page"}],
+                "execution_mode": "planned",
+            },
+            config,
+        )
+    assert FakeLLM.calls == ["coordinator", "planner", "researcher", "browser"]
+
+    # A fresh saver on the same database, as after a process restart
+    FakeLLM.browser_down = False
+    saver = SQLiteCheckpointSaver(path)
+    graph = build_graph(checkpointer=saver)
+    assert graph.get_state(config).next == ("browser",)
+    result = graph.invoke(None, config)
+
+    assert FakeLLM.calls[4:] == ["browser", "reporter"]
+    outputs = [m.name for m in result["messages"] if m.name in TEAM_MEMBERS]
+    assert outputs == ["researcher", "browser", "reporter"]
+
+    # Every message in the state is stored once, however many checkpoints
+    # reference it (node writes may also keep a copy from before it got an id)
+    stored = [
+        saver._load(digest) for digest, in saver._db.execute("SELECT hash FROM blobs")
+    ]
+    messages = [blob for blob in stored if isinstance(blob, BaseMessage) and blob.id]
+    assert sorted(m.id for m in messages) == sorted(m.id for m in result["messages"])
+
+
+def test_deleted_workflows_free_their_storage(monkeypatch, tmp_path):
+    """Test that deleting a workflow keeps content still used by another workflow."""
+    monkeypatch.setattr(nodes, "get_agent", FakeLLM)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", FakeLLM)
+    FakeLLM.calls, FakeLLM.browser_down = [], False
+    saver = SQLiteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    graph = build_graph(checkpointer=saver)
+    graph_input = {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": [{"role": "user", "content": "Check the page"}],
+        "execution_mode": "planned",
+    }
+    first = {"configurable": {"thread_id": "workflow-1"}}
+    second = {"configurable": {"thread_id": "workflow-2"}}
+    graph.invoke(graph_input, first)
+    result = graph.invoke(graph_input, second)
+
+    def count(table):
+        return saver._db.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    blobs = count("blobs")
+    saver.delete_thread("workflow-1")
+    assert graph.get_state(first).values == {}
+    # The second workflow still loads, including the plan both workflows share
+    assert graph.get_state(second).values["full_plan"] == result["full_plan"]
+    assert 0 < count("blobs") < blobs
+
+    saver.delete_thread("workflow-2")
+    assert [count(table) for table in ("checkpoints", "writes", "blobs", "refs")] == [
+        0
+    ] * 4
@@ -0,0 +1,80 @@
+from src.crawler import Article
+from src.crawler.compression import chunk_markdown, compress_article
+from src.crawler.ranking import BM25, tokenize
+from src.utils.tokens import count_tokens
+
+
+def make_article(sections):
+    html = "".join(
+        f"<h2>{heading}</h2>" + "".join(f"<p>{text}</p>" for text in paragraphs)
+        for heading, paragraphs in sections
+    )
+    article = Article(title="Guide", html_content=html)
+    article.url = "https://example.com/guide"
+    return article
+
+
+FILLER = "General background that says nothing in particular about the topic. " * 20
+
+
+def test_tokenize_handles_english_and_cjk():
+    """Test that English words drop stopwords and CJK text becomes bigrams."""
+    assert tokenize("The Rust compiler") == ["rust", "compiler"]
+    assert tokenize("大模型") == ["大模", "模型"]
+
+
+def test_bm25_prefers_matching_documents():
+    """Test that documents containing the query terms score higher."""
+    ranker = BM25([tokenize("apples and pears"), tokenize("rust borrow checker")])
+    scores = ranker.scores(tokenize("borrow checker"))
+    assert scores[1] > scores[0] == 0
+
+
+def test_short_pages_are_not_compressed():
+    """Test that a page within budget is returned unchanged."""
+    article = make_article([("Intro", ["Short page."])])
+    assert compress_article(article, "anything", token_budget=1000) == (
+        article.to_message()
+    )
+
+
+def test_long_pages_keep_relevant_sections_within_budget():
+    """Test that compression keeps the matching section and points to the rest."""
+    article = make_article(
+        [
+            ("History", [FILLER, FILLER]),
+            ("Pricing", ["The subscription pricing is 20 dollars per month."]),
+            ("Community", [FILLER, FILLER]),
+        ]
+    )
+    content = compress_article(article, "subscription pricing", token_budget=300)
+    text = "\n".join(part["text"] for part in content if part["type"] == "text")
+
+    assert "20 dollars per month" in text
+    assert "Pricing\n---" in text
+    assert "Omitted sections:" in text
+    assert count_tokens(text) < count_tokens(article.to_markdown()) / 2
+
+
+def test_sections_fetch_omitted_chunks():
+    """Test that requesting section numbers returns exactly those chunks."""
+    article = make_article([("History", [FILLER]), ("Pricing", ["20 dollars."])])
+    chunks = chunk_markdown(article.to_markdown(including_title=False))
+    pricing = next(chunk for chunk in chunks if "20 dollars" in chunk.text)
+
+    content = compress_article(article, sections=[pricing.index])
+    text = "\n".join(part["text"] for part in content if part["type"] == "text")
+    assert "20 dollars" in text
+    assert "General background" not in text
+
+
+def test_token_count_cache_is_bounded_and_keeps_no_text():
+    """The token count cache should stay small and never pin the counted text."""
+    from src.utils import tokens
+
+    pages = [f"page {i} " + FILLER for i in range(tokens.TOKEN_COUNT_CACHE_SIZE + 10)]
+    counts = [count_tokens(page) for page in pages]
+
+    assert len(tokens._count_cache) <= tokens.TOKEN_COUNT_CACHE_SIZE
+    assert not any(isinstance(key, str) for key in tokens._count_cache)
+    assert count_tokens(pages[-1]) == counts[-1]
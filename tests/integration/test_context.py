@@ -0,0 +1,57 @@
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.prompts.context import fit_messages, message_tokens
+
+FILLER = "Background paragraph about unrelated market history and trivia. " * 40
+
+
+def worker_output(name, topic):
+    paragraphs = "\n\n".join([FILLER, f"The key finding about {topic} is X.", FILLER])
+    return HumanMessage(
+        content=f"Response from {name}:\n\n<response>\n{paragraphs}\n</response>",
+        name=name,
+    )
+
+
+def history():
+    return [
+        HumanMessage(content="Compare the battery life of phones"),
+        HumanMessage(content='{"title": "plan", "steps": []}', name="planner"),
+        worker_output("researcher", "battery life"),
+        worker_output("coder", "battery charts"),
+        worker_output("researcher", "phones"),
+        AIMessage(content="thinking"),
+    ]
+
+
+def test_history_within_budget_is_unchanged():
+    """Test that no work is done when the history fits the budget."""
+    messages = history()
+    assert fit_messages("reporter", messages, budget=100_000) is messages
+
+
+def test_older_outputs_are_compacted_first():
+    """Test that old outputs shrink while the task, plan and latest step stay intact."""
+    messages = history()
+    budget = sum(message_tokens(m) for m in messages) - 500
+    fitted = fit_messages("supervisor", messages, budget=budget)
+
+    assert sum(message_tokens(m) for m in fitted) <= budget
+    assert "compacted" in fitted[2].content
+    assert "key finding about battery life" in fitted[2].content
+    assert fitted[3] is messages[3]
+    for index in (0, 1, 4, 5):
+        assert fitted[index] is messages[index]
+    assert messages[2].content.startswith("Response from researcher")
+
+
+def test_outputs_fall_back_to_references():
+    """Test that outputs become short references when summaries are not enough."""
+    messages = history()
+    fitted = fit_messages(
+        "supervisor", messages, budget=message_tokens(messages[4]) + 50
+    )
+
+    assert fitted[2].content.startswith("[Earlier response from researcher omitted")
+    assert fitted[3].content.startswith("[Earlier response from coder omitted")
+    assert fitted[4] is messages[4]
@@ -0,0 +1,215 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.crawler.crawler as crawler_module
+import src.crawler.jina_client as jina_client
+from src.crawler import Article, CrawlCache, Crawler
+from src.crawler.cache import normalize_url
+from src.crawler.extraction import ExtractionExecutor
+from src.crawler.rate_limiter import HostRateLimiter
+from src.crawler.readability_extractor import ReadabilityExtractor
+
+
+class OriginAndJinaStandIn(BaseHTTPRequestHandler):
+    """Serves as both the Jina reader (POST) and the origin site (HEAD/GET)."""
+
+    jina_requests = 0
+    head_requests = 0
+    etag = '"v1"'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        type(self).jina_requests += 1
+        body = b"<html><body><p>cached page</p></body></html>"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        type(self).head_requests += 1
+        self.send_response(200)
+        if self.etag:
+            self.send_header("ETag", self.etag)
+        self.end_headers()
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def origin(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OriginAndJinaStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setattr(jina_client, "JINA_READER_URL", base_url + "/")
+    monkeypatch.setattr(
+        ReadabilityExtractor,
+        "extract_article",
+        lambda self, html: Article(title="page", html_content=html),
+    )
+    monkeypatch.setattr(crawler_module, "_origin_has_validators", {})
+    OriginAndJinaStandIn.jina_requests = 0
+    OriginAndJinaStandIn.head_requests = 0
+    yield base_url
+    server.shutdown()
+
+
+def test_normalize_url():
+    """Test that equivalent URLs share one cache key."""
+    assert normalize_url("HTTPS://Example.com:443/a?b=2&a=1&utm_source=x#frag") == (
+        "https://example.com/a?a=1&b=2"
+    )
+    assert normalize_url("http://example.com") == "http://example.com/"
+    assert normalize_url("http://example.com:8080/") == "http://example.com:8080/"
+
+
+def test_cache_round_trip_and_counters(tmp_path):
+    """Test that a stored crawl comes back with its article and counts a hit."""
+    cache = CrawlCache(str(tmp_path))
+    cache.put("https://example.com/a", "<html>raw</html>", Article("Title", "<p>x</p>"))
+
+    entry = cache.get("https://example.com/a#section")
+    assert entry.is_fresh
+    assert entry.html == "<html>raw</html>"
+    assert entry.article.title == "Title"
+    assert cache.get("https://example.com/missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_cache_uses_domain_ttls(tmp_path):
+    """Test that per-domain TTLs apply to subdomains and expire entries."""
+    cache = CrawlCache(str(tmp_path), default_ttl=3600, domain_ttls={"news.example": 0})
+    cache.put("https://www.news.example/a", "<html/>", Article("News", "<p/>"))
+    cache.put("https://other.example/a", "<html/>", Article("Other", "<p/>"))
+
+    assert not cache.get("https://www.news.example/a").is_fresh
+    assert cache.get("https://other.example/a").is_fresh
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    """Test that the size bound evicts the least recently used entries."""
+    cache = CrawlCache(str(tmp_path), max_bytes=300)
+    for name in ("a", "b", "c"):
+        cache.put(f"https://example.com/{name}", name * 50, Article(name, name * 40))
+        time.sleep(0.01)
+    cache.get("https://example.com/a")
+    cache.put("https://example.com/d", "d" * 50, Article("d", "d" * 40))
+
+    assert cache.get("https://example.com/a") is not None
+    assert cache.get("https://example.com/b") is None
+    assert cache.stats()["bytes"] <= 300
+
+
+def test_eviction_accounts_for_shared_blobs(tmp_path):
+    """Test that a blob shared by several entries is only freed with its last one."""
+    cache = CrawlCache(str(tmp_path), max_bytes=400)
+    shared = "s" * 250
+    for name in ("a", "b"):
+        cache.put(f"https://example.com/{name}", shared, Article(name, name * 40))
+        time.sleep(0.01)
+    cache.put("https://example.com/c", "c" * 100, Article("c", "c" * 40))
+
+    # Dropping "a" alone frees only its own content, so "b" has to go too
+    assert cache.get("https://example.com/a") is None
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/c").html == "c" * 100
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] <= 400
+
+
+def test_crawler_serves_repeat_crawls_from_cache(origin, tmp_path):
+    """Test that a repeat crawl makes no Jina request."""
+    crawler = Crawler(
+        rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+        cache=CrawlCache(str(tmp_path)),
+        extraction_executor=ExtractionExecutor(use_process_pool=False),
+        use_index=False,
+    )
+    first = crawler.crawl(origin + "/page")
+    second = crawler.crawl(origin + "/page")
+
+    assert OriginAndJinaStandIn.jina_requests == 1
+    assert second.to_markdown() == first.to_markdown()
+    assert crawler.cache.stats()["hits"] == 1
+
+
+def test_crawler_revalidates_expired_entries(origin, tmp_path):
+    """Test that an expired entry is refreshed by a 304 from the origin."""
+    cache = CrawlCache(str(tmp_path), default_ttl=0)
+    crawler = Crawler(
+        rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+        cache=cache,
+        extraction_executor=ExtractionExecutor(use_process_pool=False),
+        use_index=False,
+    )
+    crawler.crawl(origin + "/page")
+
+    cache.default_ttl = 3600
+    crawler.crawl(origin + "/page")
+
+    assert OriginAndJinaStandIn.jina_requests == 1
+    assert cache.stats()["revalidations"] == 1
+    assert cache.get(origin + "/page").is_fresh
+
+
+class RecordingRateLimiter(HostRateLimiter):
+    """Host rate limiter that records the urls of every acquisition."""
+
+    def __init__(self):
+        super().__init__(rate=1000, burst=1000)
+        self.acquired = []
+
+    def acquire_sync(self, *urls):
+        self.acquired.append(urls)
+        super().acquire_sync(*urls)
+
+
+def test_origin_requests_go_through_the_rate_limiter(origin, tmp_path):
+    """Test that the validator probe and the revalidation are throttled per host."""
+    cache = CrawlCache(str(tmp_path), default_ttl=0)
+    limiter = RecordingRateLimiter()
+    crawler = Crawler(
+        rate_limiter=limiter,
+        cache=cache,
+        extraction_executor=ExtractionExecutor(use_process_pool=False),
+        use_index=False,
+    )
+    url = origin + "/page"
+    crawler.crawl(url)
+    crawler.crawl(url)
+
+    # Jina fetch, HEAD probe, conditional GET
+    assert sorted(limiter.acquired) == sorted(
+        [(crawler_module.JINA_READER_URL, url), (url,), (url,)]
+    )
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_origins_without_validators_are_not_probed_again(origin, tmp_path, monkeypatch):
+    """Test that a site that sends no ETag/Last-Modified gets no further HEAD requests."""
+    monkeypatch.setattr(OriginAndJinaStandIn, "etag", None)
+    crawler = Crawler(
+        rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+        cache=CrawlCache(str(tmp_path)),
+        extraction_executor=ExtractionExecutor(use_process_pool=False),
+        use_index=False,
+    )
+    crawler.crawl(origin + "/a")
+    crawler.crawl(origin + "/b")
+
+    assert OriginAndJinaStandIn.jina_requests == 2
+    assert OriginAndJinaStandIn.head_requests == 1
@@ -0,0 +1,112 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import src.crawler.jina_client as jina_client
+from src.crawler import Article, Crawler
+from src.crawler.extraction import ExtractionExecutor
+from src.crawler.rate_limiter import HostRateLimiter
+from src.crawler.readability_extractor import ReadabilityExtractor
+
+PAGE_DELAY = 0.3
+
+
+class JinaStandIn(BaseHTTPRequestHandler):
+    """Local stand-in for the Jina reader, delaying each response."""
+
+    def do_POST(self):
+        url = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["url"]
+        if "broken" in url:
+            self.send_response(500)
+            self.end_headers()
+            return
+        time.sleep(PAGE_DELAY * (4 if "slow" in url else 1))
+        body = f"<html><body><p>{url}</p></body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def crawler(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JinaStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        jina_client, "JINA_READER_URL", f"http://127.0.0.1:{server.server_address[1]}/"
+    )
+    monkeypatch.setattr(
+        ReadabilityExtractor,
+        "extract_article",
+        lambda self, html: Article(title="page", html_content=html),
+    )
+    yield Crawler(
+        rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+        use_cache=False,
+        extraction_executor=ExtractionExecutor(use_process_pool=False),
+        use_index=False,
+    )
+    server.shutdown()
+
+
+def test_crawl_many_runs_concurrently(crawler):
+    """Test that a batch takes about one round trip instead of one per URL."""
+    urls = [f"https://site{i}.example/page" for i in range(6)]
+    started = time.monotonic()
+    results = list(crawler.crawl_many(urls, max_concurrency=6))
+    elapsed = time.monotonic() - started
+
+    assert sorted(result.url for result in results) == sorted(urls)
+    assert all(result.article is not None for result in results)
+    assert elapsed < PAGE_DELAY * len(urls) / 2
+
+
+def test_crawl_many_streams_results_as_they_finish(crawler):
+    """Test that fast pages are not held back by a slow one."""
+    urls = ["https://slow.example/", "https://fast.example/a", "https://fast.example/b"]
+    results = crawler.crawl_many(urls)
+    first = next(results)
+    assert first.url != "https://slow.example/"
+    assert [result.url for result in results][-1] == "https://slow.example/"
+
+
+def test_crawl_many_reports_failures(crawler):
+    """Test that a failing URL is reported without affecting the others."""
+    results = {
+        result.url: result
+        for result in crawler.crawl_many(
+            ["https://ok.example/", "https://broken.example/", "https://ok.example/"]
+        )
+    }
+    assert len(results) == 2
+    assert results["https://ok.example/"].article is not None
+    assert results["https://broken.example/"].error is not None
+
+
+def test_host_rate_limiter_spaces_requests_per_host():
+    """Test that each host gets its own token bucket."""
+    limiter = HostRateLimiter(rate=10, burst=1)
+    delays = [limiter.bucket_for("https://a.example/").reserve() for _ in range(3)]
+    assert delays[0] == 0
+    assert delays[1] == pytest.approx(0.1, abs=0.02)
+    assert delays[2] == pytest.approx(0.2, abs=0.02)
+    assert limiter.bucket_for("https://b.example/").reserve() == 0
+
+
+def test_crawl_many_tool_accepts_no_urls():
+    """Test that an empty url list returns a message instead of failing."""
+    from src.tools.crawl import crawl_many_tool
+
+    expected = {
+        "role": "user",
+        "content": [{"type": "text", "text": "No urls to crawl."}],
+    }
+    assert crawl_many_tool.invoke({"urls": []}) == expected
+    assert asyncio.run(crawl_many_tool.ainvoke({"urls": []})) == expected
@@ -0,0 +1,75 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import src.crawler.extraction as extraction
+from src.crawler.extraction import ExtractionExecutor
+from src.crawler.readability_extractor import FallbackExtractor
+
+PAGE = (
+    "<html><head><title>Quarterly results</title><script>track()</script></head>"
+    "<body><nav>Home | About</nav><article><p>Revenue grew 12%.</p></article>"
+    "<footer>Copyright</footer></body></html>"
+)
+
+
+def test_fallback_extractor_keeps_main_content():
+    """Test that the fallback extractor drops boilerplate around the article."""
+    article = FallbackExtractor().extract_article(PAGE)
+    assert article.title == "Quarterly results"
+    assert "Revenue grew 12%." in article.html_content
+    assert "Home | About" not in article.html_content
+    assert "track()" not in article.html_content
+
+
+def test_oversized_html_skips_the_process_pool():
+    """Test that pages over the size limit go straight to the fallback extractor."""
+    executor = ExtractionExecutor(max_html_bytes=64)
+    article = executor.extract(PAGE)
+    assert "Revenue grew 12%." in article.html_content
+    assert executor._pool is None
+
+
+def slow_extract(html):
+    """Stand-in for the worker function; runs in the spawned worker process."""
+    import time
+
+    time.sleep(float(html))
+    return "slow", "<p>slow</p>"
+
+
+def test_process_pool_path_and_timeouts(monkeypatch):
+    """Test process-pool extraction, queueing outside the timeout and the timeout fallback."""
+    # Starting the worker takes longer than the timeout; it must not count
+    executor = ExtractionExecutor(max_workers=1, timeout=1.0)
+    try:
+        # Readability extraction in the worker process (also starts the worker)
+        article = executor.extract(PAGE)
+        assert "Revenue grew 12%." in article.html_content
+        assert executor._pool is not None
+
+        monkeypatch.setattr(extraction, "_extract_in_worker", slow_extract)
+        # The worker imports this module on its first slow task; do that untimed
+        executor.timeout = 30
+        assert executor.extract("0").title == "slow"
+
+        executor.timeout = 1.5
+        # Two 1s extractions on one worker: the second waits for the worker,
+        # and that wait does not count towards its 1.5s timeout
+        with ThreadPoolExecutor(max_workers=2) as callers:
+            titles = [a.title for a in callers.map(executor.extract, ["1.0", "1.0"])]
+        assert titles == ["slow", "slow"]
+
+        # An extraction over the timeout falls back without waiting for the worker,
+        # and the stuck worker is terminated instead of holding its slot
+        workers = list(executor._pool._processes.values())
+        started = time.monotonic()
+        article = executor.extract("30")
+        assert article.title != "slow"
+        assert time.monotonic() - started < 2.5
+        for worker in workers:
+            worker.join(timeout=5)
+            assert not worker.is_alive()
+        assert executor._slots.acquire(timeout=5)
+        executor._slots.release()
+    finally:
+        executor.shutdown()
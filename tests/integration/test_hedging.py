@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import httpx
+from langchain_core.runnables.config import var_child_runnable_config
+
+from src.agents.hedging import AsyncHedgingTransport, HedgingTransport, RequestHedger
+
+URL = "http://llm/v1/chat/completions"
+
+
+def warmed_hedger(**kwargs):
+    """Build a supervisor hedger whose latency history gives a 50ms hedge delay."""
+    hedger = RequestHedger("basic", agents={"supervisor"}, min_delay=0.05, **kwargs)
+    for _ in range(hedger.window):
+        hedger.record("supervisor", 0.01)
+    return hedger
+
+
+def in_node(name):
+    """Make calls look like they come from the given graph node."""
+    return var_child_runnable_config.set({"metadata": {"langgraph_node": name}})
+
+
+def test_slow_request_is_hedged():
+    """Test that a stalled call is answered by the hedge request."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) == 1:
+            time.sleep(1.0)
+        return httpx.Response(200, json={"call": len(calls)})
+
+    hedger = warmed_hedger(max_ratio=1.0)
+    client = httpx.Client(
+        transport=HedgingTransport(hedger, httpx.MockTransport(handler))
+    )
+    token = in_node("supervisor")
+    try:
+        started = time.monotonic()
+        response = client.post(URL, json={"model": "test"})
+        elapsed = time.monotonic() - started
+    finally:
+        var_child_runnable_config.reset(token)
+
+    assert response.json() == {"call": 2}
+    assert elapsed < 0.5
+    assert calls[1].content == calls[0].content
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["hedge_wins"]) == (1, 1)
+
+
+def test_hedging_respects_budget_and_agents():
+    """Test that hedges stop when the budget is spent and skip other agents."""
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        time.sleep(0.1)
+        return httpx.Response(200, json={})
+
+    hedger = warmed_hedger(max_ratio=0.5, burst=1)
+    client = httpx.Client(
+        transport=HedgingTransport(hedger, httpx.MockTransport(handler))
+    )
+    token = in_node("supervisor")
+    try:
+        for _ in range(4):
+            client.post(URL, json={})
+    finally:
+        var_child_runnable_config.reset(token)
+    token = in_node("reporter")
+    try:
+        client.post(URL, json={})
+    finally:
+        var_child_runnable_config.reset(token)
+
+    stats = hedger.stats()
+    assert stats["requests"] == 4
+    assert stats["hedged"] == 2
+    assert stats["budget_exhausted"] == 2
+    assert len(calls) == 4 + 2 + 1
+
+
+def test_async_hedge_cancels_the_loser():
+    """Test that the slower async request is cancelled once the hedge answers."""
+    cancelled = []
+
+    async def handler(request):
+        if not cancelled:
+            cancelled.append(False)
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled[0] = True
+                raise
+        return httpx.Response(200, json={})
+
+    hedger = warmed_hedger(max_ratio=1.0)
+    transport = AsyncHedgingTransport(hedger, httpx.MockTransport(handler))
+
+    async def call():
+        token = in_node("supervisor")
+        try:
+            async with httpx.AsyncClient(transport=transport) as client:
+                response = await client.post(URL, json={})
+            await asyncio.sleep(0)
+            return response
+        finally:
+            var_child_runnable_config.reset(token)
+
+    assert asyncio.run(call()).status_code == 200
+    assert cancelled == [True]
+    assert hedger.stats()["hedge_wins"] == 1
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "browser_use",
+    "langchain_openai",
+    "langchain_deepseek",
+    "src.agents.agents",
+    "src.tools.browser",
+    "src.tools.crawl",
+    "src.tools.search",
+]
+
+
+def test_importing_the_app_does_not_load_agents_or_tools():
+    """Test that LLM clients, agents and tools are only loaded on first use."""
+    script = (
+        "import sys, src.api.app; "
+        f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", script], capture_output=True, text=True, check=True
+    ).stdout
+    assert output.strip().splitlines()[-1] == "[]"
+
+
+def test_agents_are_created_once_on_first_use(monkeypatch):
+    """Test that agent attributes resolve lazily to one cached instance."""
+    # Creating the agent creates its LLM client and search tool, which need keys
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    from src import agents
+
+    assert agents.research_agent is agents.get_agent("researcher")
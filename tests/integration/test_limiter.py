@@ -0,0 +1,90 @@
+import threading
+import time
+
+import httpx
+
+from src.agents.limiter import AdaptiveLimiter, LimitingTransport
+
+
+def test_queued_callers_are_granted_by_priority():
+    """Test that a freed slot goes to the most important waiting caller."""
+    limiter = AdaptiveLimiter("basic", initial_limit=1)
+    assert limiter.acquire()
+
+    granted = []
+
+    def wait_for_slot(priority):
+        assert limiter.acquire(priority)
+        granted.append(priority)
+        limiter.release(None)
+
+    threads = []
+    for priority in (3, 0, 2):
+        thread = threading.Thread(target=wait_for_slot, args=(priority,))
+        thread.start()
+        threads.append(thread)
+        while limiter.stats()["queue_depth"] < len(threads):
+            time.sleep(0.01)
+
+    assert limiter.stats()["queue_depth_by_priority"] == {0: 1, 2: 1, 3: 1}
+    limiter.release(None)
+    for thread in threads:
+        thread.join()
+
+    assert granted == [0, 2, 3]
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_full_queue_returns_synthetic_throttling():
+    """Test that callers beyond the queue bound get a local 429 response."""
+    limiter = AdaptiveLimiter("basic", initial_limit=1, max_queue=0)
+    upstream = httpx.MockTransport(
+        lambda request: httpx.Response(200, content=iter([b"{}"]))
+    )
+    client = httpx.Client(transport=LimitingTransport(limiter, upstream))
+
+    with client.stream("POST", "http://llm/v1/chat/completions") as first:
+        assert first.status_code == 200
+        second = client.post("http://llm/v1/chat/completions")
+        assert second.status_code == 429
+        assert second.headers["Retry-After"] == "1"
+
+    assert limiter.stats()["rejected"] == 1
+    assert limiter.stats()["inflight"] == 0
+
+
+def test_limit_adapts_to_throttling():
+    """Test multiplicative decrease on 429s and 5xx, additive increase otherwise."""
+    limiter = AdaptiveLimiter("basic", initial_limit=10, backoff_ratio=0.5)
+
+    limiter.acquire()
+    limiter.release(None, throttled=True)
+    assert limiter.stats()["limit"] == 5
+    assert limiter.stats()["throttled"] == 1
+
+    for _ in range(5):
+        limiter.acquire()
+    for _ in range(5):
+        limiter.release(0.1)
+    assert limiter.stats()["limit"] == 5.2
+
+    limiter._last_backoff = 0.0
+    upstream = httpx.MockTransport(lambda request: httpx.Response(503))
+    client = httpx.Client(transport=LimitingTransport(limiter, upstream))
+    client.post("http://llm/v1/chat/completions")
+    assert limiter.stats()["limit"] == 2.6
+    assert limiter.stats()["throttled"] == 2
+
+
+def test_slow_calls_do_not_shrink_the_limit():
+    """Test that long generations mixed with short calls are not treated as congestion."""
+    limiter = AdaptiveLimiter("basic", initial_limit=4)
+    for _ in range(50):
+        for latency in (0.4, 0.6, 3.0, 8.0):
+            for _ in range(4):
+                limiter.acquire()
+            for _ in range(4):
+                limiter.release(latency)
+
+    assert limiter.stats()["limit"] > 4
+    assert limiter.stats()["throttled"] == 0
@@ -0,0 +1,121 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.tools import BaseTool
+
+import src.crawler.jina_client as jina_client
+from src.crawler import Article, Crawler
+from src.crawler.extraction import ExtractionExecutor
+from src.crawler.local_index import LocalIndex
+from src.crawler.rate_limiter import HostRateLimiter
+from src.crawler.readability_extractor import ReadabilityExtractor
+from src.tools.decorators import create_local_search_tool
+
+
+def add(index, url, title, body):
+    index.add(url, Article(title=title, html_content=f"<p>{body}</p>"))
+
+
+def test_search_ranks_matching_documents(tmp_path):
+    """Test that BM25 puts the most relevant page first with a useful snippet."""
+    index = LocalIndex(str(tmp_path / "index.sqlite"))
+    add(
+        index,
+        "https://a.example/",
+        "Rust ownership",
+        "The borrow checker enforces ownership.",
+    )
+    add(index, "https://b.example/", "Gardening", "Tomatoes need sun and water.")
+    add(index, "https://c.example/", "Rust tooling", "Cargo builds crates.")
+
+    results = index.search("rust borrow checker")
+    assert [result["url"] for result in results] == [
+        "https://a.example/",
+        "https://c.example/",
+    ]
+    assert "borrow checker" in results[0]["content"]
+    assert 0 < results[1]["score"] < results[0]["score"] < 1
+
+
+def test_reindexing_replaces_documents_and_persists(tmp_path):
+    """Test that re-crawled pages replace their old postings on disk."""
+    path = str(tmp_path / "index.sqlite")
+    index = LocalIndex(path)
+    add(index, "https://a.example/?utm_source=x", "Old", "obsolete words")
+    add(index, "https://a.example/", "New", "fresh words")
+
+    reopened = LocalIndex(path)
+    assert len(reopened) == 1
+    assert reopened.search("obsolete") == []
+    assert reopened.search("fresh")[0]["title"] == "New"
+
+
+class JinaStandIn(BaseHTTPRequestHandler):
+    def do_POST(self):
+        url = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["url"]
+        body = f"<p>Article about quantum error correction at {url}</p>".encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_crawler_indexes_crawled_pages(tmp_path, monkeypatch):
+    """Test that every fresh crawl becomes searchable offline."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JinaStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(
+        jina_client, "JINA_READER_URL", f"http://127.0.0.1:{server.server_address[1]}/"
+    )
+    monkeypatch.setattr(
+        ReadabilityExtractor,
+        "extract_article",
+        lambda self, html: Article(title="page", html_content=html),
+    )
+    index = LocalIndex(str(tmp_path / "index.sqlite"))
+    crawler = Crawler(
+        rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+        use_cache=False,
+        extraction_executor=ExtractionExecutor(use_process_pool=False),
+        index=index,
+    )
+    list(crawler.crawl_many(["https://q1.example/", "https://q2.example/"]))
+    server.shutdown()
+
+    assert len(index.search("quantum error correction")) == 2
+
+
+class RemoteSearch(BaseTool):
+    name: str = "remote_search"
+    description: str = "test search"
+    response_format: str = "content_and_artifact"
+    max_results: int = 5
+    calls: int = 0
+
+    def _run(self, query, run_manager=None):
+        self.calls += 1
+        return [{"url": "https://remote.example/", "score": 0.9}], {}
+
+
+def test_search_backends(tmp_path):
+    """Test local_first falls back to the remote tool only when needed."""
+    index = LocalIndex(str(tmp_path / "index.sqlite"))
+    add(index, "https://a.example/", "Rust ownership", "The borrow checker.")
+
+    local_first = create_local_search_tool(
+        RemoteSearch, lambda: index, "local_first", min_local_results=1
+    )()
+    assert local_first.invoke({"query": "borrow checker"})[0]["url"] == (
+        "https://a.example/"
+    )
+    assert local_first.calls == 0
+    local_first.invoke({"query": "gardening"})
+    assert local_first.calls == 1
+
+    offline = create_local_search_tool(RemoteSearch, lambda: index, "local")()
+    assert offline.invoke({"query": "gardening"}) == []
+    assert offline.calls == 0
@@ -0,0 +1,75 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+
+from src.prompts.template import apply_prompt_template
+from src.prompts.views import MessageView
+from src.utils.tokens import count_tokens
+
+PAGE = "Raw crawled page text with many details. " * 200
+
+
+def transcript():
+    return [
+        HumanMessage(content="Chart the stock price", id="m1"),
+        HumanMessage(
+            content=f"Response from researcher:\n\n<response>\n{PAGE}\n</response>",
+            name="researcher",
+            id="m2",
+        ),
+        HumanMessage(
+            content=[
+                {"type": "text", "text": "Screenshot of the page"},
+                {
+                    "type": "image_url",
+                    "image_url": {"url": "data:image/png;base64,AAAA"},
+                },
+            ],
+            name="browser",
+            id="m3",
+        ),
+        HumanMessage(content="Final report", name="reporter", id="m4"),
+        AIMessage(content="", id="m5"),
+        ToolMessage(content=PAGE, tool_call_id="call-1", id="m6"),
+    ]
+
+
+def test_view_projects_messages_by_sender():
+    """Test truncation, exclusion and image removal by sender."""
+    view = MessageView(
+        {
+            "researcher": {"max_tokens": 50},
+            "browser": {"images": False},
+            "reporter": {"include": False},
+        }
+    )
+    messages = transcript()
+    projected = view.project(messages)
+
+    assert [m.id for m in projected] == ["m1", "m2", "m3", "m5", "m6"]
+    assert projected[0] is messages[0]
+    researcher = projected[1].content
+    assert researcher.startswith("Response from researcher:\n\n<response>\n")
+    assert researcher.endswith("tokens]\n</response>")
+    assert count_tokens(researcher) < 100
+    assert projected[2].content == [{"type": "text", "text": "Screenshot of the page"}]
+    assert projected[3] is messages[4] and projected[4] is messages[5]
+
+
+def test_view_reuses_projections_as_history_grows():
+    """Test that earlier messages are projected once and reused on later turns."""
+    view = MessageView({"researcher": {"max_tokens": 50}})
+    messages = transcript()
+    first = view.project(messages[:2])
+    second = view.project(messages + [HumanMessage(content="more", id="m7")])
+
+    assert second[1] is first[1]
+    assert second[-1].id == "m7"
+
+
+def test_supervisor_sees_short_step_outcomes():
+    """Test that the configured supervisor view shrinks raw agent outputs."""
+    state = {"TEAM_MEMBERS": [], "messages": transcript()[:2]}
+    supervisor = apply_prompt_template("supervisor", state)
+    reporter = apply_prompt_template("reporter", state)
+
+    assert count_tokens(supervisor[-1].content) < count_tokens(PAGE) / 2
+    assert reporter[-1] is state["messages"][-1]
@@ -0,0 +1,64 @@
+import asyncio
+import time
+
+import pytest
+
+import src.tools.search as search
+from src.tools.search import tavily_multi_search_tool
+
+RESULTS = {
+    "rust": [
+        {"url": "https://a.example/post?utm_source=x", "score": 0.5},
+        {"url": "https://b.example/", "score": 0.9},
+    ],
+    "rust async": [
+        {"url": "https://a.example/post", "score": 0.8},
+        {"url": "https://c.example/", "score": 0.1},
+    ],
+}
+
+
+class FakeTavily:
+    """Stand-in for tavily_tool with a fixed latency per query."""
+
+    def invoke(self, tool_input):
+        time.sleep(0.2)
+        return RESULTS.get(tool_input["query"], "HTTPError('boom')")
+
+    async def ainvoke(self, tool_input):
+        await asyncio.sleep(0.2)
+        return RESULTS.get(tool_input["query"], "HTTPError('boom')")
+
+
+@pytest.fixture(autouse=True)
+def fake_tavily(monkeypatch):
+    # The real tool is created on first access and needs a key
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(search, "tavily_tool", FakeTavily())
+
+
+def test_multi_search_merges_and_ranks_results():
+    """Test that duplicate URLs keep their best score and results are ranked."""
+    started = time.monotonic()
+    results = tavily_multi_search_tool.invoke({"queries": ["rust", "rust async"]})
+
+    assert time.monotonic() - started < 0.35
+    assert [item["url"] for item in results] == [
+        "https://b.example/",
+        "https://a.example/post",
+        "https://c.example/",
+    ]
+
+
+def test_multi_search_async_skips_failed_queries():
+    """Test that a failing query does not hide the others' results."""
+    results = asyncio.run(
+        tavily_multi_search_tool.ainvoke({"queries": ["rust", "broken"]})
+    )
+    assert len(results) == 2
+
+
+def test_multi_search_reports_when_all_queries_fail():
+    """Test that an error message is returned when nothing succeeded."""
+    result = tavily_multi_search_tool.invoke({"queries": ["broken"]})
+    assert result.startswith("Failed to search.")
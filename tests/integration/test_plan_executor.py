@@ -0,0 +1,70 @@
+import json
+import time
+
+from langgraph.graph import START, StateGraph
+
+from src.config import TEAM_MEMBERS
+from src.graph.executor import executor_node, plan_dependencies
+from src.graph.nodes import agent_output
+from src.graph.types import State
+
+PLAN = {
+    "thought": "Compare three phones",
+    "title": "Phone comparison",
+    "steps": [
+        {"agent_name": "researcher", "title": "Phone A", "description": "Research A"},
+        {"agent_name": "researcher", "title": "Phone B", "description": "Research B"},
+        {"agent_name": "researcher", "title": "Phone C", "description": "Research C"},
+        {
+            "agent_name": "coder",
+            "title": "Chart",
+            "description": "Chart prices of B",
+            "depends_on": [2],
+        },
+        {"agent_name": "reporter", "title": "Report", "description": "Write it up"},
+    ],
+}
+
+
+def test_dependencies_are_explicit_or_inferred():
+    """Test depends_on parsing and the reporter-waits-for-everything default."""
+    assert plan_dependencies(PLAN["steps"]) == [set(), set(), set(), {1}, {0, 1, 2, 3}]
+
+
+def fake_agent(name):
+    def node(state):
+        time.sleep(0.3)
+        task = state["messages"][-1].content.splitlines()[0]
+        return agent_output(state, name, task)
+
+    return node
+
+
+def test_independent_steps_run_in_parallel():
+    """Test fan-out of ready steps and in-order merging of their results."""
+    builder = StateGraph(State)
+    builder.add_edge(START, "executor")
+    builder.add_node("executor", executor_node)
+    builder.add_node("supervisor", lambda state: {})
+    for name in TEAM_MEMBERS:
+        builder.add_node(name, fake_agent(name))
+    graph = builder.compile()
+
+    started = time.monotonic()
+    result = graph.invoke(
+        {
+            "messages": [{"role": "user", "content": "Compare phones"}],
+            "full_plan": json.dumps(PLAN),
+            "execution_mode": "parallel",
+        }
+    )
+    elapsed = time.monotonic() - started
+
+    # Three waves: research A/B/C together, then the chart, then the report
+    assert elapsed < 1.3
+    outputs = [m for m in result["messages"] if m.name in TEAM_MEMBERS]
+    assert [m.name for m in outputs] == ["researcher"] * 3 + ["coder", "reporter"]
+    assert [f"step {i} " in m.content for i, m in enumerate(outputs, start=1)] == [
+        True
+    ] * 5
+    assert result["merged_steps"] == [0, 1, 2, 3, 4]
@@ -0,0 +1,123 @@
+import json
+
+from langchain_core.messages import AIMessage, AIMessageChunk, HumanMessage
+
+import src.graph.nodes as nodes
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+from src.graph.plan_follower import step_issue
+from src.graph.types import RESPONSE_FORMAT
+
+PLAN = {
+    "thought": "Chart phone prices",
+    "title": "Phone prices",
+    "steps": [
+        {"agent_name": "researcher", "title": "Prices", "description": "Find prices"},
+        {"agent_name": "coder", "title": "Chart", "description": "Chart prices"},
+        {"agent_name": "reporter", "title": "Report", "description": "Write it up"},
+    ],
+}
+
+
+class FakeLLM:
+    """Fake LLM/agent with scripted outputs, recording supervisor decisions."""
+
+    def __init__(self, name, outputs, supervisor_calls):
+        self.name = name
+        self.outputs = outputs
+        self.supervisor_calls = supervisor_calls
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, state):
+        if self.name == "supervisor":
+            self.supervisor_calls.append(state)
+            return {"next": self.outputs["supervisor"].pop(0)}
+        if self.name == "coordinator":
+            return AIMessage(content="handoff_to_planner()")
+        if self.name == "reporter":
+            return AIMessage(content="report")
+        return {"messages": [AIMessage(content=self.outputs[self.name].pop(0))]}
+
+    def stream(self, messages):
+        yield AIMessageChunk(content=json.dumps(PLAN))
+
+
+def run_planned(monkeypatch, outputs):
+    supervisor_calls = []
+    factory = lambda name, *args: FakeLLM(name, outputs, supervisor_calls)
+    monkeypatch.setattr(nodes, "get_agent", factory)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", factory)
+    result = build_graph().invoke(
+        {
+            "TEAM_MEMBERS": TEAM_MEMBERS,
+            "messages": [{"role": "user", "content": "Chart phone prices"}],
+            "execution_mode": "planned",
+        }
+    )
+    outputs = [m.name for m in result["messages"] if m.name in TEAM_MEMBERS]
+    return outputs, len(supervisor_calls)
+
+
+def test_step_issue_heuristics():
+    """Test the checks that decide whether a step needs the supervisor."""
+    ok = HumanMessage(content=RESPONSE_FORMAT.format("coder", "42"), name="coder")
+    empty = HumanMessage(content=RESPONSE_FORMAT.format("coder", " "), name="coder")
+    failed = HumanMessage(
+        content=RESPONSE_FORMAT.format("coder", "Failed to execute."), name="coder"
+    )
+    assert step_issue(ok, "coder") is None
+    assert "expected output from researcher" in step_issue(ok, "researcher")
+    assert "empty" in step_issue(empty, "coder")
+    assert "failure" in step_issue(failed, "coder")
+
+
+def test_failure_markers_match_whole_phrases():
+    """Test that answers merely starting with a marker word are not failures."""
+
+    def issue(body):
+        message = HumanMessage(
+            content=RESPONSE_FORMAT.format("coder", body), name="coder"
+        )
+        return step_issue(message, "coder")
+
+    for body in (
+        "Errors in the dataset were corrected before charting.",
+        "Unfortunately, the data shows a decline in sales.",
+        "Failed tokens per second dropped to zero after the fix.",
+        "I'm sorry to report prices rose 5%.",
+    ):
+        assert issue(body) is None, body
+    for body in (
+        "Error: the API returned 500",
+        "NameError: name 'df' is not defined",
+        "Traceback (most recent call last):\n  File ...",
+        "Unfortunately, I was unable to find the data.",
+        "I'm sorry, but I can't access that site.",
+    ):
+        assert issue(body) is not None, body
+
+
+def test_plan_is_followed_without_supervisor(monkeypatch):
+    """Test that a clean run dispatches every step without a supervisor LLM call."""
+    outputs, supervisor_calls = run_planned(
+        monkeypatch, {"researcher": ["prices"], "coder": ["chart"], "supervisor": []}
+    )
+    assert outputs == ["researcher", "coder", "reporter"]
+    assert supervisor_calls == 0
+
+
+def test_failed_step_asks_supervisor(monkeypatch):
+    """Test that a failed step is reviewed by the supervisor and can be retried."""
+    outputs, supervisor_calls = run_planned(
+        monkeypatch,
+        {
+            "researcher": ["prices"],
+            "coder": ["Failed to execute. Error: NameError", "chart"],
+            "supervisor": ["coder"],
+        },
+    )
+    # The retried coder step is accepted and the plan continues with the reporter
+    assert outputs == ["researcher", "coder", "coder", "reporter"]
+    assert supervisor_calls == 1
@@ -0,0 +1,258 @@
+import asyncio
+import json
+import time
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+
+import src.graph.nodes as nodes
+import src.graph.plan_stream as plan_stream
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+from src.graph.plan_stream import PlanStreamParser
+from src.service.workflow_service import run_agent_workflow
+
+PLAN = {
+    "thought": 'Braces {like these} and "quotes" must not confuse the parser',
+    "title": "Phone comparison",
+    "steps": [
+        {"agent_name": "researcher", "title": "Phone A", "description": "Research [A]"},
+        {
+            "agent_name": "coder",
+            "title": "Chart",
+            "description": "Chart {prices}",
+            "depends_on": [1],
+        },
+        {"agent_name": "reporter", "title": "Report", "description": "Write it up"},
+    ],
+}
+
+
+def test_steps_are_emitted_as_soon_as_complete():
+    """Test that each step is parsed before the rest of the plan has streamed."""
+    text = "```json\n" + json.dumps(PLAN, indent=2) + "\n```"
+    parser = PlanStreamParser()
+    emitted_at = []
+    for position in range(0, len(text), 7):
+        for step in parser.feed(text[position : position + 7]):
+            emitted_at.append((position, step))
+
+    assert [step for _, step in emitted_at] == PLAN["steps"]
+    # The first step is available well before the stream ends
+    first_step_end = text.index("}", text.index('"steps"')) + 1
+    assert emitted_at[0][0] < first_step_end
+    assert parser.done and not parser.failed
+
+
+def test_malformed_stream_stops_parsing():
+    """Test that a malformed stream is abandoned without raising."""
+    parser = PlanStreamParser()
+    assert parser.feed(
+        '{"steps": [{"agent_name": "researcher"}, {"agent_name": ]}'
+    ) == [{"agent_name": "researcher"}]
+    assert parser.failed
+    assert parser.feed('{"steps": [{"agent_name": "coder"}]}') == []
+
+
+def test_each_agent_is_prefetched_once(monkeypatch):
+    """Test that prefetchers run in the background once per agent."""
+    seen = []
+    monkeypatch.setattr(plan_stream, "_prefetched", set())
+    monkeypatch.setitem(plan_stream.STEP_PREFETCHERS, "coder", seen.append)
+    parser = PlanStreamParser(on_step=plan_stream.prefetch_step)
+    parser.feed(json.dumps({"steps": [PLAN["steps"][1], PLAN["steps"][1]]}))
+    plan_stream._prefetch_executor.shutdown(wait=True)
+    plan_stream._prefetch_executor = None
+
+    assert seen == [PLAN["steps"][1]]
+
+
+DELAY = 0.3
+
+
+@tool
+def lookup(query: str) -> str:
+    """Look up prices."""
+    return "prices"
+
+
+async def fake_researcher(state):
+    """Stand-in research agent: one tool call and one streamed answer."""
+    FakeLLM.calls.append(("researcher", state["messages"][-1].content))
+    try:
+        call = {"type": "tool_call", "id": "call-1", "name": "lookup"}
+        await lookup.ainvoke({**call, "args": {"query": "phones"}})
+        await asyncio.sleep(2 * DELAY)
+    except asyncio.CancelledError:
+        FakeLLM.calls.append(("researcher cancelled", None))
+        raise
+    model = GenericFakeChatModel(messages=iter([AIMessage(content="researcher done")]))
+    return {"messages": [await model.ainvoke(state["messages"])]}
+
+
+class FakeLLM:
+    """Fake LLM/agent whose planner streams slowly after the first step."""
+
+    calls = []
+    plan = PLAN
+
+    def __init__(self, name, *args):
+        self.name = name
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, state):
+        FakeLLM.calls.append((self.name, None))
+        if self.name == "coordinator":
+            return AIMessage(content="handoff_to_planner()")
+        if self.name == "supervisor":
+            return {"next": "FINISH"}
+        if self.name == "reporter":
+            return AIMessage(content="report")
+        return {"messages": [AIMessage(content=f"{self.name} done")]}
+
+    async def ainvoke(self, state):
+        return self.invoke(state)
+
+    def stream(self, messages):
+        text = json.dumps(FakeLLM.plan)
+        split = text.index("}", text.index('"steps"')) + 1
+        yield AIMessageChunk(content=text[:split])
+        time.sleep(DELAY)
+        FakeLLM.calls.append(("planner done", None))
+        yield AIMessageChunk(content=text[split:])
+
+    async def astream(self, messages):
+        text = json.dumps(FakeLLM.plan)
+        split = text.index("}", text.index('"steps"')) + 1
+        yield AIMessageChunk(content=text[:split])
+        await asyncio.sleep(DELAY)
+        FakeLLM.calls.append(("planner done", None))
+        yield AIMessageChunk(content=text[split:])
+
+
+def get_fake_agent(name, *args):
+    if name == "researcher":
+        return RunnableLambda(fake_researcher)
+    return FakeLLM(name)
+
+
+def setup_planned(monkeypatch, plan=PLAN):
+    monkeypatch.setattr(nodes, "get_agent", get_fake_agent)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", FakeLLM)
+    monkeypatch.setattr(plan_stream, "STEP_PREFETCHERS", {})
+    FakeLLM.calls, FakeLLM.plan = [], plan
+    return {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": [{"role": "user", "content": "Chart phone prices"}],
+        "execution_mode": "planned",
+    }
+
+
+def call_names():
+    return [name for name, _ in FakeLLM.calls]
+
+
+def test_sync_planner_only_prefetches(monkeypatch):
+    """Test that the sync planner does not run the first step before the plan is done."""
+    graph_input = setup_planned(monkeypatch)
+    monkeypatch.setattr(nodes, "get_agent", FakeLLM)
+    build_graph().invoke(graph_input)
+
+    assert call_names() == [
+        "coordinator",
+        "planner done",
+        "researcher",
+        "coder",
+        "reporter",
+    ]
+
+
+def test_first_step_is_handed_to_its_agent_node(monkeypatch):
+    """Test that step 1 starts while planning and its node waits for it, not the planner."""
+    graph_input = setup_planned(monkeypatch)
+
+    async def run():
+        ends = []
+        async for event in build_graph().astream_events(graph_input, version="v2"):
+            if event["event"] == "on_chain_end" and event["name"] in (
+                "planner",
+                "researcher",
+            ):
+                ends.append(event["name"])
+        return ends
+
+    start = time.monotonic()
+    ends = asyncio.run(run())
+
+    assert call_names() == [
+        "coordinator",
+        "researcher",
+        "planner done",
+        "coder",
+        "reporter",
+    ]
+    # The researcher overlapped the rest of the plan stream, and saw the plan so far
+    assert time.monotonic() - start < 3 * DELAY
+    task = FakeLLM.calls[1][1]
+    assert task == "Please execute step 1 of the plan: Phone A\n\nResearch [A]"
+    # The planner finished without waiting for the step
+    assert ends[0] == "planner"
+
+
+def test_speculative_step_streams_to_the_client(monkeypatch):
+    """Test that the client sees the early step's tool call and output as the researcher's."""
+    graph_input = setup_planned(monkeypatch)
+
+    async def run():
+        return [
+            event
+            async for event in run_agent_workflow(
+                graph_input["messages"], execution_mode="planned"
+            )
+        ]
+
+    events = [
+        (e["event"], e["data"].get("agent_name") or e["data"].get("tool_name"))
+        for e in asyncio.run(run())
+        if e["event"] in ("start_of_agent", "end_of_agent", "tool_call")
+    ]
+    assert events == [
+        ("start_of_agent", "coordinator"),
+        ("end_of_agent", "coordinator"),
+        ("start_of_agent", "planner"),
+        ("start_of_agent", "researcher"),
+        ("tool_call", "lookup"),
+        ("end_of_agent", "planner"),
+        ("end_of_agent", "researcher"),
+        ("start_of_agent", "coder"),
+        ("end_of_agent", "coder"),
+        ("start_of_agent", "reporter"),
+        ("end_of_agent", "reporter"),
+    ]
+
+
+def test_changed_plan_cancels_the_speculative_step(monkeypatch):
+    """Test that a plan that cannot be followed cancels the running step."""
+    plan = {**PLAN, "steps": PLAN["steps"] + [{"agent_name": "unknown", "title": "?"}]}
+    graph_input = setup_planned(monkeypatch, plan)
+
+    async def run():
+        events = [
+            event["event"]
+            async for event in run_agent_workflow(
+                graph_input["messages"], execution_mode="planned"
+            )
+            if event["event"] in ("start_of_agent", "end_of_agent")
+            and event["data"]["agent_name"] == "researcher"
+        ]
+        # Give a leaked step the time it would need to finish
+        await asyncio.sleep(2 * DELAY)
+        return events
+
+    events = asyncio.run(run())
+    assert "researcher cancelled" in call_names()
+    assert events == ["start_of_agent", "end_of_agent"]
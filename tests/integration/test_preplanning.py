@@ -0,0 +1,155 @@
+import asyncio
+import json
+import time
+
+import httpx
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+import src.agents.llm as llm_module
+import src.graph.nodes as nodes
+import src.tools.search as search
+from src.agents.llm import awarm_up_llm, create_deepseek_llm, warm_up_llm
+from src.config import TEAM_MEMBERS
+from src.graph import build_graph
+
+PLAN = {
+    "thought": "Answer directly",
+    "title": "Answer",
+    "steps": [{"agent_name": "reporter", "title": "Report", "description": "Answer"}],
+}
+DELAY = 0.3
+
+
+class FakeSearch:
+    """Fake search tool that records when each query started and finished."""
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    def invoke(self, query):
+        self.started.append(time.monotonic())
+        time.sleep(DELAY)
+        return [{"title": "Result", "content": "search result"}]
+
+    async def ainvoke(self, query):
+        self.started.append(time.monotonic())
+        await asyncio.sleep(DELAY)
+        self.finished.append(time.monotonic())
+        return [{"title": "Result", "content": "search result"}]
+
+
+class FakeLLM:
+    """Fake LLM whose coordinator hands off depending on `handoff`."""
+
+    handoff = True
+    planner_prompts = []
+
+    def __init__(self, name, *args):
+        self.name = name
+
+    def with_structured_output(self, schema):
+        return self
+
+    def invoke(self, messages):
+        if self.name == "coordinator":
+            time.sleep(DELAY)
+            return self._coordinator_reply()
+        if self.name == "supervisor":
+            return {"next": "FINISH"}
+        return AIMessage(content="report")
+
+    async def ainvoke(self, messages):
+        if self.name == "coordinator":
+            await asyncio.sleep(DELAY)
+            return self._coordinator_reply()
+        return self.invoke(messages)
+
+    def _coordinator_reply(self):
+        return AIMessage(content="handoff_to_planner()" if FakeLLM.handoff else "Hi!")
+
+    def stream(self, messages):
+        FakeLLM.planner_prompts.append(messages[-1].content)
+        yield AIMessageChunk(content=json.dumps(PLAN))
+
+    async def astream(self, messages):
+        for chunk in self.stream(messages):
+            yield chunk
+
+
+def setup(monkeypatch, handoff):
+    fake_search = FakeSearch()
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(search, "tavily_tool", fake_search)
+    monkeypatch.setattr(nodes, "get_agent", FakeLLM)
+    monkeypatch.setattr(nodes, "get_llm_for_agent", FakeLLM)
+    FakeLLM.handoff, FakeLLM.planner_prompts = handoff, []
+    graph_input = {
+        "TEAM_MEMBERS": TEAM_MEMBERS,
+        "messages": [{"role": "user", "content": "What is new in Python?"}],
+        "search_before_planning": True,
+    }
+    return fake_search, build_graph(), graph_input
+
+
+def test_search_overlaps_the_coordinator(monkeypatch):
+    """Test that the pre-planning search runs alongside the coordinator and is reused."""
+    fake_search, graph, graph_input = setup(monkeypatch, handoff=True)
+    start = time.monotonic()
+    graph.invoke(graph_input)
+
+    # One search, started while the coordinator was still waiting on its LLM
+    assert len(fake_search.started) == 1
+    assert fake_search.started[0] - start < DELAY
+    assert len(FakeLLM.planner_prompts) == 1
+    assert "search result" in FakeLLM.planner_prompts[0]
+
+
+def test_async_search_overlaps_the_coordinator(monkeypatch):
+    """Test that the async coordinator and search overlap, with no second search."""
+    fake_search, graph, graph_input = setup(monkeypatch, handoff=True)
+    start = time.monotonic()
+    asyncio.run(graph.ainvoke(graph_input))
+
+    assert len(fake_search.started) == 1
+    assert time.monotonic() - start < 2 * DELAY
+    assert "search result" in FakeLLM.planner_prompts[0]
+
+
+def test_search_is_cancelled_without_handoff(monkeypatch):
+    """Test that the search is cancelled when the coordinator answers by itself."""
+    fake_search, graph, graph_input = setup(monkeypatch, handoff=False)
+
+    async def run():
+        await graph.ainvoke(graph_input)
+        # Give a leaked search the time it would need to finish
+        await asyncio.sleep(DELAY)
+
+    asyncio.run(run())
+
+    assert FakeLLM.planner_prompts == []
+    # The search started but was cancelled with the coordinator's answer
+    assert len(fake_search.started) == 1
+    assert fake_search.finished == []
+
+
+def test_warm_up_reaches_the_reasoning_endpoint(monkeypatch):
+    """Test that the warm-up request is sent through the DeepSeek client's transport."""
+    requests = []
+
+    def handler(request):
+        requests.append((request.method, request.url.path))
+        return httpx.Response(200, json={"object": "list", "data": []})
+
+    llm = create_deepseek_llm(
+        "reasoner",
+        base_url="http://llm.local/v1",
+        api_key="key",
+        http_client=httpx.Client(transport=httpx.MockTransport(handler)),
+        http_async_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    monkeypatch.setattr(llm_module, "get_llm_for_agent", lambda *args: llm)
+
+    warm_up_llm("planner", "reasoning")
+    asyncio.run(awarm_up_llm("planner", "reasoning"))
+    assert requests == [("GET", "/v1/models"), ("GET", "/v1/models")]
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+from langchain_core.messages import HumanMessage
+
+from src.prompts.prefix_report import prefix_report
+from src.prompts.template import apply_prompt_template
+
+
+def test_system_prompts_keep_a_stable_prefix():
+    """Test that only the trailing date changes between calls to the same node."""
+    for row in prefix_report(datetime(2025, 3, 1)):
+        assert row["same_day_prefix"] == row["length"], row["node"]
+        assert row["length"] - row["next_day_prefix"] < 32, row["node"]
+
+
+def test_history_follows_the_system_prompt():
+    """Test that consecutive calls share the system prompt and earlier history."""
+    history = [HumanMessage(content="hello")]
+    first = apply_prompt_template(
+        "supervisor", {"TEAM_MEMBERS": [], "messages": history}
+    )
+    second = apply_prompt_template(
+        "supervisor",
+        {"TEAM_MEMBERS": [], "messages": history + [HumanMessage(content="next")]},
+    )
+
+    assert second[: len(first)] == first
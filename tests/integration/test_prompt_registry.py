@@ -0,0 +1,41 @@
+import os
+
+import pytest
+
+from src.prompts.registry import PromptRegistry
+from src.prompts.template import prompt_registry
+
+
+def write(path, text, mtime):
+    path.write_text(text)
+    os.utime(path, (mtime, mtime))
+
+
+def test_registry_compiles_templates_once():
+    """Test that templates are compiled at load time and validated before rendering."""
+    supervisor = prompt_registry.get("supervisor")
+
+    assert prompt_registry.get("supervisor") is supervisor
+    assert supervisor.variables == {"CURRENT_TIME", "TEAM_MEMBERS"}
+    assert prompt_registry.versions()["supervisor"] == supervisor.content_hash
+    with pytest.raises(ValueError, match="TEAM_MEMBERS"):
+        supervisor.render(CURRENT_TIME="today")
+    with pytest.raises(KeyError):
+        prompt_registry.get("missing")
+
+
+def test_registry_reloads_changed_templates(tmp_path):
+    """Test mtime-based reloading in dev mode and variable validation on load."""
+    prompt = tmp_path / "greeter.md"
+    write(prompt, 'Say {"hi"} to <<NAME>>.', 1000)
+    registry = PromptRegistry(str(tmp_path), reload=True)
+    first = registry.get("greeter")
+    assert first.render(NAME="Ada") == 'Say {"hi"} to Ada.'
+
+    write(prompt, "Say bye to <<NAME>>.", 2000)
+    second = registry.get("greeter")
+    assert second.render(NAME="Ada") == "Say bye to Ada."
+    assert second.content_hash != first.content_hash
+
+    with pytest.raises(ValueError, match="NAME"):
+        PromptRegistry(str(tmp_path), known_variables={"CURRENT_TIME"})
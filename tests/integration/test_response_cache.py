@@ -0,0 +1,142 @@
+import asyncio
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agents.llm import create_openai_llm
+from src.agents.response_cache import ResponseCache
+
+REPLY = "The quick brown fox jumps over the lazy dog."
+
+
+class OpenAIStandIn(BaseHTTPRequestHandler):
+    """Minimal OpenAI-compatible chat completions endpoint."""
+
+    requests = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests += 1
+        if body.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in REPLY.split(" "):
+                chunk = {
+                    "id": "chatcmpl-1",
+                    "object": "chat.completion.chunk",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "delta": {"content": word + " "},
+                            "finish_reason": None,
+                        }
+                    ],
+                }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        payload = json.dumps(
+            {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": REPLY},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {
+                    "prompt_tokens": 1,
+                    "completion_tokens": 1,
+                    "total_tokens": 2,
+                },
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def llm():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), OpenAIStandIn)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    OpenAIStandIn.requests = 0
+    yield create_openai_llm(
+        model="test-model",
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/v1",
+        api_key="sk-test",
+        response_cache=ResponseCache(":memory:"),
+    )
+    server.shutdown()
+
+
+def test_invoke_is_served_from_cache(llm):
+    """Test that a repeated invoke with new message ids makes no second request."""
+    first = llm.invoke([HumanMessage(content="hello", id="run-1")])
+    second = llm.invoke([HumanMessage(content="hello", id="run-2")])
+
+    assert OpenAIStandIn.requests == 1
+    assert second.content == first.content
+    assert llm.response_cache.stats()["hits"] == 1
+
+    llm.invoke([HumanMessage(content="something else")])
+    assert OpenAIStandIn.requests == 2
+
+
+def test_stream_replays_cached_response_in_chunks(llm):
+    """Test that stream calls are cached and replayed as several chunks."""
+    streamed = [chunk.content for chunk in llm.stream("hello")]
+    replayed = [chunk.content for chunk in llm.stream("hello")]
+
+    assert OpenAIStandIn.requests == 1
+    assert "".join(replayed) == "".join(streamed)
+    assert len([piece for piece in replayed if piece]) > 1
+
+
+def test_cache_hit_still_emits_stream_events(llm):
+    """Test that astream_events reports tokens for a cached invoke."""
+    llm.invoke("hello")
+
+    async def collect():
+        return [
+            event["data"]["chunk"].content
+            async for event in llm.astream_events("hello", version="v2")
+            if event["event"] == "on_chat_model_stream"
+        ]
+
+    tokens = asyncio.run(collect())
+    assert OpenAIStandIn.requests == 1
+    assert len(tokens) > 1
+    assert "".join(tokens) == REPLY
+
+
+def test_cache_expires_and_evicts(tmp_path):
+    """Test TTL expiry and the least-recently-used size bound."""
+    cache = ResponseCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    for key in ("a", "b"):
+        cache.put(key, AIMessage(content=key))
+    cache.get("a")
+    cache.put("c", AIMessage(content="c"))
+
+    assert cache.get("a").content == "a"
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 2
+
+    expired = ResponseCache(str(tmp_path / "expired.sqlite"), ttl=0)
+    expired.put("a", AIMessage(content="a"))
+    assert expired.get("a") is None
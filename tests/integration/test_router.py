@@ -0,0 +1,140 @@
+import asyncio
+import json
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.agents.llm import create_llm_http_clients, create_openai_llm
+from src.agents.router import EndpointRouter, parse_endpoints
+
+
+def make_handler(status=200, delay=0.0):
+    """Build a minimal OpenAI-compatible chat completions handler."""
+
+    class OpenAIStandIn(BaseHTTPRequestHandler):
+        requests = 0
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            type(self).requests += 1
+            time.sleep(delay)
+            if status != 200:
+                self.send_response(status)
+                self.send_header("Retry-After", "60")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            payload = json.dumps(
+                {
+                    "id": "chatcmpl-1",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body["model"],
+                    "choices": [
+                        {
+                            "index": 0,
+                            "message": {
+                                "role": "assistant",
+                                "content": str(self.server.server_address[1]),
+                            },
+                            "finish_reason": "stop",
+                        }
+                    ],
+                }
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    return OpenAIStandIn
+
+
+@pytest.fixture
+def servers():
+    started = []
+
+    def start(**behaviour):
+        handler = make_handler(**behaviour)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        started.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}/v1", handler
+
+    yield start
+    for server in started:
+        server.shutdown()
+
+
+def routed_llm(base_urls):
+    router = EndpointRouter(parse_endpoints(",".join(base_urls), "sk-test"))
+    http_client, http_async_client = create_llm_http_clients(router)
+    llm = create_openai_llm(
+        model="test-model",
+        base_url=router.primary.base_url,
+        api_key="sk-test",
+        max_retries=0,
+        http_client=http_client,
+        http_async_client=http_async_client,
+    )
+    return llm, router
+
+
+def test_parse_endpoints():
+    """Test that one key is shared and mismatched key counts are rejected."""
+    endpoints = parse_endpoints("http://a/v1/, http://b/v1", "sk-1")
+    assert [e.base_url for e in endpoints] == ["http://a/v1", "http://b/v1"]
+    assert [e.api_key for e in endpoints] == ["sk-1", "sk-1"]
+    assert parse_endpoints(None, "sk-1") == []
+    with pytest.raises(ValueError):
+        parse_endpoints("http://a,http://b,http://c", "sk-1,sk-2")
+
+
+def test_router_fails_over_on_throttling(servers):
+    """Test that a 429 moves the call to the next endpoint and cools the first."""
+    throttled_url, throttled = servers(status=429)
+    healthy_url, healthy = servers()
+    llm, router = routed_llm([throttled_url, healthy_url])
+    healthy_port = healthy_url.split(":")[2].split("/")[0]
+
+    for _ in range(3):
+        assert llm.invoke("hello").content == healthy_port
+
+    assert throttled.requests == 1
+    assert healthy.requests == 3
+    assert [e["healthy"] for e in router.stats()] == [False, True]
+
+
+def test_router_prefers_the_fastest_endpoint(servers):
+    """Test that calls settle on the endpoint with the lower time to first byte."""
+    slow_url, slow = servers(delay=0.2)
+    fast_url, fast = servers()
+    llm, router = routed_llm([slow_url, fast_url])
+
+    for _ in range(6):
+        llm.invoke("hello")
+
+    assert slow.requests == 1
+    assert fast.requests == 5
+    assert router.stats()[0]["ttfb"] > router.stats()[1]["ttfb"]
+
+
+def test_async_router_fails_over_on_connection_errors(servers):
+    """Test that an unreachable endpoint is skipped by async calls."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        dead_url = f"http://127.0.0.1:{sock.getsockname()[1]}/v1"
+    healthy_url, healthy = servers()
+    llm, router = routed_llm([dead_url, healthy_url])
+
+    asyncio.run(llm.ainvoke("hello"))
+
+    assert healthy.requests == 1
+    assert router.stats()[0]["failures"] == 1
@@ -0,0 +1,127 @@
+import asyncio
+import threading
+import time
+
+from langchain_core.tools import BaseTool
+
+from src.tools.decorators import create_cached_tool
+from src.tools.search_cache import SearchCache, normalize_query
+
+
+class CountingSearch(BaseTool):
+    """Search tool stand-in that counts calls and answers slowly."""
+
+    name: str = "counting_search"
+    description: str = "test search"
+    response_format: str = "content_and_artifact"
+    calls: int = 0
+
+    def _run(self, query, run_manager=None):
+        self.calls += 1
+        time.sleep(0.2)
+        if query == "fail":
+            return "Error()", {}
+        return [{"url": f"https://example.com/{query}"}], {"query": query}
+
+    async def _arun(self, query, run_manager=None):
+        self.calls += 1
+        await asyncio.sleep(0.2)
+        return [{"url": f"https://example.com/{query}"}], {"query": query}
+
+
+def make_tool(cache):
+    return create_cached_tool(CountingSearch, cache)()
+
+
+def test_normalize_query():
+    """Test that case, width and whitespace differences share one key."""
+    assert normalize_query("  Rust   ＶＳ go ") == "rust vs go"
+
+
+def test_repeated_queries_hit_the_cache():
+    """Test that equivalent queries call the tool once and count a hit."""
+    cache = SearchCache(path=None)
+    tool = make_tool(cache)
+    first = tool.invoke({"query": "Rust async"})
+    second = tool.invoke({"query": "rust  ASYNC"})
+
+    assert first == second
+    assert tool.calls == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_callers_cannot_mutate_the_cached_result():
+    """Test that the caller who ran the search gets a copy, not the cached value."""
+    cache = SearchCache(path=None)
+    first = cache.get_or_compute("query", lambda: [{"url": "a"}])
+    first.append({"url": "b"})
+    first[0]["url"] = "changed"
+
+    assert cache.get_or_compute("query", lambda: []) == [{"url": "a"}]
+
+
+async def _first_result():
+    return [{"url": "a"}]
+
+
+def test_async_callers_cannot_mutate_the_cached_result():
+    """Test the same copy-on-return guarantee for the async path."""
+    cache = SearchCache(path=None)
+    first = asyncio.run(cache.aget_or_compute("query", _first_result))
+    first.clear()
+
+    assert cache.get("query") == [{"url": "a"}]
+
+
+def test_concurrent_identical_queries_share_one_call():
+    """Test that in-flight requests are reused by concurrent callers."""
+    cache = SearchCache(path=None)
+    tool = make_tool(cache)
+    threads = [
+        threading.Thread(target=tool.invoke, args=({"query": "same"},))
+        for _ in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert tool.calls == 1
+    assert cache.stats()["shared"] == 3
+
+
+def test_async_callers_share_one_call():
+    """Test that coroutine callers also coalesce on one request."""
+    cache = SearchCache(path=None)
+    tool = make_tool(cache)
+
+    async def run():
+        return await asyncio.gather(*(tool.ainvoke({"query": "q"}) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert tool.calls == 1
+    assert len({str(result) for result in results}) == 1
+
+
+def test_errors_are_not_cached():
+    """Test that failed searches are retried on the next call."""
+    tool = make_tool(SearchCache(path=None))
+    tool.invoke({"query": "fail"})
+    tool.invoke({"query": "fail"})
+    assert tool.calls == 2
+
+
+def test_ttl_lru_and_persistence(tmp_path):
+    """Test expiry, LRU eviction and reuse of results across cache instances."""
+    path = str(tmp_path / "search.sqlite")
+    cache = SearchCache(max_entries=1, ttl=3600, path=path)
+    cache.put("a", ([{"url": "a"}], {}))
+    cache.put("b", ([{"url": "b"}], {}))
+    assert list(cache._entries) == ["b"]
+
+    reopened = SearchCache(path=path)
+    assert reopened.get("a") == ([{"url": "a"}], {})
+
+    expired = SearchCache(ttl=0, path=None)
+    expired.put("c", "value")
+    assert expired.get("c") is None